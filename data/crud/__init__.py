@@ -3,27 +3,49 @@ from .labels import (
     format_label_for_db,
     get_or_create_labels,
     parse_search_query,
+    with_labels_and_tags,
+    get_label_ids,
+    get_label_map,
+    label_association,
+    get_main_labels,
+    get_main_labels_async
+)
+
+from .label_query import (
+    parse_label_query,
+    compile_label_query,
     apply_label_filters,
-    get_main_labels
+    clear_label_query_cache
 )
 
 from .pages import (
     get_page,
+    readable_by,
     list_pages,
     search_pages,
+    search_pages_async,
     get_pages_by_label,
+    get_pages_by_label_async,
     get_pages_by_labels,
+    PAGE_QUERY_CACHE,
     get_first_page_by_label,
     get_first_page_by_labels,
+    page_has_labels,
     get_pages_by_author,
     create_page,
     update_page,
-    delete_page
+    delete_page,
+    get_pages_by_slugs,
+    create_pages,
+    update_pages,
+    delete_pages
 )
 
 from .collections import (
     get_collection,
     list_collections,
+    list_collections_async,
+    get_collection_label_names,
     create_collection,
     update_collection,
     delete_collection
@@ -32,10 +54,16 @@ from .collections import (
 from .submissions import (
     get_submission,
     list_submissions,
+    list_submissions_async,
     search_submissions,
     create_submission,
     update_submission,
-    delete_submission
+    delete_submission,
+    get_submissions_by_ids,
+    create_submissions,
+    update_submissions,
+    delete_submissions,
+    record_submission_write
 )
 
 from .users import (
@@ -44,10 +72,17 @@ from .users import (
     count_users,
     save_user,
     delete_user,
+    record_user_write,
     get_role,
+    get_role_permissions,
     get_all_roles,
     save_role,
-    delete_role
+    delete_role,
+    get_user_by_username_async,
+    count_users_async,
+    save_user_async,
+    get_role_async,
+    get_all_roles_async
 )
 
 from .settings import (
@@ -65,6 +100,15 @@ from .stats import (
     get_pages_count_by_label,
     get_top_collections_by_submission_count,
     get_top_labels_by_page_usage,
+    get_label_facets,
+    FACET_CACHE,
+    AGGREGATE_METRICS,
+    TIME_BUCKETS,
+    AGGREGATE_DEFAULT_LIMIT,
+    AGGREGATE_MAX_LIMIT,
+    AGGREGATE_TRUNCATED_HEADER,
+    AGGREGATE_CACHE,
+    aggregate_submissions,
     get_recent_pages,
     get_recently_updated_pages,
     get_recent_submissions
@@ -74,4 +118,53 @@ from .seed import (
     seed_default_roles,
     seed_default_pages,
     seed_initial_settings
-)
\ No newline at end of file
+)
+from .fulltext import (
+    fulltext_enabled,
+    search_pages_text,
+    search_submissions_text
+)
+from .generations import (
+    PAGES_GENERATION,
+    ROLES_GENERATION,
+    USERS_GENERATION,
+    submissions_generation,
+    get_generation,
+    bump_generation,
+    GenerationCache
+)
+from .label_index import LABEL_INDEX
+from .role_cache import ROLE_PERMISSIONS
+from .token_cache import TOKEN_CACHE
+from .label_suggestions import (
+    SUGGESTION_TOP_K,
+    LABEL_SUGGEST_REFRESH_SECONDS,
+    PrefixTrie,
+    LABEL_SUGGESTIONS,
+    TAG_SUGGESTIONS,
+    rebuild_suggestions
+)
+from .name_cache import (
+    LABEL_IDS,
+    TAG_IDS,
+    invalidate_name_caches
+)
+from .field_index import (
+    FILTER_OPERATORS,
+    INDEXABLE_TYPES,
+    indexed_fields,
+    field_value,
+    coerce_field_value,
+    field_index_ddl,
+    field_index_name,
+    sync_field_indexes,
+    apply_field_query
+)
+from .pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    encode_cursor,
+    decode_cursor,
+    apply_keyset,
+    next_cursor
+)
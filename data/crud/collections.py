@@ -1,16 +1,44 @@
 from datetime import datetime, timezone
 from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from data import models, schemas
-from .labels import get_or_create_labels
+from .labels import format_label_for_db, get_or_create_labels, label_ids_in, with_labels_and_tags
 from .tags import get_or_create_tags
+from .generations import bump_generation, submissions_generation
 
 def get_collection(db: Session, slug: str) -> Optional[models.Collection]:
     return db.query(models.Collection).filter(models.Collection.slug == slug).first()
 
-def list_collections(db: Session, skip: int = 0, limit: int = 100) -> List[models.Collection]:
-    return db.query(models.Collection).order_by(models.Collection.created.desc()).offset(skip).limit(limit).all()
+def _labeled(label: str, db: Optional[Session] = None):
+    # Seeks idx_collection_labels_label instead of filtering loaded rows
+    collection_labels = models.collection_labels
+    return models.Collection.id.in_(
+        select(collection_labels.c.collection_id)
+        .where(label_ids_in(collection_labels.c.label_id, [format_label_for_db(label)], db))
+    )
+
+def list_collections(db: Session, skip: int = 0, limit: int = 100, label: Optional[str] = None) -> List[models.Collection]:
+    query = with_labels_and_tags(db.query(models.Collection), models.Collection)
+    if label:
+        query = query.filter(_labeled(label, db))
+    return query.order_by(models.Collection.created.desc()).offset(skip).limit(limit).all()
+
+async def list_collections_async(db: AsyncSession, skip: int = 0, limit: int = 100, label: Optional[str] = None) -> List[models.Collection]:
+    # Async sessions cannot lazy-load, relationships come back with the rows
+    query = with_labels_and_tags(select(models.Collection), models.Collection)
+    if label:
+        query = query.where(_labeled(label))
+    query = query.order_by(models.Collection.created.desc()).offset(skip).limit(limit)
+    return (await db.execute(query)).scalars().all()
+
+def get_collection_label_names(db: Session) -> List[str]:
+    """Distinct names of the labels used by at least one collection, sorted."""
+    used = select(models.collection_labels.c.label_id).distinct()
+    query = select(models.Label.name).where(models.Label.id.in_(used)).order_by(models.Label.name)
+    return list(db.execute(query).scalars())
 
 def create_collection(db: Session, collection: schemas.CollectionCreate) -> models.Collection:
     now = datetime.now(timezone.utc).isoformat()
@@ -58,6 +86,8 @@ def delete_collection(db: Session, slug: str) -> bool:
     db_collection = get_collection(db, slug=slug)
     if db_collection:
         db.delete(db_collection)
+        # Its submissions go with it (cascade)
+        bump_generation(db, submissions_generation(slug))
         db.commit()
         return True
     return False
\ No newline at end of file
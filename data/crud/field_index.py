@@ -0,0 +1,207 @@
+import hashlib
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import JSON, Numeric, String, case, cast, func, literal_column, select, text
+from sqlalchemy.orm import Session
+
+from data import models
+
+# --- Indexed submission fields ---
+# A field in a collection schema can be marked {"indexed": true}. Every such
+# field name gets an expression index on
+#   submissions(collection_slug, json_extract(submission_json, '$."<name>"'))
+# shared by all collections that index a field of that name; the leading
+# collection_slug keeps each collection's rows together, so equality, range
+# and ORDER BY on the field are all served by one index seek.
+#
+# A database only uses an expression index when the query contains the very
+# same expression, so the JSON path is written into the SQL as a literal (a
+# bound parameter would not match) by field_value() and by the DDL alike.
+# PostgreSQL reads the field with ->> (cast for numbers and booleans), which
+# depends on the field type, so there the index is per name and type.
+#
+# Values of indexed number and boolean fields are stored as JSON numbers and
+# booleans (see coerce_field_value()). SQLite still compares across types, any
+# TEXT ranking above every number, so filters on those fields also check the
+# JSON type: values stored before coercion existed never match by accident.
+
+FIELD_INDEX_PREFIX = "ix_submission_field_"
+
+# Types whose JSON values are scalars SQLite can compare (see the schema editor)
+INDEXABLE_TYPES = {"string", "number", "boolean"}
+
+FILTER_OPERATORS = {
+    "eq": lambda value, arg: value == arg,
+    "ne": lambda value, arg: value != arg,
+    "lt": lambda value, arg: value < arg,
+    "lte": lambda value, arg: value <= arg,
+    "gt": lambda value, arg: value > arg,
+    "gte": lambda value, arg: value >= arg,
+}
+
+# json_type() results a filter accepts per field type (SQLite)
+SQLITE_JSON_TYPES = {
+    "number": ("integer", "real"),
+    "boolean": ("true", "false"),
+}
+
+BOOLEAN_VALUES = {
+    "true": True, "1": True, "yes": True, "on": True,
+    "false": False, "0": False, "no": False, "off": False,
+}
+
+# (field, operator, value) with the value already converted to the field's type
+FieldFilter = Tuple[str, str, Any]
+# (field, descending)
+FieldSort = Tuple[str, bool]
+
+def indexed_fields(schema: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """{name: type} of the fields a collection schema marks as indexed."""
+    fields = (schema or {}).get("fields") or []
+    return {
+        field["name"]: field.get("type", "string")
+        for field in fields
+        if isinstance(field, dict) and field.get("indexed") and field.get("name")
+    }
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def field_path(name: str) -> str:
+    return '$."' + name.replace('"', '\\"') + '"'
+
+def _literal(value: Any):
+    return literal_column(_sql_string(value) if isinstance(value, str) else str(value))
+
+def field_value(name: str, field_type: str = "string", dialect: str = "sqlite", data: Any = None):
+    """
+    A field's value, usable in filters, ORDER BY and aggregates: the indexed
+    json_extract() expression, or ->> on PostgreSQL (NULL when the stored JSON
+    type does not match a number or boolean field).
+    """
+    if data is None:
+        data = models.Submission.data
+    if dialect == "postgresql":
+        value = data.op("->>", return_type=String)(_literal(name))
+        json_type = func.json_typeof(data.op("->", return_type=JSON)(_literal(name)))
+        if field_type == "number":
+            return case((json_type == _literal("number"), cast(value, Numeric)))
+        if field_type == "boolean":
+            # Compared to 1/0, like json_extract() returns them
+            return case((json_type == _literal("boolean"), case((value == _literal("true"), _literal(1)), else_=_literal(0))))
+        return value
+    return func.json_extract(data, _literal(field_path(name)))
+
+def _sqlite_type_check(name: str, field_type: str):
+    return func.json_type(models.Submission.data, _literal(field_path(name))).in_(
+        SQLITE_JSON_TYPES[field_type]
+    )
+
+def coerce_field_value(field_type: str, value: Any) -> Any:
+    """
+    The JSON value an indexed field is stored as: "3" -> 3 for numbers,
+    "on" -> True for booleans. Raises ValueError when `value` does not fit.
+    """
+    if field_type == "number":
+        if isinstance(value, bool):
+            raise ValueError(value)
+        if isinstance(value, str):
+            raw = value.strip()
+            try:
+                value = int(raw)
+            except ValueError:
+                value = float(raw)
+        if not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(value)
+        return value
+    if field_type == "boolean":
+        if isinstance(value, bool):
+            return value
+        key = str(value).strip().lower()
+        if key not in BOOLEAN_VALUES:
+            raise ValueError(value)
+        return BOOLEAN_VALUES[key]
+    return value
+
+def field_index_name(name: str, field_type: str = "string", dialect: str = "sqlite") -> str:
+    # Short enough for PostgreSQL's 63 character identifiers
+    key = f"{name}:{field_type}" if dialect == "postgresql" and field_type != "string" else name
+    readable = re.sub(r"[^a-z0-9_]+", "_", key.lower()).strip("_")[:30]
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    return f"{FIELD_INDEX_PREFIX}{readable}_{digest}"
+
+def field_index_ddl(name: str, field_type: str, dialect: Any) -> str:
+    """CREATE INDEX for one field, on exactly the expression field_value() queries."""
+    value = field_value(name, field_type, dialect.name, data=literal_column("submission_json", JSON))
+    expression = value.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return (
+        f'CREATE INDEX IF NOT EXISTS "{field_index_name(name, field_type, dialect.name)}" '
+        f"ON submissions (collection_slug, ({expression}))"
+    )
+
+PRESENT_INDEXES_SQL = {
+    "sqlite": "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'submissions'",
+    "postgresql": "SELECT indexname FROM pg_indexes WHERE tablename = 'submissions'",
+}
+
+def sync_field_indexes(conn: Any) -> Tuple[List[str], List[str]]:
+    """
+    Creates the indexes for every field some collection marks as indexed and
+    drops the ones no collection needs any more. `conn` is a Session or a
+    Connection; nothing is committed. Returns (created, dropped) index names.
+
+    Building an index holds the write lock for a while, so this stays off the
+    request path: collection routes queue it as a background task (see
+    CollectionService.sync_field_indexes()) and startup runs it once.
+    """
+    if isinstance(conn, Session):
+        conn = conn.connection()
+    dialect = conn.dialect
+    if dialect.name not in PRESENT_INDEXES_SQL:
+        return [], []
+
+    wanted: Dict[str, Tuple[str, str]] = {}
+    for schema in conn.execute(select(models.Collection.schema)).scalars():
+        for name, field_type in indexed_fields(schema).items():
+            wanted[field_index_name(name, field_type, dialect.name)] = (name, field_type)
+
+    present: Set[str] = {
+        index_name for index_name in conn.execute(text(PRESENT_INDEXES_SQL[dialect.name])).scalars()
+        if index_name.startswith(FIELD_INDEX_PREFIX)
+    }
+
+    created = sorted(wanted.keys() - present)
+    dropped = sorted(present - wanted.keys())
+    # Field names are user input: DDL goes to the driver as is, without bind parsing
+    for index_name in created:
+        conn.exec_driver_sql(field_index_ddl(*wanted[index_name], dialect))
+    for index_name in dropped:
+        conn.exec_driver_sql(f'DROP INDEX IF EXISTS "{index_name}"')
+    return created, dropped
+
+def apply_field_query(
+    query: Any,
+    filters: List[FieldFilter],
+    sort: Optional[FieldSort] = None,
+    field_types: Optional[Dict[str, str]] = None,
+    dialect: str = "sqlite",
+) -> Any:
+    """
+    Adds field filters and, optionally, a field ORDER BY (ties broken by id) to
+    a Query/select(). `field_types` is {name: type}, see indexed_fields().
+    """
+    field_types = field_types or {}
+    for name, operator, value in filters:
+        field_type = field_types.get(name, "string")
+        query = query.filter(FILTER_OPERATORS[operator](field_value(name, field_type, dialect), value))
+        if dialect != "postgresql" and field_type in SQLITE_JSON_TYPES:
+            query = query.filter(_sqlite_type_check(name, field_type))
+    if sort is not None:
+        name, descending = sort
+        value = field_value(name, field_types.get(name, "string"), dialect)
+        if descending:
+            query = query.order_by(value.desc(), models.Submission.id.desc())
+        else:
+            query = query.order_by(value.asc(), models.Submission.id.asc())
+    return query
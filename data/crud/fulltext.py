@@ -0,0 +1,175 @@
+import html
+import re
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import Text, and_, cast, column, func, literal_column, or_, table, text
+from sqlalchemy.orm import Session, defer
+
+from data import models
+from .label_query import apply_label_filters
+from .labels import with_labels_and_tags
+from .pages import readable_by, with_page_body
+
+# --- Full-text search ---
+# Ranked search over pages_fts / submissions_fts (see data/migrations.py).
+# Databases without the FTS tables (other backends, SQLite without FTS5) get a
+# LIKE scan with the same signature, unranked and newest first.
+
+# Snippet highlight markers: SQLite puts these around matches, format_snippet()
+# escapes the text and turns them into <mark> tags
+MARK_START, MARK_END = "\x02", "\x03"
+SNIPPET_TOKENS = 16
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Per database URL. Only positives are remembered, a database gains the
+# tables once (at startup) and never loses them.
+_fulltext_urls: Set[str] = set()
+
+def fulltext_enabled(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    url = str(bind.url)
+    if url not in _fulltext_urls:
+        found = db.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages_fts'")).first()
+        if found is None:
+            return False
+        _fulltext_urls.add(url)
+    return True
+
+def search_terms(query_text: str) -> List[str]:
+    return _WORD.findall(query_text or "")
+
+def to_fts_query(terms: List[str]) -> str:
+    """
+    Every word must match; the last one also matches as a prefix so results
+    show up while the user is still typing. Words are quoted, so FTS5 operators
+    in user input are treated as text.
+    """
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def format_snippet(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+def _fallback_snippet(terms: List[str], *texts: Optional[str]) -> Optional[str]:
+    """A SNIPPET_TOKENS-word window around the first match, like FTS5's snippet()."""
+    lowered = [term.lower() for term in terms]
+    for value in texts:
+        if not value:
+            continue
+        words = value.split()
+        for i, word in enumerate(words):
+            if any(term in word.lower() for term in lowered):
+                start = max(0, i - SNIPPET_TOKENS // 2)
+                window = words[start:start + SNIPPET_TOKENS]
+                marked = [
+                    f"{MARK_START}{w}{MARK_END}" if any(term in w.lower() for term in lowered) else w
+                    for w in window
+                ]
+                prefix = "…" if start > 0 else ""
+                suffix = "…" if start + SNIPPET_TOKENS < len(words) else ""
+                return format_snippet(prefix + " ".join(marked) + suffix)
+    return None
+
+def search_pages_text(
+    db: Session,
+    query_text: str,
+    label_query: Optional[str] = None,
+    read_labels: Optional[List[str]] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Tuple[models.Page, Optional[str], Optional[float]]]:
+    """
+    Pages matching every word of `query_text`, best match first, as
+    (page, snippet, rank) tuples. Lower rank is better (bm25), title matches
+    weigh most. `label_query` and `read_labels` narrow the result like
+    search_pages() and list_pages() do.
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return []
+
+    enabled = fulltext_enabled(db)
+    if enabled:
+        pages_fts = table("pages_fts", column("rowid"))
+        fts = literal_column("pages_fts")
+        snippet = func.snippet(fts, -1, MARK_START, MARK_END, "…", SNIPPET_TOKENS)
+        rank = func.bm25(fts, 10.0, 4.0, 1.0)
+        query = (
+            with_page_body(db.query(models.Page, snippet, rank), load_body=False)
+            .join(pages_fts, pages_fts.c.rowid == models.Page.id)
+            .filter(fts.op("MATCH")(to_fts_query(terms)))
+        )
+        order = (rank, models.Page.id)
+    else:
+        # markdown is needed for the snippet here, html stays deferred
+        query = (
+            with_page_body(db.query(models.Page), load_body=True)
+            .options(defer(models.Page.html))
+        ).filter(and_(*[
+            or_(
+                models.Page.title.icontains(term, autoescape=True),
+                models.Page.content.icontains(term, autoescape=True),
+                models.Page.markdown.icontains(term, autoescape=True),
+            )
+            for term in terms
+        ]))
+        order = (models.Page.created.desc(), models.Page.id.desc())
+
+    if label_query:
+        query = apply_label_filters(query, models.Page, label_query, db)
+    if read_labels is not None:
+        query = query.filter(readable_by(read_labels))
+    rows = query.order_by(*order).offset(skip).limit(limit).all()
+
+    if enabled:
+        return [(page, format_snippet(snippet), rank) for page, snippet, rank in rows]
+    return [(page, _fallback_snippet(terms, page.title, page.content, page.markdown), None) for page in rows]
+
+def search_submissions_text(
+    db: Session,
+    query_text: str,
+    collection_slug: Optional[str] = None,
+    label_query: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[Tuple[models.Submission, Optional[str], Optional[float]]]:
+    """Submissions whose data values match every word of `query_text`, see search_pages_text()."""
+    terms = search_terms(query_text)
+    if not terms:
+        return []
+
+    enabled = fulltext_enabled(db)
+    if enabled:
+        submissions_fts = table("submissions_fts", column("rowid"))
+        fts = literal_column("submissions_fts")
+        snippet = func.snippet(fts, 0, MARK_START, MARK_END, "…", SNIPPET_TOKENS)
+        rank = func.bm25(fts)
+        query = (
+            with_labels_and_tags(db.query(models.Submission, snippet, rank), models.Submission)
+            .join(submissions_fts, submissions_fts.c.rowid == models.Submission.id)
+            .filter(fts.op("MATCH")(to_fts_query(terms)))
+        )
+        order = (rank, models.Submission.id)
+    else:
+        # The JSON column is stored as text, LIKE sees keys as well as values
+        data_text = cast(models.Submission.data, Text)
+        query = with_labels_and_tags(db.query(models.Submission), models.Submission).filter(and_(*[
+            data_text.icontains(term, autoescape=True) for term in terms
+        ]))
+        order = (models.Submission.created.desc(), models.Submission.id.desc())
+
+    if collection_slug:
+        query = query.filter(models.Submission.collection_slug == collection_slug)
+    if label_query:
+        query = apply_label_filters(query, models.Submission, label_query, db)
+    rows = query.order_by(*order).offset(skip).limit(limit).all()
+
+    if enabled:
+        return [(submission, format_snippet(snippet), rank) for submission, snippet, rank in rows]
+    return [(submission, None, None) for submission in rows]
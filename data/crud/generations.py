@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, TypeVar
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from data import models
+from .name_cache import UPSERT_INSERTS
+
+PAGES_GENERATION = "pages"
+ROLES_GENERATION = "roles"
+USERS_GENERATION = "users"
+
+def submissions_generation(collection_slug: str) -> str:
+    """One counter per collection, moved by every write to its submissions."""
+    return f"submissions:{collection_slug}"
+
+T = TypeVar("T")
+
+def get_generation(db: Session, name: str) -> int:
+    value = db.execute(select(models.Generation.value).where(models.Generation.name == name)).scalar()
+    return value or 0
+
+def bump_generation(db: Session, name: str) -> int:
+    """
+    Increments a write counter inside the caller's transaction and returns the
+    new value. Does not commit: the bump becomes visible together with the write.
+    """
+    table = models.Generation.__table__
+    upsert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(table).values(name=name, value=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=["name"], set_={"value": table.c.value + 1}
+        ).returning(table.c.value)
+        return db.execute(statement).scalar_one()
+
+    # No ON CONFLICT: bump the row, or create it if nobody has yet
+    increment = update(table).where(table.c.name == name).values(value=table.c.value + 1)
+    if db.execute(increment).rowcount == 0:
+        try:
+            with db.begin_nested():
+                db.execute(table.insert().values(name=name, value=1))
+            return 1
+        except IntegrityError:
+            # Created concurrently, the row is there now
+            db.execute(increment)
+    return get_generation(db, name)
+
+class GenerationCache:
+    """
+    LRU of computed results that stay valid until the named generation moves,
+    i.e. until the next write of that kind from any worker process.
+    Costs one primary-key SELECT per lookup. Caches over many counters (one
+    per collection, say) pass the counter with each lookup instead.
+    """
+    def __init__(self, generation: Optional[str] = None, size: int = 256):
+        self.generation = generation
+        self.size = size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, db: Session, key: Hashable, compute: Callable[[], T], generation_name: Optional[str] = None) -> T:
+        generation = get_generation(db, generation_name or self.generation)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from data import models
+from .generations import PAGES_GENERATION, get_generation
+from .label_query import parse_label_query
+from .name_cache import LABEL_IDS
+
+# --- In-memory label index for pages ---
+# label id -> bitmap of the ids of the pages carrying it. A bitmap is a plain
+# Python int (bit n set = page n): AND / OR / AND NOT over whole posting lists
+# run in C, and a posting list costs one bit per page instead of a set of ORM
+# objects. The database is only asked for the final rows.
+#
+# Page writes stage their label changes on the session; they are applied when
+# that session commits. Every write also bumps the "pages" generation, which
+# is how changes made by other worker processes are noticed (full rebuild).
+
+# Seconds between generation checks, 0 checks on every read. Writes made by
+# this process are visible immediately either way.
+LABEL_INDEX_RECHECK_SECONDS = float(os.getenv("LABEL_INDEX_RECHECK_SECONDS", "1"))
+
+# Results larger than this are left to SQL instead of becoming an IN (...) list
+LABEL_INDEX_MAX_IDS = int(os.getenv("LABEL_INDEX_MAX_IDS", "5000"))
+
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+def ids_to_bitmap(ids: Iterable[int]) -> int:
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for page_id in ids:
+        buffer[page_id >> 3] |= 1 << (page_id & 7)
+    return int.from_bytes(buffer, "little")
+
+def bitmap_to_ids(bitmap: int) -> List[int]:
+    ids = []
+    for offset, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = offset * 8
+            ids.extend(base + bit for bit in _BYTE_BITS[byte])
+    return ids
+
+class LabelIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[int, int] = {}
+        self._labels_of: Dict[int, FrozenSet[int]] = {}
+        self._all_pages = 0
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+        self._session_key = "label_index:pages"
+
+    # --- Maintenance ---
+
+    def _rebuild(self, db: Session, generation: int):
+        page_ids: Dict[int, List[int]] = {}
+        labels_of: Dict[int, set] = {page_id: set() for page_id in db.execute(select(models.Page.id)).scalars()}
+        rows = db.execute(
+            select(models.Page.id, models.page_labels.c.label_id)
+            .join(models.page_labels, models.page_labels.c.page_slug == models.Page.slug)
+        )
+        for page_id, label_id in rows:
+            page_ids.setdefault(label_id, []).append(page_id)
+            labels_of[page_id].add(label_id)
+
+        with self._lock:
+            self._postings = {label_id: ids_to_bitmap(ids) for label_id, ids in page_ids.items()}
+            self._labels_of = {page_id: frozenset(labels) for page_id, labels in labels_of.items()}
+            self._all_pages = ids_to_bitmap(labels_of)
+            self._generation = generation
+
+    def refresh(self, db: Session, force: bool = False):
+        """Rebuilds the index if the pages generation moved since it was built."""
+        now = time.monotonic()
+        if not force and self._generation is not None and now - self._checked_at < LABEL_INDEX_RECHECK_SECONDS:
+            return
+        generation = get_generation(db, PAGES_GENERATION)
+        if force or generation != self._generation:
+            self._rebuild(db, generation)
+        self._checked_at = now
+
+    def stage(self, db: Session, generation: int, changes: Dict[int, Optional[Iterable[int]]]):
+        """
+        Records page label changes ({page id: label ids, or None if deleted})
+        made under `generation`, to be applied when `db` commits.
+        """
+        db.info.setdefault(self._session_key, []).append((generation, changes))
+
+    def _apply(self, generation: int, changes: Dict[int, Optional[Iterable[int]]]):
+        with self._lock:
+            if self._generation is None or generation != self._generation + 1:
+                # Missed a write (another process, or commits finishing out of order)
+                self._generation = None
+                return
+            for page_id, label_ids in changes.items():
+                bit = 1 << page_id
+                for label_id in self._labels_of.pop(page_id, frozenset()):
+                    self._postings[label_id] &= ~bit
+                if label_ids is None:
+                    self._all_pages &= ~bit
+                    continue
+                self._all_pages |= bit
+                self._labels_of[page_id] = frozenset(label_ids)
+                for label_id in self._labels_of[page_id]:
+                    self._postings[label_id] = self._postings.get(label_id, 0) | bit
+            self._generation = generation
+
+    def commit(self, db: Session):
+        for generation, changes in db.info.pop(self._session_key, []):
+            self._apply(generation, changes)
+
+    def rollback(self, db: Session):
+        db.info.pop(self._session_key, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation = None
+
+    # --- Queries ---
+
+    def search(self, db: Session, query_str: str) -> Optional[List[int]]:
+        """
+        Ids of the pages matching a label query (see label_query.py), or None
+        when the index cannot answer it (wildcards, very large results).
+        """
+        included, excluded = parse_label_query(query_str)
+        names = {alt for term in included + excluded for alt in term}
+        if any(name.endswith("*") for name in names):
+            return None
+
+        self.refresh(db)
+        label_ids = LABEL_IDS.get_ids(db, names)
+
+        with self._lock:
+            def term_bitmap(term):
+                bitmap = 0
+                for name in term:
+                    if name in label_ids:
+                        bitmap |= self._postings.get(label_ids[name], 0)
+                return bitmap
+
+            result = self._all_pages
+            for term in included:
+                result &= term_bitmap(term)
+            for term in excluded:
+                result &= ~term_bitmap(term)
+
+        if result.bit_count() > LABEL_INDEX_MAX_IDS:
+            return None
+        return bitmap_to_ids(result)
+
+    def has_labels(self, db: Session, page_id: int, names: Iterable[str]) -> Optional[bool]:
+        """Whether the page carries every label, or None if the page is not indexed (yet)."""
+        self.refresh(db)
+        names = set(names)
+        label_ids = LABEL_IDS.get_ids(db, names)
+        with self._lock:
+            page_labels = self._labels_of.get(page_id)
+        if page_labels is None:
+            return None
+        return len(label_ids) == len(names) and all(label_id in page_labels for label_id in label_ids.values())
+
+LABEL_INDEX = LabelIndex()
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_page_labels(db: Session):
+    LABEL_INDEX.commit(db)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_page_labels(db: Session):
+    LABEL_INDEX.rollback(db)
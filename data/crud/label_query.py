@@ -0,0 +1,168 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from sqlalchemy import and_, except_, intersect, or_, select, true
+from sqlalchemy.orm import Query, Session
+
+from data import models
+from .labels import parse_search_query, label_association
+from .name_cache import LABEL_IDS
+
+# --- Label query language ---
+#   blog news             rows carrying both labels (AND)
+#   -sys:hidden           ... but not this one
+#   main:blog|main:news   ... either of these (OR group, also works excluded)
+#   main:*                ... any label starting with "main:"
+#
+# A query compiles to one compound statement over the association table,
+#   (term INTERSECT term ...) EXCEPT (excluded terms)
+# used as `parent IN (...)`. Every term reads the label_id index; plain names
+# are bound as ids from the name cache, the labels table is only consulted for
+# wildcards and for names the cache does not know (yet).
+
+LABEL_QUERY_CACHE_SIZE = 512
+
+# ((alternative, ...), ...) for the included and the excluded terms, sorted
+# so that equivalent queries ("b a" and "a b") share one cache entry
+Terms = Tuple[Tuple[str, ...], ...]
+
+def parse_label_query(query_str: str) -> Tuple[Terms, Terms]:
+    included, excluded = parse_search_query(query_str)
+
+    def groups(terms):
+        alternatives = {tuple(sorted({alt for alt in term.split("|") if alt})) for term in terms}
+        alternatives.discard(())
+        return tuple(sorted(alternatives))
+
+    return groups(included), groups(excluded)
+
+def _plain_names(*term_lists: Terms):
+    return {alt for terms in term_lists for term in terms for alt in term if not alt.endswith("*")}
+
+def starts_with(column: Any, prefix: str):
+    """
+    Prefix match as a range, which the unique index on labels.name can serve
+    (SQLite's LIKE is case-insensitive and would scan the table instead).
+    """
+    if not prefix:
+        return true()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+def _term_condition(label_column: Any, term: Tuple[str, ...]):
+    """Returns (condition, resolved): resolved is False if a name was not in the cache."""
+    names = [alt for alt in term if not alt.endswith("*")]
+    prefixes = [alt[:-1] for alt in term if alt.endswith("*")]
+
+    known = LABEL_IDS.cached_ids(names)
+    unknown = [name for name in names if name not in known]
+
+    conditions = []
+    if known:
+        conditions.append(label_column.in_(sorted(known.values())))
+    if unknown:
+        conditions.append(label_column.in_(
+            select(models.Label.id).where(models.Label.name.in_(unknown))
+        ))
+    for prefix in prefixes:
+        conditions.append(label_column.in_(
+            select(models.Label.id).where(starts_with(models.Label.name, prefix))
+        ))
+    return or_(*conditions), not unknown
+
+def _compile(model_class: Any, included: Terms, excluded: Terms):
+    parent_key, parent_column, label_column = label_association(model_class)
+    resolved = True
+
+    def term_select(condition):
+        return select(parent_column).where(condition)
+
+    include_selects = []
+    for term in included:
+        condition, term_resolved = _term_condition(label_column, term)
+        resolved = resolved and term_resolved
+        include_selects.append(term_select(condition))
+
+    exclude_select = None
+    if excluded:
+        conditions = []
+        for term in excluded:
+            condition, term_resolved = _term_condition(label_column, term)
+            resolved = resolved and term_resolved
+            conditions.append(condition)
+        exclude_select = term_select(or_(*conditions))
+
+    if not include_selects:
+        return parent_key.not_in(exclude_select), resolved
+
+    statement = include_selects[0] if len(include_selects) == 1 else intersect(*include_selects)
+    if exclude_select is not None:
+        if len(include_selects) > 1:
+            # SQLite rejects a parenthesized compound as the left side of EXCEPT
+            statement = select(statement.subquery().c[0])
+        statement = except_(statement, exclude_select)
+    return parent_key.in_(statement), resolved
+
+class _CompiledQueries:
+    """
+    LRU of compiled conditions per (model, normalized query). Only fully
+    resolved conditions are kept: ids never change, so those stay correct.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            condition = self._entries.get(key)
+            if condition is not None:
+                self._entries.move_to_end(key)
+            return condition
+
+    def put(self, key, condition):
+        with self._lock:
+            self._entries[key] = condition
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_compiled = _CompiledQueries(LABEL_QUERY_CACHE_SIZE)
+
+def compile_label_query(model_class: Any, query_str: str, db: Optional[Session] = None):
+    """
+    WHERE condition for a label query on Page, Collection or Submission, or None
+    for an empty query. Passing a session lets names missing from the cache be
+    looked up first, so the compiled condition can be reused.
+    """
+    included, excluded = parse_label_query(query_str)
+    if not included and not excluded:
+        return None
+
+    key = (model_class.__name__, included, excluded)
+    condition = _compiled.get(key)
+    if condition is not None:
+        return condition
+
+    if db is not None:
+        LABEL_IDS.get_ids(db, _plain_names(included, excluded))
+    condition, resolved = _compile(model_class, included, excluded)
+    if resolved:
+        _compiled.put(key, condition)
+    return condition
+
+def clear_label_query_cache():
+    _compiled.clear()
+
+def apply_label_filters(query: Query, model_class: Any, query_str: str, db: Optional[Session] = None) -> Query:
+    """Filters a Query/select() by a label query, see the syntax above."""
+    if not query_str:
+        return query
+    condition = compile_label_query(model_class, query_str, db)
+    if condition is None:
+        return query
+    return query.filter(condition)
@@ -0,0 +1,130 @@
+import os
+import threading
+from bisect import insort
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from data import models
+from .name_cache import LABEL_IDS, TAG_IDS, NameCache
+
+# --- Label / tag autocomplete ---
+# A prefix trie over every label (or tag) name. Each node keeps the
+# SUGGESTION_TOP_K most used names below it, so a keystroke is one walk down
+# the typed prefix and a slice: no database, no scan over matching names.
+#
+# Usage counts (pages + collections + submissions carrying the name) are read
+# when the trie is built: at startup, then in the background every
+# LABEL_SUGGEST_REFRESH_SECONDS (see main.py), never by a keystroke. Names
+# created by this process join it as soon as the creating session commits (see
+# NameCache.subscribe); everything else, counts included, catches up at the
+# next rebuild.
+
+SUGGESTION_TOP_K = 20
+
+# Seconds between background rebuilds of the tries, 0 disables them
+LABEL_SUGGEST_REFRESH_SECONDS = float(os.getenv("LABEL_SUGGEST_REFRESH_SECONDS", "300"))
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.top: List[Tuple[int, str]] = []  # (-count, name), best first
+
+class PrefixTrie:
+    def __init__(self, top_k: int = SUGGESTION_TOP_K):
+        self.top_k = top_k
+        self.root = _Node()
+        self.counts: Dict[str, int] = {}
+
+    def _offer(self, node: _Node, name: str, entry: Tuple[int, str]):
+        top = [item for item in node.top if item[1] != name]
+        insort(top, entry)
+        del top[self.top_k:]
+        node.top = top
+
+    def add(self, name: str, count: int):
+        """Adds a name or changes its count."""
+        self.counts[name] = count
+        entry = (-count, name)
+        node = self.root
+        self._offer(node, name, entry)
+        for char in name:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            self._offer(node, name, entry)
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Up to `limit` (<= top_k) names starting with `prefix`, most used first."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(name, -negative_count) for negative_count, name in node.top[:limit]]
+
+class NameSuggestions:
+    def __init__(self, name_cache: NameCache, association_tables: List[Any], id_column: str):
+        self.model_class = name_cache.model_class
+        self.association_tables = association_tables
+        self.id_column = id_column
+        self._trie: Optional[PrefixTrie] = None
+        self._lock = threading.Lock()
+        name_cache.subscribe(self._add_committed)
+
+    def _usage_counts(self, db: Session) -> Dict[str, int]:
+        usage = union_all(*[
+            select(table.c[self.id_column].label("name_id")) for table in self.association_tables
+        ]).subquery()
+        query = (
+            select(self.model_class.name, func.count(usage.c.name_id))
+            .outerjoin(usage, usage.c.name_id == self.model_class.id)
+            .group_by(self.model_class.id)
+        )
+        return dict(db.execute(query).all())
+
+    def rebuild(self, db: Session):
+        trie = PrefixTrie()
+        for name, count in self._usage_counts(db).items():
+            trie.add(name, count)
+        with self._lock:
+            self._trie = trie
+
+    def _add_committed(self, names: Dict[str, int]):
+        with self._lock:
+            if self._trie is None:
+                return
+            for name in names:
+                # A new name is about to be used by the row that created it
+                if name not in self._trie.counts:
+                    self._trie.add(name, 1)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Memory only; nothing is suggested until the first rebuild."""
+        trie = self._trie
+        if trie is None:
+            return []
+        return trie.suggest(prefix, min(limit, trie.top_k))
+
+    def invalidate(self):
+        with self._lock:
+            self._trie = None
+
+LABEL_SUGGESTIONS = NameSuggestions(
+    LABEL_IDS,
+    [models.page_labels, models.collection_labels, models.submission_labels],
+    "label_id",
+)
+TAG_SUGGESTIONS = NameSuggestions(
+    TAG_IDS,
+    [models.page_tags, models.collection_tags, models.submission_tags],
+    "tag_id",
+)
+
+def rebuild_suggestions(db: Session):
+    """Rebuilds the label and tag tries (startup and the background refresh)."""
+    LABEL_SUGGESTIONS.rebuild(db)
+    TAG_SUGGESTIONS.rebuild(db)
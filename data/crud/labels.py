@@ -1,8 +1,9 @@
-from typing import List, Any
-from sqlalchemy.orm import Session, Query
-from sqlalchemy import func
-from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, Query, selectinload
+from sqlalchemy import or_, select
 from data import models
+from .name_cache import LABEL_IDS
 
 def format_label_for_db(label: str) -> str:
     """Standardizes label strings (Danbooru style)."""
@@ -13,33 +14,25 @@ def format_label_for_db(label: str) -> str:
     clean = clean.replace("<", "").replace(">", "")
     return clean
 
-def get_or_create_labels(db: Session, label_list: List[str]) -> List[models.Label]:
-    """Concurrency-Safe 'Get or Create'."""
-    if not label_list:
-        return []
-
-    clean_names = set(format_label_for_db(t) for t in label_list if format_label_for_db(t))
+def get_label_ids(db: Session, label_list: List[str]) -> Dict[str, int]:
+    """
+    Concurrency-Safe 'Get or Create', keyed by the formatted name.
+    Known names come from the process-wide cache, missing ones are created in one INSERT.
+    """
+    clean_names = set(format_label_for_db(t) for t in (label_list or []))
+    clean_names.discard("")
     if not clean_names:
-        return []
+        return {}
+    return LABEL_IDS.get_or_create_ids(db, clean_names)
 
-    existing_labels = db.query(models.Label).filter(models.Label.name.in_(clean_names)).all()
-    existing_label_map = {t.name: t for t in existing_labels}
-    final_labels = list(existing_labels)
-    missing_names = clean_names - set(existing_label_map.keys())
-    
-    for name in missing_names:
-        try:
-            with db.begin_nested():
-                new_label = models.Label(name=name)
-                db.add(new_label)
-                db.flush()
-                final_labels.append(new_label)
-        except IntegrityError:
-            existing = db.query(models.Label).filter(models.Label.name == name).first()
-            if existing:
-                final_labels.append(existing)
+def get_or_create_labels(db: Session, label_list: List[str]) -> List[models.Label]:
+    """Concurrency-Safe 'Get or Create'."""
+    # Ids come from the name cache, so no per-write SELECT on labels
+    return LABEL_IDS.attach(db, get_label_ids(db, label_list))
 
-    return final_labels
+def get_label_map(db: Session, label_list: List[str]) -> Dict[str, models.Label]:
+    """get_or_create_labels() keyed by the formatted name, for resolving a whole batch at once."""
+    return {label.name: label for label in get_or_create_labels(db, label_list)}
 
 def parse_search_query(query_str: str):
     if not query_str:
@@ -61,23 +54,41 @@ def parse_search_query(query_str: str):
                 included.add(formatted)
     return list(included), list(excluded)
 
-def apply_label_filters(query: Query, model_class: Any, query_str: str) -> Query:
-    if not query_str:
-        return query
-    included_labels, excluded_labels = parse_search_query(query_str)
-    for label_name in excluded_labels:
-        query = query.filter(~model_class.labels.any(models.Label.name == label_name))
-    if included_labels:
-        association_table = model_class.labels.property.secondary
-        query = (
-            query
-            .join(association_table)
-            .join(models.Label)
-            .filter(models.Label.name.in_(included_labels))
-            .group_by(model_class.id)
-            .having(func.count(models.Label.id) == len(included_labels))
-        )
-    return query
+def with_labels_and_tags(query: Query, model_class: Any) -> Query:
+    """
+    Batch-loads labels and tags for every row of a list query (one extra SELECT
+    per relationship, whatever the page size) instead of one lazy load per row.
+    Works for both Query and select() statements.
+    """
+    return query.options(selectinload(model_class.labels), selectinload(model_class.tags))
+
+def label_association(model_class: Any):
+    """
+    (parent key on model_class, association parent column, association label_id column)
+    for the labels relationship of Page, Collection or Submission.
+    """
+    relationship = model_class.labels.property
+    parent_key, parent_column = relationship.synchronize_pairs[0]
+    _, label_column = relationship.secondary_synchronize_pairs[0]
+    return parent_key, parent_column, label_column
+
+def label_ids_in(label_column: Any, names: List[str], db: Optional[Session] = None):
+    """
+    `label_column IN (ids of names)`. With a session, unknown names are looked up
+    (and simply match nothing if they do not exist); without one (async callers)
+    names missing from the cache fall back to a subquery on labels.name.
+    """
+    if db is not None:
+        return label_column.in_(list(LABEL_IDS.get_ids(db, names).values()))
+
+    known = LABEL_IDS.cached_ids(names)
+    unknown = [name for name in names if name not in known]
+    condition = label_column.in_(list(known.values()))
+    if unknown:
+        condition = or_(condition, label_column.in_(
+            select(models.Label.id).where(models.Label.name.in_(unknown))
+        ))
+    return condition
 
 def get_main_labels(db: Session) -> List[str]:
     """
@@ -93,4 +104,12 @@ def get_main_labels(db: Session) -> List[str]:
     
     # SQLAlchemy queries for specific columns return a list of tuples: [('main:blog',), ('main:p',)]
     # We flatten this into a simple list of strings.
-    return [name for (name,) in results]
\ No newline at end of file
+    return [name for (name,) in results]
+
+async def get_main_labels_async(db: AsyncSession) -> List[str]:
+    results = await db.execute(
+        select(models.Label.name)
+        .where(models.Label.name.startswith("main:"))
+        .order_by(models.Label.name)
+    )
+    return list(results.scalars().all())
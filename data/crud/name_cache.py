@@ -0,0 +1,163 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from data import models
+
+# --- Label / Tag dictionary cache ---
+# Labels and tags are never renamed or deleted, so a name -> id mapping stays
+# valid for the life of the process. It is loaded from the first session that
+# needs it and then only grows.
+#
+# Names a session inserts are kept on that session until it commits: a rolled
+# back insert must never leave an id in the shared cache that other requests
+# would then write into association rows.
+
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+class NameCache:
+    def __init__(self, model_class: Any):
+        self.model_class = model_class
+        self._ids: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._session_key = f"name_cache:{model_class.__tablename__}"
+        self._subscribers: List[Callable[[Dict[str, int]], None]] = []
+
+    def subscribe(self, callback: Callable[[Dict[str, int]], None]):
+        """Calls `callback({name: id})` with the names a session shares on commit, new ones included."""
+        self._subscribers.append(callback)
+
+    def _pending(self, db: Session) -> Dict[str, int]:
+        """Names this session has inserted but not committed yet."""
+        return db.info.setdefault(self._session_key, {})
+
+    def _remember(self, db: Session, found: Dict[str, int]):
+        # Rows read by a session that has uncommitted inserts of its own could be
+        # one of those inserts, they are shared once that session commits
+        if db.info.get(self._session_key):
+            self._pending(db).update(found)
+            return
+        with self._lock:
+            self._ids.update(found)
+
+    def _load(self, db: Session):
+        rows = db.execute(select(self.model_class.name, self.model_class.id)).all()
+        self._remember(db, dict(rows))
+        self._loaded = not db.info.get(self._session_key)
+
+    def cached_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """Whatever is known without touching the database."""
+        return {name: self._ids[name] for name in names if name in self._ids}
+
+    def get_ids(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """Ids of the names that exist, missing names are left out."""
+        names = set(names)
+        if not self._loaded:
+            self._load(db)
+
+        found = self.cached_ids(names)
+        pending = db.info.get(self._session_key) or {}
+        found.update({name: pending[name] for name in names - found.keys() if name in pending})
+
+        missing = names - found.keys()
+        if missing:
+            # Another worker process may have created them since we loaded
+            rows = db.execute(
+                select(self.model_class.name, self.model_class.id)
+                .where(self.model_class.name.in_(missing))
+            ).all()
+            if rows:
+                self._remember(db, dict(rows))
+                found.update(dict(rows))
+        return found
+
+    def get_or_create_ids(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Ids for every name, creating the missing ones with a single
+        INSERT ... ON CONFLICT DO NOTHING (concurrent writers simply skip them),
+        or with per-name inserts on databases without ON CONFLICT.
+        """
+        names = set(names)
+        found = self.get_ids(db, names)
+        missing = names - found.keys()
+        if not missing:
+            return found
+
+        upsert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if upsert is not None:
+            db.execute(
+                upsert(self.model_class.__table__)
+                .values([{"name": name} for name in sorted(missing)])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+        else:
+            # No ON CONFLICT: one INSERT per name, each in a savepoint so a
+            # name created concurrently only rolls back its own insert
+            for name in sorted(missing):
+                try:
+                    with db.begin_nested():
+                        db.execute(self.model_class.__table__.insert().values(name=name))
+                except IntegrityError:
+                    pass
+        created = dict(db.execute(
+            select(self.model_class.name, self.model_class.id)
+            .where(self.model_class.name.in_(missing))
+        ).all())
+        self._pending(db).update(created)
+        found.update(created)
+        return found
+
+    def attach(self, db: Session, ids: Dict[str, int]) -> List[Any]:
+        """
+        Model instances for known {name: id} pairs, made persistent in `db`
+        without a SELECT, ready to be assigned to a labels/tags relationship.
+        """
+        instances = []
+        for name, row_id in ids.items():
+            instance = self.model_class(id=row_id, name=name)
+            make_transient_to_detached(instance)
+            # load=False trusts the given state; an instance already in the session is reused
+            instances.append(db.merge(instance, load=False))
+        return instances
+
+    def commit(self, db: Session):
+        pending = db.info.pop(self._session_key, None)
+        if pending:
+            with self._lock:
+                self._ids.update(pending)
+            for callback in self._subscribers:
+                callback(pending)
+
+    def rollback(self, db: Session):
+        db.info.pop(self._session_key, None)
+
+    def invalidate(self):
+        """Forgets everything, e.g. after pointing the app at another database."""
+        with self._lock:
+            self._ids.clear()
+            self._loaded = False
+
+LABEL_IDS = NameCache(models.Label)
+TAG_IDS = NameCache(models.Tag)
+
+def invalidate_name_caches():
+    LABEL_IDS.invalidate()
+    TAG_IDS.invalidate()
+
+# Applies to every Session, including the ones behind AsyncSession
+@event.listens_for(Session, "after_commit")
+def _share_committed_names(db: Session):
+    LABEL_IDS.commit(db)
+    TAG_IDS.commit(db)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_names(db: Session):
+    LABEL_IDS.rollback(db)
+    TAG_IDS.rollback(db)
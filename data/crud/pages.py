@@ -1,54 +1,145 @@
 from datetime import datetime, timezone
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
 
 from data import models, schemas
-from .labels import get_or_create_labels, apply_label_filters
-from .tags import get_or_create_tags
+from .labels import (
+    get_or_create_labels, get_label_ids, get_label_map, format_label_for_db,
+    label_ids_in, with_labels_and_tags
+)
+from .label_query import apply_label_filters, parse_label_query
+from .label_index import LABEL_INDEX
+from .generations import PAGES_GENERATION, GenerationCache, bump_generation
+from .tags import get_or_create_tags, get_tag_ids, get_tag_map, format_tag_for_db
+from .pagination import apply_keyset
+
+def record_page_write(db: Session, label_changes: Dict[int, Optional[List[int]]]):
+    """
+    Every page write calls this before committing: bumps the pages generation
+    and hands {page id: new label ids, None if deleted} to the label index.
+    """
+    LABEL_INDEX.stage(db, bump_generation(db, PAGES_GENERATION), label_changes)
+
+# --- List mode ---
+# markdown and html hold the full page body (Aina pages can be hundreds of KB).
+# List queries leave them out unless the caller renders bodies (load_body=True);
+# touching them on a list result still works, it just costs one query per page.
+# Labels and tags are flattened into every response, so they come batch-loaded too.
+def with_page_body(query, load_body: bool):
+    query = with_labels_and_tags(query, models.Page)
+    if load_body:
+        return query
+    return query.options(defer(models.Page.markdown), defer(models.Page.html))
+
+def readable_by(read_labels: List[str], author: Optional[str] = None):
+    """
+    SQL form of the page read check: the page carries one of `read_labels`
+    (e.g. any:read, editor:read) or was written by `author`.
+    """
+    condition = models.Page.slug.in_(
+        select(models.page_labels.c.page_slug)
+        .where(label_ids_in(models.page_labels.c.label_id, read_labels))
+    )
+    if author:
+        condition = or_(condition, models.Page.author == author)
+    return condition
 
 def get_page(db: Session, slug: str) -> Optional[models.Page]:
     return db.query(models.Page).filter(models.Page.slug == slug).first()
 
-def list_pages(db: Session, skip: int = 0, limit: int = 100) -> List[models.Page]:
-    return db.query(models.Page).order_by(models.Page.created.desc()).offset(skip).limit(limit).all()
+def list_pages(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    load_body: bool = False,
+    cursor: Optional[str] = None,
+    read_labels: Optional[List[str]] = None,
+    author: Optional[str] = None,
+) -> List[models.Page]:
+    """
+    Lists pages newest first. Passing `read_labels` (and optionally `author`)
+    restricts the result to pages that reader may see, see readable_by().
+    """
+    query = with_page_body(db.query(models.Page), load_body)
+    if read_labels is not None:
+        query = query.filter(readable_by(read_labels, author))
+    return apply_keyset(query, models.Page, cursor).offset(skip).limit(limit).all()
+
+def search_pages(db: Session, query_str: str, skip: int = 0, limit: int = 100, load_body: bool = False, cursor: Optional[str] = None) -> List[models.Page]:
+    query = with_page_body(db.query(models.Page), load_body)
+    query = apply_label_filters(query, models.Page, query_str, db)
+    return apply_keyset(query, models.Page, cursor).offset(skip).limit(limit).all()
 
-def search_pages(db: Session, query_str: str, skip: int = 0, limit: int = 100) -> List[models.Page]:
-    query = db.query(models.Page)
+async def search_pages_async(db: AsyncSession, query_str: str, skip: int = 0, limit: int = 100) -> List[models.Page]:
+    # Async sessions cannot lazy-load: relationships come back with the rows,
+    # and deferred columns could not be fetched later either, so no body here
+    query = with_page_body(select(models.Page), load_body=False)
     query = apply_label_filters(query, models.Page, query_str)
-    return query.order_by(models.Page.created.desc()).offset(skip).limit(limit).all()
+    query = apply_keyset(query, models.Page).offset(skip).limit(limit)
+    return (await db.execute(query)).scalars().all()
 
-def get_pages_by_label(db: Session, label: str, limit: int = 100) -> List[models.Page]:
-    return search_pages(db, query_str=label, limit=limit)
+async def get_pages_by_label_async(db: AsyncSession, label: str, limit: int = 100) -> List[models.Page]:
+    return await search_pages_async(db, query_str=label, limit=limit)
 
-def get_pages_by_labels(db: Session, labels: List[str], match_all: bool = True, limit: int = 100) -> List[models.Page]:
+def get_pages_by_label(db: Session, label: str, limit: int = 100, load_body: bool = False) -> List[models.Page]:
+    return search_pages(db, query_str=label, limit=limit, load_body=load_body)
+
+# First pages of the hot label queries (home page, template, default search),
+# as ordered id lists per (normalized query, limit). Any page write moves the
+# pages generation and with it every entry; a hit leaves one primary-key fetch.
+PAGE_QUERY_CACHE = GenerationCache(PAGES_GENERATION, size=512)
+
+def _page_ids_by_labels(db: Session, query_str: str, limit: int, cursor: Optional[str] = None) -> List[int]:
+    # The in-memory index picks the page ids, SQL only orders those rows
+    page_ids = LABEL_INDEX.search(db, query_str)
+    if page_ids is None:
+        query = apply_label_filters(select(models.Page.id), models.Page, query_str, db)
+    elif not page_ids:
+        return []
+    else:
+        query = select(models.Page.id).where(models.Page.id.in_(page_ids))
+    return list(db.execute(apply_keyset(query, models.Page, cursor).limit(limit)).scalars())
+
+def get_pages_by_labels(db: Session, labels: List[str], match_all: bool = True, limit: int = 100, load_body: bool = False, cursor: Optional[str] = None) -> List[models.Page]:
     if not labels:
         return []
-    if match_all:
-        query_str = " ".join(labels)
-        return search_pages(db, query_str=query_str, limit=limit)
+    # match_all: every label (AND). Otherwise any of them, one OR group.
+    query_str = " ".join(labels) if match_all else "|".join(labels)
+
+    if cursor:
+        page_ids = _page_ids_by_labels(db, query_str, limit, cursor)
     else:
-        # Optimized OR logic: group_by ID instead of distinct() on text columns
-        query = (
-            db.query(models.Page)
-            .join(models.Page.labels.property.secondary)
-            .join(models.Label)
-            .filter(models.Label.name.in_(labels))
-            .group_by(models.Page.id) # Changed from .distinct() for performance
-            .order_by(models.Page.created.desc())
-            .limit(limit)
-        )
-        return query.all()
+        key = (parse_label_query(query_str), limit)
+        page_ids = PAGE_QUERY_CACHE.get_or_compute(db, key, lambda: _page_ids_by_labels(db, query_str, limit))
+    if not page_ids:
+        return []
+
+    pages = with_page_body(db.query(models.Page), load_body).filter(models.Page.id.in_(page_ids)).all()
+    position = {page_id: i for i, page_id in enumerate(page_ids)}
+    return sorted(pages, key=lambda page: position[page.id])
+
+def page_has_labels(db: Session, page: models.Page, labels: List[str]) -> bool:
+    """Whether `page` carries every one of `labels`, answered from the label index when possible."""
+    names = [format_label_for_db(label) for label in labels]
+    indexed = LABEL_INDEX.has_labels(db, page.id, names)
+    if indexed is not None:
+        return indexed
+    return set(names).issubset(label.name for label in page.labels)
         
+# Single-page lookups (home page, templates) are rendered, so they load the body
 def get_first_page_by_label(db: Session, label: str) -> Optional[models.Page]:
-    pages = get_pages_by_label(db, label, limit=1)
+    pages = get_pages_by_label(db, label, limit=1, load_body=True)
     return pages[0] if pages else None
 
 def get_first_page_by_labels(db: Session, label: List[str]) -> Optional[models.Page]:
-    pages = get_pages_by_labels(db, label, limit=1)
+    pages = get_pages_by_labels(db, label, limit=1, load_body=True)
     return pages[0] if pages else None
 
-def get_pages_by_author(db: Session, author: str, skip: int = 0, limit: int = 100) -> List[models.Page]:
-    return db.query(models.Page).filter(models.Page.author == author).order_by(models.Page.created.desc()).offset(skip).limit(limit).all()
+def get_pages_by_author(db: Session, author: str, skip: int = 0, limit: int = 100, load_body: bool = False, cursor: Optional[str] = None) -> List[models.Page]:
+    query = with_page_body(db.query(models.Page), load_body).filter(models.Page.author == author)
+    return apply_keyset(query, models.Page, cursor).offset(skip).limit(limit).all()
 
 def create_page(db: Session, page: schemas.PageCreate) -> models.Page:
     now = datetime.now(timezone.utc).isoformat()
@@ -61,6 +152,8 @@ def create_page(db: Session, page: schemas.PageCreate) -> models.Page:
     db_page.tags = tag_objects 
     
     db.add(db_page)
+    db.flush()
+    record_page_write(db, {db_page.id: [label.id for label in label_objects]})
     db.commit()
     db.refresh(db_page)
     return db_page
@@ -76,10 +169,12 @@ def update_page(db: Session, slug: str, page_update: schemas.PageUpdate) -> Opti
     # Even if the API request sent a new slug, we silently remove it.
     update_data.pop('slug', None)
     
+    label_changes = {}
     if 'labels' in update_data:
         new_labels_list = update_data.pop('labels')
         if new_labels_list is not None:
             db_page.labels = get_or_create_labels(db, new_labels_list)
+            label_changes[db_page.id] = [label.id for label in db_page.labels]
 
     if 'tags' in update_data:
         new_tags_list = update_data.pop('tags')
@@ -90,6 +185,7 @@ def update_page(db: Session, slug: str, page_update: schemas.PageUpdate) -> Opti
         setattr(db_page, key, value)
     
     db_page.updated = datetime.now(timezone.utc).isoformat()
+    record_page_write(db, label_changes)
     db.commit()
     db.refresh(db_page)
     return db_page
@@ -98,6 +194,93 @@ def delete_page(db: Session, slug: str) -> bool:
     db_page = get_page(db, slug=slug)
     if db_page:
         db.delete(db_page)
+        record_page_write(db, {db_page.id: None})
         db.commit()
         return True
-    return False
\ No newline at end of file
+    return False
+
+# --- Batch Operations ---
+# One transaction per batch: labels/tags are resolved once for every item,
+# rows go out as executemany INSERTs, and there is a single commit at the end.
+
+def get_pages_by_slugs(db: Session, slugs: List[str]) -> Dict[str, models.Page]:
+    pages = with_page_body(db.query(models.Page), load_body=False).filter(models.Page.slug.in_(slugs)).all()
+    return {page.slug: page for page in pages}
+
+def create_pages(db: Session, pages: List[schemas.PageCreate]) -> None:
+    if not pages:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    label_ids = get_label_ids(db, [name for page in pages for name in (page.labels or [])])
+    tag_ids = get_tag_ids(db, [name for page in pages for name in (page.tags or [])])
+
+    new_ids = db.execute(
+        insert(models.Page).returning(models.Page.id, sort_by_parameter_order=True),
+        [
+            {**page.model_dump(exclude={'labels', 'tags'}), "created": now, "updated": now}
+            for page in pages
+        ],
+    ).scalars().all()
+
+    label_rows = [
+        {"page_slug": page.slug, "label_id": label_ids[name]}
+        for page in pages
+        for name in {format_label_for_db(n) for n in (page.labels or [])} if name
+    ]
+    tag_rows = [
+        {"page_slug": page.slug, "tag_id": tag_ids[name]}
+        for page in pages
+        for name in {format_tag_for_db(n) for n in (page.tags or [])} if name
+    ]
+    if label_rows:
+        db.execute(insert(models.page_labels), label_rows)
+    if tag_rows:
+        db.execute(insert(models.page_tags), tag_rows)
+    record_page_write(db, {
+        page_id: [label_ids[name] for name in {format_label_for_db(n) for n in (page.labels or [])} if name]
+        for page_id, page in zip(new_ids, pages)
+    })
+    db.commit()
+
+def update_pages(db: Session, updates: Dict[str, schemas.PageUpdate]) -> None:
+    """Applies each PageUpdate to the page with that slug. Unknown slugs are skipped."""
+    if not updates:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    db_pages = get_pages_by_slugs(db, list(updates))
+    update_data = {slug: page_update.model_dump(exclude_unset=True) for slug, page_update in updates.items()}
+    label_map = get_label_map(db, [name for data in update_data.values() for name in (data.get('labels') or [])])
+    tag_map = get_tag_map(db, [name for data in update_data.values() for name in (data.get('tags') or [])])
+    label_changes = {}
+
+    for slug, data in update_data.items():
+        db_page = db_pages.get(slug)
+        if not db_page:
+            continue
+        data.pop('slug', None)
+
+        new_labels = data.pop('labels', None)
+        if new_labels is not None:
+            db_page.labels = [label_map[name] for name in {format_label_for_db(n) for n in new_labels} if name]
+            label_changes[db_page.id] = [label.id for label in db_page.labels]
+        new_tags = data.pop('tags', None)
+        if new_tags is not None:
+            db_page.tags = [tag_map[name] for name in {format_tag_for_db(n) for n in new_tags} if name]
+
+        for key, value in data.items():
+            setattr(db_page, key, value)
+        db_page.updated = now
+
+    record_page_write(db, label_changes)
+    db.commit()
+
+def delete_pages(db: Session, slugs: List[str]) -> None:
+    if not slugs:
+        return
+    db.execute(delete(models.page_labels).where(models.page_labels.c.page_slug.in_(slugs)))
+    db.execute(delete(models.page_tags).where(models.page_tags.c.page_slug.in_(slugs)))
+    deleted_ids = db.execute(
+        delete(models.Page).where(models.Page.slug.in_(slugs)).returning(models.Page.id)
+    ).scalars().all()
+    record_page_write(db, {page_id: None for page_id in deleted_ids})
+    db.commit()
@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+
+# --- Keyset (cursor) pagination ---
+# Lists are ordered newest first on (created, id). A cursor is the position of the
+# last row a client has seen, so the next page starts right after it with an
+# index seek instead of counting past `skip` rows, and rows inserted meanwhile
+# cannot shift items between pages. Cursors are opaque to clients.
+
+# List endpoints keep returning a plain JSON array and hand out the next cursor here
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursorError(ValueError):
+    pass
+
+def encode_cursor(created: Optional[str], row_id: int) -> str:
+    raw = json.dumps([created, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursorError("Malformed pagination cursor.")
+    if not isinstance(created, str) or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise InvalidCursorError("Malformed pagination cursor.")
+    return created, row_id
+
+def apply_keyset(query: Any, model_class: Any, cursor: Optional[str] = None) -> Any:
+    """
+    Orders a Query/select() newest first and, given a cursor, keeps only the rows after it.
+    Raises InvalidCursorError for cursors that were not produced by encode_cursor().
+    """
+    if cursor:
+        created, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model_class.created, model_class.id) < tuple_(created, row_id))
+    return query.order_by(model_class.created.desc(), model_class.id.desc())
+
+def next_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created, last.id)
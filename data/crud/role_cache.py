@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from data import models
+from .generations import ROLES_GENERATION, get_generation
+
+# --- Role -> permissions cache ---
+# Nearly every authenticated request asks for the permissions of its user's
+# role, often more than once. The whole roles table is small, so it is held in
+# memory and re-read only when the "roles" generation moves: save_role and
+# delete_role bump it, which is how other worker processes notice. Role writes
+# made by this process drop the cache as soon as they commit.
+
+# Seconds between generation checks, 0 checks on every lookup
+ROLE_CACHE_RECHECK_SECONDS = float(os.getenv("ROLE_CACHE_RECHECK_SECONDS", "1"))
+
+class RolePermissions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._permissions: Dict[str, List[str]] = {}
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+        self._session_key = "role_cache:written"
+
+    def _load(self, db: Session, generation: int):
+        rows = db.execute(select(models.Role.role_name, models.Role.permissions)).all()
+        with self._lock:
+            self._permissions = {name: list(permissions or []) for name, permissions in rows}
+            self._generation = generation
+
+    def refresh(self, db: Session):
+        now = time.monotonic()
+        if self._generation is not None and now - self._checked_at < ROLE_CACHE_RECHECK_SECONDS:
+            return
+        generation = get_generation(db, ROLES_GENERATION)
+        if generation != self._generation:
+            self._load(db, generation)
+        self._checked_at = now
+
+    def permissions(self, db: Session, role_name: Optional[str]) -> List[str]:
+        """The permissions of a role, [] for unknown roles. Callers get their own copy."""
+        if not role_name:
+            return []
+        self.refresh(db)
+        return list(self._permissions.get(role_name, ()))
+
+    def written(self, db: Session):
+        """Called by role writes: the cache is dropped once `db` commits."""
+        db.info[self._session_key] = True
+
+    def commit(self, db: Session):
+        if db.info.pop(self._session_key, False):
+            self.invalidate()
+
+    def rollback(self, db: Session):
+        db.info.pop(self._session_key, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation = None
+
+ROLE_PERMISSIONS = RolePermissions()
+
+@event.listens_for(Session, "after_commit")
+def _drop_committed_roles(db: Session):
+    ROLE_PERMISSIONS.commit(db)
+
+@event.listens_for(Session, "after_rollback")
+def _keep_rolled_back_roles(db: Session):
+    ROLE_PERMISSIONS.rollback(db)
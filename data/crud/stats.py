@@ -1,8 +1,12 @@
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Date, Integer, cast, func, select
 from data import models
-from .labels import format_label_for_db
+from .field_index import field_value
+from .generations import PAGES_GENERATION, GenerationCache, submissions_generation
+from .labels import format_label_for_db, with_labels_and_tags
+from .label_query import compile_label_query, parse_label_query, starts_with
+from .pages import with_page_body
 
 def get_total_pages_count(db: Session) -> int:
     return db.query(func.count(models.Page.id)).scalar()
@@ -28,6 +32,123 @@ def get_pages_count_by_label(db: Session, label_name: str) -> int:
         .scalar()
     )
 
+# Facet counts only change when a page is written
+FACET_CACHE = GenerationCache(PAGES_GENERATION)
+
+def get_label_facets(db: Session, query_str: str = "", namespace: Optional[str] = None, limit: int = 100) -> List[Tuple[str, int]]:
+    """
+    (label, page count) over the pages matching a label query, most used first,
+    in one grouped query. `namespace` (e.g. "main:") keeps only the labels
+    starting with it. Cached until the next page write.
+    """
+    namespace = format_label_for_db(namespace) if namespace else None
+    key = (parse_label_query(query_str), namespace, limit)
+
+    def compute():
+        page_labels = models.page_labels
+        use_count = func.count().label("use_count")
+        query = (
+            select(models.Label.name, use_count)
+            .select_from(page_labels)
+            .join(models.Label, models.Label.id == page_labels.c.label_id)
+        )
+        condition = compile_label_query(models.Page, query_str, db)
+        if condition is not None:
+            query = query.where(page_labels.c.page_slug.in_(select(models.Page.slug).where(condition)))
+        if namespace:
+            query = query.where(starts_with(models.Label.name, namespace))
+        query = query.group_by(models.Label.name).order_by(use_count.desc(), models.Label.name).limit(limit)
+        return [(name, count) for name, count in db.execute(query)]
+
+    return FACET_CACHE.get_or_compute(db, key, compute)
+
+# --- Submission aggregates ---
+# Grouped count/sum/avg/min/max over the JSON values of a collection's
+# submissions, computed by the database in one statement. Cached per collection
+# until its next submission write.
+
+AGGREGATE_METRICS = {
+    "count": func.count,
+    "sum": func.sum,
+    "avg": func.avg,
+    "min": func.min,
+    "max": func.max,
+}
+
+def _week(created, dialect: str):
+    day = func.substr(created, 1, 10)
+    if dialect == "postgresql":
+        return func.to_char(cast(day, Date), 'IYYY-"W"IW')
+    # An ISO week is the one holding its Thursday, whose year is also the ISO year
+    thursday = func.date(day, "-3 days", "weekday 4")
+    week = (cast(func.strftime("%j", thursday), Integer) - 1) // 7 + 1
+    return func.printf("%s-W%02d", func.strftime("%Y", thursday), week)
+
+# `created` is always written as a UTC isoformat string, so most buckets are
+# a prefix of it ("2026-10" for month) on every backend. Weeks are ISO weeks
+# of that UTC date, "2026-W42", on every backend too.
+TIME_BUCKETS = {
+    "hour": lambda created, dialect: func.substr(created, 1, 13),
+    "day": lambda created, dialect: func.substr(created, 1, 10),
+    "week": _week,
+    "month": lambda created, dialect: func.substr(created, 1, 7),
+    "year": lambda created, dialect: func.substr(created, 1, 4),
+}
+
+# Groups per response: the route's `limit` defaults to and is capped by these.
+# A response cut short carries AGGREGATE_TRUNCATED_HEADER.
+AGGREGATE_DEFAULT_LIMIT = 1000
+AGGREGATE_MAX_LIMIT = 10000
+AGGREGATE_TRUNCATED_HEADER = "X-Truncated"
+
+AGGREGATE_CACHE = GenerationCache()
+
+def aggregate_submissions(
+    db: Session,
+    collection_slug: str,
+    metric: str = "count",
+    field: Optional[str] = None,
+    group_by: Optional[str] = None,
+    bucket: Optional[str] = None,
+    limit: int = AGGREGATE_DEFAULT_LIMIT,
+    field_types: Optional[Dict[str, str]] = None,
+) -> List[Tuple[Any, Optional[str], Any, int]]:
+    """
+    (group value, time bucket, metric value, row count) per group, ordered by
+    group then bucket. `metric` over `field` (count without a field counts
+    rows), grouped by the `group_by` field and/or a TIME_BUCKETS bucket of
+    Submission.created. At most `limit` groups. `field_types` is
+    {name: schema type}. Names are not validated here, see CollectionService.
+    """
+    field_types = field_types or {}
+    field_type = field_types.get(field, "string")
+    group_type = field_types.get(group_by, "string")
+    key = (collection_slug, metric, field, field_type, group_by, group_type, bucket, limit)
+
+    def compute():
+        Submission = models.Submission
+        dialect = db.get_bind().dialect.name
+        value = field_value(field, field_type, dialect) if field else None
+        aggregate = AGGREGATE_METRICS[metric](value) if value is not None else func.count()
+        group = field_value(group_by, group_type, dialect) if group_by else None
+        period = TIME_BUCKETS[bucket](Submission.created, dialect) if bucket else None
+
+        keys = [expr for expr in (group, period) if expr is not None]
+        query = select(*keys, aggregate, func.count()).where(Submission.collection_slug == collection_slug)
+        if keys:
+            query = query.group_by(*keys).order_by(*keys)
+        rows = db.execute(query.limit(limit)).all()
+
+        def unpack(row):
+            row = list(row)
+            group_value = row.pop(0) if group is not None else None
+            period_value = row.pop(0) if period is not None else None
+            return (group_value, period_value, row[0], row[1])
+
+        return [unpack(row) for row in rows]
+
+    return AGGREGATE_CACHE.get_or_compute(db, key, compute, submissions_generation(collection_slug))
+
 def get_top_collections_by_submission_count(db: Session, limit: int = 5) -> List[Tuple[str, str, int]]:
     return (
         db.query(
@@ -56,10 +177,11 @@ def get_top_labels_by_page_usage(db: Session, limit: int = 10) -> List[Tuple[str
     )
 
 def get_recent_pages(db: Session, limit: int = 5) -> List[models.Page]:
-    return db.query(models.Page).order_by(models.Page.created.desc()).limit(limit).all()
+    return with_page_body(db.query(models.Page), load_body=False).order_by(models.Page.created.desc()).limit(limit).all()
 
 def get_recently_updated_pages(db: Session, limit: int = 5) -> List[models.Page]:
-    return db.query(models.Page).order_by(models.Page.updated.desc()).limit(limit).all()
+    return with_page_body(db.query(models.Page), load_body=False).order_by(models.Page.updated.desc()).limit(limit).all()
 
 def get_recent_submissions(db: Session, limit: int = 5) -> List[models.Submission]:
-    return db.query(models.Submission).order_by(models.Submission.created.desc()).limit(limit).all()
\ No newline at end of file
+    query = with_labels_and_tags(db.query(models.Submission), models.Submission)
+    return query.order_by(models.Submission.created.desc()).limit(limit).all()
\ No newline at end of file
@@ -1,34 +1,77 @@
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from data import models, schemas
-from .tags import get_or_create_tags
-from .labels import get_or_create_labels, apply_label_filters
+from .tags import get_or_create_tags, get_tag_ids, format_tag_for_db
+from .labels import get_or_create_labels, get_label_ids, get_label_map, format_label_for_db, with_labels_and_tags
+from .label_query import apply_label_filters
+from .pagination import apply_keyset
+from .field_index import FieldFilter, FieldSort, apply_field_query
+from .generations import bump_generation, submissions_generation
+
+
+def record_submission_write(db: Session, collection_slugs: Iterable[str]):
+    """
+    Every submission write calls this before committing: moves the generation
+    of each collection touched, which expires its cached aggregates.
+    """
+    for slug in sorted(set(collection_slugs)):
+        bump_generation(db, submissions_generation(slug))
 
 
 def get_submission(db: Session, submission_id: int) -> Optional[models.Submission]:
     return db.query(models.Submission).filter(models.Submission.id == submission_id).first()
 
-def list_submissions(db: Session, collection_slug: str, skip: int = 0, limit: int = 100) -> List[models.Submission]:
-    return db.query(models.Submission).filter(models.Submission.collection_slug == collection_slug).order_by(models.Submission.created.desc()).offset(skip).limit(limit).all()
+def list_submissions(
+    db: Session,
+    collection_slug: str,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[List[FieldFilter]] = None,
+    sort: Optional[FieldSort] = None,
+    field_types: Optional[Dict[str, str]] = None,
+) -> List[models.Submission]:
+    """
+    Newest first, or ordered by an indexed field when `sort` is given
+    (cursors only apply to the newest-first order). `field_types` gives the
+    schema type of the fields used by `filters` and `sort`.
+    """
+    query = with_labels_and_tags(db.query(models.Submission), models.Submission).filter(models.Submission.collection_slug == collection_slug)
+    query = apply_field_query(query, filters or [], sort, field_types, db.get_bind().dialect.name)
+    if sort is None:
+        query = apply_keyset(query, models.Submission, cursor)
+    return query.offset(skip).limit(limit).all()
+
+async def list_submissions_async(db: AsyncSession, collection_slug: str, skip: int = 0, limit: int = 100) -> List[models.Submission]:
+    # Async sessions cannot lazy-load, relationships come back with the rows
+    query = (
+        with_labels_and_tags(select(models.Submission), models.Submission)
+        .where(models.Submission.collection_slug == collection_slug)
+    )
+    query = apply_keyset(query, models.Submission).offset(skip).limit(limit)
+    return (await db.execute(query)).scalars().all()
 
 def search_submissions(db: Session, query_str: str) -> List[models.Submission]:
-    query = db.query(models.Submission)
-    query = apply_label_filters(query, models.Submission, query_str)
+    query = with_labels_and_tags(db.query(models.Submission), models.Submission)
+    query = apply_label_filters(query, models.Submission, query_str, db)
     return query.order_by(models.Submission.created.desc()).all()
 
 def create_submission(db: Session, submission: schemas.SubmissionCreate) -> models.Submission:
     now = datetime.now(timezone.utc).isoformat()
     sub_data = submission.model_dump(exclude={'labels','tags'})
     label_objects = get_or_create_labels(db, submission.labels)
-    tag_objects = get_or_create_labels(db, submission.tags)
+    tag_objects = get_or_create_tags(db, submission.tags)
 
     db_submission = models.Submission(**sub_data, created=now, updated=now)
     db_submission.labels = label_objects
     db_submission.tags = tag_objects
 
     db.add(db_submission)
+    record_submission_write(db, [db_submission.collection_slug])
     db.commit()
     db.refresh(db_submission)
     return db_submission
@@ -55,6 +98,7 @@ def update_submission(db: Session, submission_id: int, submission_update: schema
         setattr(db_submission, key, value)
     
     db_submission.updated =  datetime.now(timezone.utc).isoformat()
+    record_submission_write(db, [db_submission.collection_slug])
     db.commit()
     db.refresh(db_submission)
     return db_submission
@@ -63,6 +107,89 @@ def delete_submission(db: Session, submission_id: int) -> bool:
     db_submission = get_submission(db, submission_id=submission_id)
     if db_submission:
         db.delete(db_submission)
+        record_submission_write(db, [db_submission.collection_slug])
         db.commit()
         return True
-    return False
\ No newline at end of file
+    return False
+
+# --- Batch Operations ---
+# Same contract as the page batch functions: one label/tag lookup, executemany, one commit.
+
+def get_submissions_by_ids(db: Session, submission_ids: List[int]) -> Dict[int, models.Submission]:
+    query = with_labels_and_tags(db.query(models.Submission), models.Submission)
+    return {sub.id: sub for sub in query.filter(models.Submission.id.in_(submission_ids)).all()}
+
+def create_submissions(db: Session, submissions: List[schemas.SubmissionCreate]) -> List[int]:
+    """Inserts every submission and returns the new ids, in input order."""
+    if not submissions:
+        return []
+    now = datetime.now(timezone.utc).isoformat()
+    label_ids = get_label_ids(db, [name for sub in submissions for name in (sub.labels or [])])
+    tag_ids = get_tag_ids(db, [name for sub in submissions for name in (sub.tags or [])])
+
+    new_ids = db.execute(
+        insert(models.Submission).returning(models.Submission.id, sort_by_parameter_order=True),
+        [
+            {**sub.model_dump(exclude={'labels', 'tags'}), "created": now, "updated": now}
+            for sub in submissions
+        ],
+    ).scalars().all()
+
+    label_rows = [
+        {"submission_id": sub_id, "label_id": label_ids[name]}
+        for sub_id, sub in zip(new_ids, submissions)
+        for name in {format_label_for_db(n) for n in (sub.labels or [])} if name
+    ]
+    tag_rows = [
+        {"submission_id": sub_id, "tag_id": tag_ids[name]}
+        for sub_id, sub in zip(new_ids, submissions)
+        for name in {format_tag_for_db(n) for n in (sub.tags or [])} if name
+    ]
+    if label_rows:
+        db.execute(insert(models.submission_labels), label_rows)
+    if tag_rows:
+        db.execute(insert(models.submission_tags), tag_rows)
+    record_submission_write(db, [sub.collection_slug for sub in submissions])
+    db.commit()
+    return list(new_ids)
+
+def update_submissions(db: Session, updates: Dict[int, schemas.SubmissionUpdate]) -> None:
+    """Applies each SubmissionUpdate to the submission with that id. Unknown ids are skipped."""
+    if not updates:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    db_submissions = get_submissions_by_ids(db, list(updates))
+    update_data = {sub_id: sub_update.model_dump(exclude_unset=True) for sub_id, sub_update in updates.items()}
+    label_map = get_label_map(db, [name for data in update_data.values() for name in (data.get('labels') or [])])
+    touched = set()
+
+    for sub_id, data in update_data.items():
+        db_submission = db_submissions.get(sub_id)
+        if not db_submission:
+            continue
+        data.pop('collection_slug', None)
+
+        new_labels = data.pop('labels', None)
+        if new_labels is not None:
+            db_submission.labels = [label_map[name] for name in {format_label_for_db(n) for n in new_labels} if name]
+
+        for key, value in data.items():
+            setattr(db_submission, key, value)
+        db_submission.updated = now
+        touched.add(db_submission.collection_slug)
+
+    record_submission_write(db, touched)
+    db.commit()
+
+def delete_submissions(db: Session, submission_ids: List[int]) -> None:
+    if not submission_ids:
+        return
+    db.execute(delete(models.submission_labels).where(models.submission_labels.c.submission_id.in_(submission_ids)))
+    db.execute(delete(models.submission_tags).where(models.submission_tags.c.submission_id.in_(submission_ids)))
+    deleted_from = db.execute(
+        delete(models.Submission)
+        .where(models.Submission.id.in_(submission_ids))
+        .returning(models.Submission.collection_slug)
+    ).scalars().all()
+    record_submission_write(db, deleted_from)
+    db.commit()
@@ -1,8 +1,8 @@
-from typing import List, Any
+from typing import Dict, List, Any, Optional
 from sqlalchemy.orm import Session, Query
-from sqlalchemy import func
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, or_, select
 from data import models
+from .name_cache import TAG_IDS
 
 def format_tag_for_db(tag: str) -> str:
     """Standardizes tag strings (Danbooru style)."""
@@ -13,33 +13,25 @@ def format_tag_for_db(tag: str) -> str:
     clean = clean.replace("<", "").replace(">", "")
     return clean
 
-def get_or_create_tags(db: Session, tag_list: List[str]) -> List[models.Tag]:
-    """Concurrency-Safe 'Get or Create'."""
-    if not tag_list:
-        return []
-
-    clean_names = set(format_tag_for_db(t) for t in tag_list if format_tag_for_db(t))
+def get_tag_ids(db: Session, tag_list: List[str]) -> Dict[str, int]:
+    """
+    Concurrency-Safe 'Get or Create', keyed by the formatted name.
+    Known names come from the process-wide cache, missing ones are created in one INSERT.
+    """
+    clean_names = set(format_tag_for_db(t) for t in (tag_list or []))
+    clean_names.discard("")
     if not clean_names:
-        return []
+        return {}
+    return TAG_IDS.get_or_create_ids(db, clean_names)
 
-    existing_tags = db.query(models.Tag).filter(models.Tag.name.in_(clean_names)).all()
-    existing_tag_map = {t.name: t for t in existing_tags}
-    final_tags = list(existing_tags)
-    missing_names = clean_names - set(existing_tag_map.keys())
-    
-    for name in missing_names:
-        try:
-            with db.begin_nested():
-                new_tag = models.Tag(name=name)
-                db.add(new_tag)
-                db.flush()
-                final_tags.append(new_tag)
-        except IntegrityError:
-            existing = db.query(models.Tag).filter(models.Tag.name == name).first()
-            if existing:
-                final_tags.append(existing)
+def get_or_create_tags(db: Session, tag_list: List[str]) -> List[models.Tag]:
+    """Concurrency-Safe 'Get or Create'."""
+    # Ids come from the name cache, so no per-write SELECT on tags
+    return TAG_IDS.attach(db, get_tag_ids(db, tag_list))
 
-    return final_tags
+def get_tag_map(db: Session, tag_list: List[str]) -> Dict[str, models.Tag]:
+    """get_or_create_tags() keyed by the formatted name, for resolving a whole batch at once."""
+    return {tag.name: tag for tag in get_or_create_tags(db, tag_list)}
 
 def parse_search_query(query_str: str):
     if not query_str:
@@ -61,22 +53,40 @@ def parse_search_query(query_str: str):
                 included.add(formatted)
     return list(included), list(excluded)
 
-def apply_tag_filters(query: Query, model_class: Any, query_str: str) -> Query:
+def tag_ids_in(tag_column: Any, names: List[str], db: Optional[Session] = None):
+    """`tag_column IN (ids of names)`, see label_ids_in()."""
+    if db is not None:
+        return tag_column.in_(list(TAG_IDS.get_ids(db, names).values()))
+
+    known = TAG_IDS.cached_ids(names)
+    unknown = [name for name in names if name not in known]
+    condition = tag_column.in_(list(known.values()))
+    if unknown:
+        condition = or_(condition, tag_column.in_(
+            select(models.Tag.id).where(models.Tag.name.in_(unknown))
+        ))
+    return condition
+
+def apply_tag_filters(query: Query, model_class: Any, query_str: str, db: Optional[Session] = None) -> Query:
+    """Keeps rows carrying every included tag and none of the excluded ones, filtering on tag ids."""
     if not query_str:
         return query
     included_tags, excluded_tags = parse_search_query(query_str)
-    for tag_name in excluded_tags:
-        query = query.filter(~model_class.tags.any(models.Tag.name == tag_name))
+    relationship = model_class.tags.property
+    parent_key, parent_column = relationship.synchronize_pairs[0]
+    _, tag_column = relationship.secondary_synchronize_pairs[0]
+
+    if excluded_tags:
+        query = query.filter(parent_key.not_in(
+            select(parent_column).where(tag_ids_in(tag_column, excluded_tags, db))
+        ))
     if included_tags:
-        association_table = model_class.tags.property.secondary
-        query = (
-            query
-            .join(association_table)
-            .join(models.Tag)
-            .filter(models.Tag.name.in_(included_tags))
-            .group_by(model_class.id)
-            .having(func.count(models.Tag.id) == len(included_tags))
-        )
+        query = query.filter(parent_key.in_(
+            select(parent_column)
+            .where(tag_ids_in(tag_column, included_tags, db))
+            .group_by(parent_column)
+            .having(func.count() == len(included_tags))
+        ))
     return query
 
 def get_main_tags(db: Session) -> List[str]:
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .generations import USERS_GENERATION, get_generation
+
+# --- Validated token cache ---
+# A token whose signature, expiry and user (exists, not disabled) have been
+# checked is remembered for a few seconds, so requests carrying it skip both
+# the JWT verification and the users lookup.
+#
+# Revocation: every user write (update, delete, password change) bumps the
+# "users" generation. Writes made by this process drop that user's tokens as
+# soon as they commit; other worker processes notice the generation move and
+# drop everything, so a ban applies everywhere within the recheck interval.
+
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "30"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Seconds between users generation checks, 0 checks on every lookup
+TOKEN_CACHE_RECHECK_SECONDS = float(os.getenv("TOKEN_CACHE_RECHECK_SECONDS", "1"))
+
+class TokenCache:
+    def __init__(self, size: int = TOKEN_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        # token -> (valid until, monotonic clock; validated claims)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._tokens_of: Dict[str, Set[str]] = {}
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+        self._session_key = "token_cache:users"
+
+    def _drop(self, token: str):
+        # Caller holds the lock
+        _, claims = self._entries.pop(token)
+        tokens = self._tokens_of.get(claims["username"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_of[claims["username"]]
+
+    def _check_generation(self, db: Session):
+        now = time.monotonic()
+        if self._generation is not None and now - self._checked_at < TOKEN_CACHE_RECHECK_SECONDS:
+            return
+        generation = get_generation(db, USERS_GENERATION)
+        if generation != self._generation:
+            # A user changed somewhere, possibly in another worker process
+            self.clear()
+            self._generation = generation
+        self._checked_at = now
+
+    def get(self, db: Session, token: str) -> Optional[Dict[str, Any]]:
+        """The claims of a token validated within the TTL, or None."""
+        self._check_generation(db)
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def put(self, token: str, claims: Dict[str, Any]):
+        """Remembers a validated token; never past its own `exp`."""
+        now = time.monotonic()
+        valid_until = now + TOKEN_CACHE_TTL_SECONDS
+        if "exp" in claims:
+            valid_until = min(valid_until, now + (claims["exp"] - time.time()))
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (valid_until, claims)
+            self._tokens_of.setdefault(claims["username"], set()).add(token)
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+
+    def revoke(self, username: str):
+        with self._lock:
+            for token in list(self._tokens_of.get(username, ())):
+                self._drop(token)
+
+    def written(self, db: Session, username: str):
+        """Called by user writes: the user's tokens are dropped once `db` commits."""
+        db.info.setdefault(self._session_key, set()).add(username)
+
+    def commit(self, db: Session):
+        for username in db.info.pop(self._session_key, ()):
+            self.revoke(username)
+
+    def rollback(self, db: Session):
+        db.info.pop(self._session_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_of.clear()
+
+    def invalidate(self):
+        """Forgets everything, including the generation (e.g. another database)."""
+        self.clear()
+        self._generation = None
+
+TOKEN_CACHE = TokenCache()
+
+@event.listens_for(Session, "after_commit")
+def _revoke_committed_users(db: Session):
+    TOKEN_CACHE.commit(db)
+
+@event.listens_for(Session, "after_rollback")
+def _keep_rolled_back_users(db: Session):
+    TOKEN_CACHE.rollback(db)
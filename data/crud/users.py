@@ -1,9 +1,22 @@
 from typing import List, Optional, Dict
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from data import models, schemas
+from .generations import ROLES_GENERATION, USERS_GENERATION, bump_generation
+from .role_cache import ROLE_PERMISSIONS
+from .token_cache import TOKEN_CACHE
 
 # --- USERS ---
 
+def record_user_write(db: Session, username: str):
+    """
+    Every user write calls this before committing: cached tokens of the user
+    stop being accepted (see token_cache.py), in every worker process.
+    """
+    bump_generation(db, USERS_GENERATION)
+    TOKEN_CACHE.written(db, username)
+
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.username == username).first()
 
@@ -16,6 +29,7 @@ def count_users(db: Session) -> int:
 def save_user(db: Session, user: schemas.UserCreate) -> models.User:
     db_user = models.User(**user.dict())
     merged_user = db.merge(db_user)
+    record_user_write(db, user.username)
     db.commit()
     return merged_user
 
@@ -23,12 +37,36 @@ def delete_user(db: Session, username: str) -> bool:
     db_user = get_user_by_username(db, username=username)
     if db_user:
         db.delete(db_user)
+        record_user_write(db, username)
         db.commit()
         return True
     return False
 
+async def get_user_by_username_async(db: AsyncSession, username: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+async def count_users_async(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count()).select_from(models.User))
+
+async def save_user_async(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    db_user = models.User(**user.model_dump())
+    merged_user = await db.merge(db_user)
+    await db.run_sync(record_user_write, user.username)
+    await db.commit()
+    return merged_user
+
 # --- ROLES ---
 
+def record_role_write(db: Session):
+    """Every role write calls this before committing, see role_cache.py."""
+    bump_generation(db, ROLES_GENERATION)
+    ROLE_PERMISSIONS.written(db)
+
+def get_role_permissions(db: Session, role_name: Optional[str]) -> List[str]:
+    """Permissions of a role from the in-memory table, usually without a query."""
+    return ROLE_PERMISSIONS.permissions(db, role_name)
+
 def get_role(db: Session, role_name: str) -> Optional[models.Role]:
     return db.query(models.Role).filter(models.Role.role_name == role_name).first()
 
@@ -39,6 +77,7 @@ def get_all_roles(db: Session) -> Dict[str, List[str]]:
 def save_role(db: Session, role_name: str, permissions: List[str]) -> models.Role:
     db_role = models.Role(role_name=role_name, permissions=permissions)
     merged_role = db.merge(db_role)
+    record_role_write(db)
     db.commit()
     return merged_role
 
@@ -46,6 +85,14 @@ def delete_role(db: Session, role_name: str) -> bool:
     db_role = get_role(db, role_name)
     if db_role:
         db.delete(db_role)
+        record_role_write(db)
         db.commit()
         return True
-    return False
\ No newline at end of file
+    return False
+
+async def get_role_async(db: AsyncSession, role_name: str) -> Optional[models.Role]:
+    return await db.get(models.Role, role_name)
+
+async def get_all_roles_async(db: AsyncSession) -> Dict[str, List[str]]:
+    roles = (await db.execute(select(models.Role))).scalars().all()
+    return {role.role_name: role.permissions for role in roles}
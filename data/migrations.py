@@ -0,0 +1,182 @@
+# file: data/migrations.py
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+# Indexes an earlier release created that a later one made redundant
+RETIRED_INDEXES = {
+    "submissions": ["ix_submissions_created"],  # covered by idx_submission_collection_created
+}
+
+def ensure_indexes(engine: Engine) -> list[str]:
+    """
+    Creates any index declared in data/models.py that the database is missing.
+
+    create_all() only builds indexes together with a brand-new table, so databases
+    created by an older release (or copied from anita-template) never receive
+    indexes added later. Safe to run on every startup: existing indexes are skipped.
+    Also drops the RETIRED_INDEXES still present.
+    Returns the names of the indexes that were created.
+    """
+    created = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for name in RETIRED_INDEXES.get(table.name, []):
+                if name in present:
+                    conn.exec_driver_sql(f'DROP INDEX "{name}"')
+            for index in table.indexes:
+                if index.name in present:
+                    continue
+                index.create(bind=conn, checkfirst=True)
+                created.append(index.name)
+
+    return created
+
+# --- Full-text search (SQLite FTS5) ---
+# pages_fts indexes the page columns in place (external content, no copy of the
+# text); submissions_fts stores the scalar values of the submission JSON, joined
+# into one string. Triggers keep both in sync with every write, including the
+# executemany inserts of the batch endpoints.
+
+SUBMISSION_TEXT_SQL = (
+    "(SELECT group_concat(value, ' ') FROM json_tree({json}) "
+    "WHERE type IN ('text', 'integer', 'real'))"
+)
+
+FULLTEXT_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+        title, content, markdown,
+        content='pages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+        INSERT INTO pages_fts(rowid, title, content, markdown)
+        VALUES (new.id, new.title, new.content, new.markdown);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, title, content, markdown)
+        VALUES ('delete', old.id, old.title, old.content, old.markdown);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pages_fts_update AFTER UPDATE OF title, content, markdown ON pages BEGIN
+        INSERT INTO pages_fts(pages_fts, rowid, title, content, markdown)
+        VALUES ('delete', old.id, old.title, old.content, old.markdown);
+        INSERT INTO pages_fts(rowid, title, content, markdown)
+        VALUES (new.id, new.title, new.content, new.markdown);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(
+        body, tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS submissions_fts_insert AFTER INSERT ON submissions
+    WHEN json_valid(new.submission_json) BEGIN
+        INSERT INTO submissions_fts(rowid, body)
+        VALUES (new.id, {SUBMISSION_TEXT_SQL.format(json="new.submission_json")});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS submissions_fts_delete AFTER DELETE ON submissions BEGIN
+        DELETE FROM submissions_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS submissions_fts_update AFTER UPDATE OF submission_json ON submissions BEGIN
+        DELETE FROM submissions_fts WHERE rowid = old.id;
+        INSERT INTO submissions_fts(rowid, body)
+        SELECT new.id, {SUBMISSION_TEXT_SQL.format(json="new.submission_json")}
+        WHERE json_valid(new.submission_json);
+    END""",
+]
+
+FULLTEXT_BACKFILL = [
+    "INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')",
+    f"""INSERT INTO submissions_fts(rowid, body)
+    SELECT id, {SUBMISSION_TEXT_SQL.format(json="submission_json")}
+    FROM submissions WHERE json_valid(submission_json)""",
+]
+
+def ensure_fulltext(engine: Engine) -> bool:
+    """
+    Creates the FTS5 tables and their triggers, and indexes the existing rows
+    the first time. Returns True if the index was built by this call.
+    Does nothing on other databases or SQLite builds without FTS5; text search
+    then falls back to LIKE (see data/crud/fulltext.py).
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+
+    with engine.begin() as conn:
+        compile_options = {row[0] for row in conn.exec_driver_sql("PRAGMA compile_options")}
+        if "ENABLE_FTS5" not in compile_options:
+            return False
+
+        existing_tables = set(inspect(conn).get_table_names())
+        if not {"pages", "submissions"} <= existing_tables:
+            return False
+        is_new = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages_fts'")
+        ).first() is None
+
+        for statement in FULLTEXT_DDL:
+            conn.exec_driver_sql(statement)
+        if is_new:
+            for statement in FULLTEXT_BACKFILL:
+                conn.exec_driver_sql(statement)
+
+    return is_new
+
+# Fallback `created` for rows written before it was required. Sorts before any
+# real timestamp, so such rows stay at the end of newest-first lists.
+LEGACY_CREATED = "1970-01-01T00:00:00+00:00"
+
+def backfill_created(engine: Engine) -> int:
+    """
+    Fills in NULL `created` values (from `updated` when there is one).
+
+    Keyset pagination orders and resumes on (created, id), and a cursor handed
+    out for a NULL `created` could not be resumed. New rows always get a value;
+    create_all() makes the column NOT NULL for new databases, this covers old ones.
+    Returns the number of rows fixed.
+    """
+    fixed = 0
+    with engine.begin() as conn:
+        existing_tables = set(inspect(conn).get_table_names())
+        for table in (models.Page.__table__, models.Collection.__table__, models.Submission.__table__):
+            if table.name not in existing_tables:
+                continue
+            fixed += conn.execute(
+                table.update()
+                .where(table.c.created.is_(None))
+                .values(created=func.coalesce(table.c.updated, LEGACY_CREATED))
+            ).rowcount
+    return fixed
+
+def ensure_field_indexes(engine: Engine) -> tuple[list[str], list[str]]:
+    """
+    Brings the expression indexes on indexed collection fields in line with the
+    collection schemas (see data/crud/field_index.py). Schema edits made through
+    the API sync them in a background task; this catches databases edited by
+    other means.
+    """
+    from .crud.field_index import sync_field_indexes
+
+    with engine.begin() as conn:
+        if "collections" not in inspect(conn).get_table_names():
+            return [], []
+        return sync_field_indexes(conn)
+
+def run_startup_migrations(engine: Engine):
+    """Brings an existing database up to the current schema. Called from the app lifespan."""
+    created = ensure_indexes(engine)
+    if created:
+        print(f"✓ Created {len(created)} missing index(es): {', '.join(created)}")
+    if ensure_fulltext(engine):
+        print("✓ Built the full-text search index")
+    fixed = backfill_created(engine)
+    if fixed:
+        print(f"✓ Filled in the creation date of {fixed} older row(s)")
+    created, dropped = ensure_field_indexes(engine)
+    if created or dropped:
+        print(f"✓ Synced field indexes: {len(created)} created, {len(dropped)} dropped")
@@ -5,42 +5,50 @@ from sqlalchemy.orm import relationship
 from .database import Base
 
 # --- ASSOCIATION TABLES ---
+# The composite primary key serves parent -> label lookups; the extra index
+# serves label filters, which go the other way (label_id -> parents).
 
 page_tags = Table(
     'page_tags', Base.metadata,
     Column('page_slug', String, ForeignKey('pages.slug'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    Index('idx_page_tags_tag', 'tag_id', 'page_slug')
 )
 
 collection_tags = Table(
     'collection_tags', Base.metadata,
     Column('collection_id', Integer, ForeignKey('collections.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    Index('idx_collection_tags_tag', 'tag_id', 'collection_id')
 )
 
 submission_tags = Table(
     'submission_tags', Base.metadata,
     Column('submission_id', Integer, ForeignKey('submissions.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    Index('idx_submission_tags_tag', 'tag_id', 'submission_id')
 )
 
 
 page_labels = Table(
     'page_labels', Base.metadata,
     Column('page_slug', String, ForeignKey('pages.slug'), primary_key=True),
-    Column('label_id', Integer, ForeignKey('labels.id'), primary_key=True)
+    Column('label_id', Integer, ForeignKey('labels.id'), primary_key=True),
+    Index('idx_page_labels_label', 'label_id', 'page_slug')
 )
 
 collection_labels = Table(
     'collection_labels', Base.metadata,
     Column('collection_id', Integer, ForeignKey('collections.id'), primary_key=True),
-    Column('label_id', Integer, ForeignKey('labels.id'), primary_key=True)
+    Column('label_id', Integer, ForeignKey('labels.id'), primary_key=True),
+    Index('idx_collection_labels_label', 'label_id', 'collection_id')
 )
 
 submission_labels = Table(
     'submission_labels', Base.metadata,
     Column('submission_id', Integer, ForeignKey('submissions.id'), primary_key=True),
-    Column('label_id', Integer, ForeignKey('labels.id'), primary_key=True)
+    Column('label_id', Integer, ForeignKey('labels.id'), primary_key=True),
+    Index('idx_submission_labels_label', 'label_id', 'submission_id')
 )
 
 # --- THE TAG DICTIONARY ---
@@ -71,9 +79,9 @@ class Page(Base):
     tags = relationship("Tag", secondary=page_tags, backref="pages")
     thumb = Column(String)
     type = Column(String)
-    created = Column(String)
-    updated = Column(String)
-    author = Column(String)
+    created = Column(String, nullable=False, index=True)
+    updated = Column(String, index=True)
+    author = Column(String, index=True)
     custom = Column(JSON)
 
 class Collection(Base):
@@ -84,7 +92,7 @@ class Collection(Base):
     title = Column(String, nullable=False)
     schema = Column("schema_json", JSON, nullable=False)
     description = Column(Text)
-    created = Column(String)
+    created = Column(String, nullable=False)
     updated = Column(String)
     author = Column(String)
     labels = relationship("Label", secondary=collection_labels, backref="collections")
@@ -99,7 +107,8 @@ class Submission(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     collection_slug = Column(String, ForeignKey("collections.slug", ondelete="CASCADE"), nullable=False)
     data = Column("submission_json", JSON, nullable=False)
-    created = Column(String)
+    # Indexed through idx_submission_collection_created, every query filters on the collection
+    created = Column(String, nullable=False)
     updated = Column(String)
     author = Column(String)
     custom = Column(JSON)
@@ -107,6 +116,10 @@ class Submission(Base):
     tags = relationship("Tag", secondary=submission_tags, backref="submissions")
     collection = relationship("Collection", back_populates="submissions")
 
+    __table_args__ = (
+        Index("idx_submission_collection_created", "collection_slug", "created"),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
@@ -142,3 +155,14 @@ class PageMetric(Base):
     __table_args__ = (
         Index("idx_metric_key_value", "key", "value"),
     )
+
+class Generation(Base):
+    """
+    Write counters ("pages", ...), bumped in the same transaction as the write.
+    In-process indexes and caches compare them to notice changes made by other
+    worker processes.
+    """
+    __tablename__ = "generations"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
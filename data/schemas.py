@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 import nh3
 import re
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing import List, Optional, Dict, Any
 
 # Look, I know, I know, Jinja and Alpine's x-text auto escapes things
@@ -142,6 +142,18 @@ class PageData(Page):
     html: Optional[str] = Field(default=None, exclude=True)
     markdown: Optional[str] = Field(default=None, exclude=True)
 
+    @model_validator(mode='before')
+    @classmethod
+    def skip_page_body(cls, v):
+        # List queries defer the body columns, reading them off the ORM object
+        # would load (and sanitize) every body just to drop it from the response
+        if isinstance(v, dict):
+            return v
+        return {
+            name: getattr(v, name) for name in cls.model_fields
+            if name not in ("html", "markdown") and hasattr(v, name)
+        }
+
 class PageSeed(PageBase):
     slug: str
     @field_validator('slug', mode='before')
@@ -234,6 +246,64 @@ class Submission(SubmissionBase):
     def clean_labels_output(cls, v): return flatten_labels_to_strings(v)
     model_config = ConfigDict(from_attributes=True)
 
+class SubmissionAggregate(BaseModel):
+    group: Optional[Any] = None   # Value of the group_by field
+    bucket: Optional[str] = None  # Time bucket of `created`, e.g. "2026-10" by month
+    value: Optional[Any] = None   # The metric; None when no row has the field
+    count: int                    # Submissions in this group
+
+
+# --- Batch Schemas ---
+
+# Upper bound for one batch request, a single transaction should stay short
+BATCH_MAX_ITEMS = 1000
+
+class PageBatchUpdate(PageUpdate):
+    slug: str
+
+class PageBatchDelete(BaseModel):
+    slugs: List[str] = Field(max_length=BATCH_MAX_ITEMS)
+
+class SubmissionBatchUpdate(SubmissionUpdate):
+    id: int
+
+class SubmissionBatchDelete(BaseModel):
+    ids: List[int] = Field(max_length=BATCH_MAX_ITEMS)
+
+class BatchItemResult(BaseModel):
+    index: int # Position of the item in the request
+    key: Optional[str] = None # Slug or submission id
+    status: int # HTTP status this item would have gotten on its own
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+    @classmethod
+    def from_results(cls, results: List[BatchItemResult]) -> "BatchResult":
+        results = sorted(results, key=lambda r: r.index)
+        succeeded = sum(1 for r in results if r.status < 400)
+        return cls(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+# --- Search Schemas ---
+
+class PageSearchHit(PageData):
+    snippet: Optional[str] = None # HTML-escaped excerpt, matches wrapped in <mark>
+    rank: Optional[float] = None # bm25, lower is better. None when results are not ranked
+
+class SubmissionSearchHit(Submission):
+    snippet: Optional[str] = None
+    rank: Optional[float] = None
+
+class LabelFacet(BaseModel):
+    label: str
+    count: int # Matching pages carrying this label
+
+class NameSuggestion(BaseModel):
+    name: str
+    count: int # Pages, collections and submissions using the name
 
 # --- User Schemas ---
 
@@ -286,6 +356,13 @@ class CurrentUser(BaseModel):
     display_name: Optional[str] = None
     exp: int
 
+class Principal(CurrentUser):
+    """The authenticated caller of a request, resolved once by src.dependencies.get_principal."""
+    permissions: List[str] = []
+
+    def has_permission(self, permission: str) -> bool:
+        return "*" in self.permissions or permission in self.permissions
+
 class UserCreateWithPassword(UserBase):
     username: str
     password: str
@@ -370,8 +447,8 @@ class DashboardActivity(BaseModel):
     top_labels_on_pages: List[DashboardActivityItem]
 
 class DashboardRecentItems(BaseModel):
-    newest_pages: List[Page]
-    latest_updates: List[Page]
+    newest_pages: List[PageData]
+    latest_updates: List[PageData]
     latest_submissions: List[Submission]
 
 class DashboardStats(BaseModel):
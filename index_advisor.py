@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# --- Configuration & Setup ---
+BASE_DIR = Path(__file__).resolve().parent
+ENV_PATH = BASE_DIR / ".env"
+
+# 1. Load environment variables (Critical for Database connection)
+load_dotenv(ENV_PATH)
+
+# 2. Ensure project root is in python path so we can import 'data', 'services', etc.
+sys.path.append(str(BASE_DIR))
+
+def run_index_advisor():
+    print("---------------------------------------------------------")
+    print("   🔍 Anita CMS - Index Advisor")
+    print("---------------------------------------------------------")
+
+    try:
+        from data import database, migrations
+        from src.index_advisor import IndexAdvisor
+    except ImportError as e:
+        print(f"❌ Error importing modules: {e}")
+        print("   Make sure you are running this file from the project root directory.")
+        return 1
+
+    if not database.IS_SQLITE:
+        print("⚠️  The index advisor only understands SQLite query plans.")
+        return 1
+
+    # Plans are only meaningful against the schema the app would run with
+    database.Base.metadata.create_all(bind=database.engine)
+    migrations.run_startup_migrations(database.engine)
+
+    try:
+        flagged = IndexAdvisor(database.engine).print_report()
+    except Exception as e:
+        print(f"\n❌ Critical Error while explaining queries: {e}")
+        return 1
+
+    print("\n---------------------------------------------------------")
+    if flagged:
+        print(f"⚠️  {flagged} statement(s) scan a full table or sort without an index.")
+    else:
+        print("✨ Every query shape is served by an index.")
+    print("---------------------------------------------------------")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_index_advisor())
@@ -1,8 +1,9 @@
 import os
 import sys
 import shutil
+import asyncio
 import secrets
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 import uvicorn
@@ -21,7 +22,7 @@ load_dotenv(ENV_PATH)
 sys.path.append(str(BASE_DIR))
 
 # Import database (after path setup)
-from data import database
+from data import crud, database, migrations
 
 # Import all route modules
 from routes import (
@@ -31,6 +32,7 @@ from routes import (
     auth_route,
     file_route,
     collections_route,
+    labels_route,
     media_route,
     pages_route, 
     public_route,
@@ -48,11 +50,14 @@ def interactive_setup():
     """
     
     # 1. Database / Theme Selection
-    db_path = BASE_DIR / "anita.db"
+    # Templates are SQLite files, so this step only applies to the single-file setup.
+    if not database.IS_SQLITE:
+        print("🗄️  Using external database from DATABASE_URL, skipping template selection.")
+    db_path = BASE_DIR / (database.db_url.database or "anita.db")
     templates_dir = BASE_DIR / "anita-template"
 
-    if not db_path.exists():
-        print("\n⚠️  No database found (anita.db).")
+    if database.IS_SQLITE and not db_path.exists():
+        print(f"\n⚠️  No database found ({db_path.name}).")
         
         # Find .db files in templates folder
         if not templates_dir.exists():
@@ -82,7 +87,7 @@ def interactive_setup():
                 pass
 
         selected_template = available_templates[selected_index]
-        print(f"🔄 Copying '{selected_template.name}' to 'anita.db'...")
+        print(f"🔄 Copying '{selected_template.name}' to '{db_path.name}'...")
         shutil.copy(selected_template, db_path)
         print("✅ Database initialized successfully.\n")
     
@@ -115,6 +120,31 @@ def interactive_setup():
             print("❌ Cannot proceed without JWT_SECRET. Exiting.")
             sys.exit(1)
 
+# --- Database Maintenance ---
+async def sqlite_maintenance_loop(interval: int):
+    """Periodically checkpoints the WAL and refreshes query planner statistics."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Runs on the serialized writer pool, off the event loop
+            await asyncio.to_thread(database.run_sqlite_maintenance)
+        except Exception as e:
+            print(f"⚠️  SQLite maintenance failed: {e}")
+
+def rebuild_name_suggestions():
+    # Only reads, so it stays off the writer pool
+    with database.ReadSessionLocal() as db:
+        crud.rebuild_suggestions(db)
+
+async def suggestion_rebuild_loop(interval: float):
+    """Periodically recounts label/tag usage for autocomplete, so keystrokes never do."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(rebuild_name_suggestions)
+        except Exception as e:
+            print(f"⚠️  Autocomplete rebuild failed: {e}")
+
 # --- Database Lifespan ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -123,11 +153,31 @@ async def lifespan(app: FastAPI):
     
     # Ensure tables exist (Safety check, though the copied DB should have them)
     database.Base.metadata.create_all(bind=database.engine)
+    # Older databases keep their tables, so add indexes introduced since then
+    migrations.run_startup_migrations(database.engine)
+    # Build the in-memory label index and autocomplete tries now rather than on the first request
+    with database.SessionLocal() as db:
+        crud.LABEL_INDEX.refresh(db, force=True)
+        crud.rebuild_suggestions(db)
+
+    background_tasks = []
+    if database.IS_SQLITE and database.SQLITE_MAINTENANCE_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(
+            sqlite_maintenance_loop(database.SQLITE_MAINTENANCE_INTERVAL)
+        ))
+    if crud.LABEL_SUGGEST_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            suggestion_rebuild_loop(crud.LABEL_SUGGEST_REFRESH_SECONDS)
+        ))
         
     yield # The application runs here
 
     # This code runs on shutdown
     print("👋 Application shutting down...")
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
 
 
 # --- FastAPI App Initialization ---
@@ -150,6 +200,8 @@ app.add_middleware(
         "Content-Type",
         "Authorization",
     ],
+    # Cursor pagination hands the next page token out as a response header
+    expose_headers=["X-Next-Cursor"],
 )
 
 # --- Static Files ---
@@ -166,6 +218,7 @@ api_router.include_router(aina_route.router, tags=["Aina"])
 api_router.include_router(asta_route.router, tags=["Asta"])
 api_router.include_router(media_route.router, tags=["Media"])
 api_router.include_router(collections_route.router, tags=["Collections"])
+api_router.include_router(labels_route.router, tags=["Labels"])
 api_router.include_router(file_route.router, tags=["Files"])
 api_router.include_router(roles_route.router, tags=["Roles"])
 api_router.include_router(pages_route.router, tags=["Pages"]) 
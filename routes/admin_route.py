@@ -5,13 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from data.database import get_db
+from data.database import get_read_db
 from routes.public_route import render_db_template
 from services.pages import PageService
 from src.dependencies import optional_user
 
 router = APIRouter(tags=["Admin SPA"])
-def get_page_service(db: Session = Depends(get_db)) -> PageService:
+def get_page_service(db: Session = Depends(get_read_db)) -> PageService:
     return PageService(db)
 
 ADMIN_DIR = "static/admin"
@@ -56,7 +56,7 @@ async def admin_router(
     slug: str, 
     request: Request, 
     user: dict = Depends(optional_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if not user:
         return RedirectResponse(url="/auth", status_code=302)
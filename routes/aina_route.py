@@ -2,14 +2,14 @@ import os
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Data & Logic
-from services.labels import LabelService
+from services.labels import AsyncLabelService
 from src.alpine_generator import generate_collection_alpine_components, generate_media_alpine_components, generate_public_alpine_components,generate_markdown_renderer_js, generate_media_list,generate_media_upload_js
-from data.database import get_db
+from data.database import get_async_db
 from data.schemas import AlpineData
-from services.collections import CollectionService
+from services.collections import AsyncCollectionService
 from src.dependencies import get_current_user
 
 router = APIRouter(tags=["Aina Website Builder"])
@@ -53,31 +53,31 @@ def render_view(file_path: str, context: dict = None):
 
 @router.get("/aina/routes", response_model=List[AlpineData])
 async def api_get_all_routes(
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     user: Optional[dict] = Depends(get_current_user)
     ):
     """
     API Endpoint: Provides the list of components for the Generator.
     """
-    collection_service = CollectionService(db)
-    label_service = LabelService(db)
+    collection_service = AsyncCollectionService(db)
+    label_service = AsyncLabelService(db)
     all_routes: List[AlpineData] = []
     
     # 1. Collection Components
     try:
-        all_routes.extend(generate_collection_alpine_components(collection_service))
+        all_routes.extend(await generate_collection_alpine_components(collection_service))
     except Exception as e:
         print(f"Error generating collection components: {e}")
     
     # 2. Media Components
     try:
-        all_routes.extend(generate_media_alpine_components(collection_service))
+        all_routes.extend(await generate_media_alpine_components(collection_service))
     except Exception as e:
         print(f"Error generating media components: {e}")
     
     # 3. Public Utils
     try:
-        all_routes.extend(generate_public_alpine_components(label_service))
+        all_routes.extend(await generate_public_alpine_components(label_service))
     except Exception as e:
         print(f"Error generating public components: {e}")
 
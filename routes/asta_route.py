@@ -5,13 +5,13 @@ import re  # <--- Import the regex module
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from data.database import get_db
+from data.database import get_async_db
 from src.embeds_generator import generate_media_embeds, generate_page_embeds
 from data.schemas import EmbedData
-from services.collections import CollectionService
-from services.pages import PageService
+from services.collections import AsyncCollectionService
+from services.pages import AsyncPageService
 from src.dependencies import get_current_user
 
 router = APIRouter(tags=["Asta Markdown Editor"])
@@ -38,15 +38,15 @@ def render_template(file_path: str, context: dict = None):
 # --- ROUTES ---
 
 @router.get("/asta/routes", response_model=List[EmbedData], )
-async def api_get_all_routes(db: Session = Depends(get_db), user: Optional[dict] = Depends(get_current_user)):
+async def api_get_all_routes(db: AsyncSession = Depends(get_async_db), user: Optional[dict] = Depends(get_current_user)):
     """API Endpoint: Provides the list of components for the Generator."""
-    page_service = PageService(db)
-    collection_service = CollectionService(db)
+    page_service = AsyncPageService(db)
+    collection_service = AsyncCollectionService(db)
     all_routes: List[EmbedData] = []
     
     try:
-        all_routes.extend(generate_page_embeds(page_service))
-        all_routes.extend(generate_media_embeds(collection_service))
+        all_routes.extend(await generate_page_embeds(page_service))
+        all_routes.extend(await generate_media_embeds(collection_service))
     except Exception as e:
         print(f"Error generating embeds: {e}")
 
@@ -2,16 +2,18 @@ import os
 from fastapi import APIRouter, HTTPException, Request, status, Response, Form, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
 from datetime import timedelta
-from sqlalchemy.orm import Session
-from data.database import get_db 
+from sqlalchemy.ext.asyncio import AsyncSession
+from data.database import get_async_db
 from data import schemas
 from services.auth import AuthService
-from services.users import UserService
+from services.users import AsyncUserService
+from src.rate_limit import limit_login, limit_register
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
-    return UserService(db)
+# Every handler here is `async def`, so they talk to the database through the async engine
+def get_user_service(db: AsyncSession = Depends(get_async_db)) -> AsyncUserService:
+    return AsyncUserService(db)
 
-def get_auth_service(user_service: UserService = Depends(get_user_service)) -> AuthService:
+def get_auth_service(user_service: AsyncUserService = Depends(get_user_service)) -> AuthService:
     return AuthService(user_service)
 
 # --- Router Setup ---
@@ -22,8 +24,8 @@ SPA_VIEWS = {"login","setup","register"}
 
 # --- HELPERS ---
 
-def is_system_initialized(user_service: UserService) -> bool:
-    return len(user_service.get_all_users()) > 0
+async def is_system_initialized(user_service: AsyncUserService) -> bool:
+    return await user_service.count_users() > 0
 
 def is_production() -> bool:
     """Simple check to determine if we should enforce HTTPS only cookies."""
@@ -49,8 +51,8 @@ def render_no_cache_html(file_path: str, is_partial: bool):
 # --- VIEWS ---
 
 @router.get("/auth")
-async def serve_auth_page(user_service: UserService = Depends(get_user_service)):
-    if not is_system_initialized(user_service):
+async def serve_auth_page(user_service: AsyncUserService = Depends(get_user_service)):
+    if not await is_system_initialized(user_service):
         return RedirectResponse(url="/auth/setup", status_code=status.HTTP_302_FOUND)
     
     return RedirectResponse("/auth/login")
@@ -75,7 +77,8 @@ async def auth_router(slug: str, request: Request):
 
 # --- ROUTES ---
 
-@router.post("/auth/login")
+# Rate limits run before the handler, so a rejected request costs no bcrypt work
+@router.post("/auth/login", dependencies=[Depends(limit_login)])
 async def login_for_access_token(
     response: Response,
     username: str = Form(...),
@@ -84,7 +87,7 @@ async def login_for_access_token(
     auth_service: AuthService = Depends(get_auth_service)
 ):
     # 1. Authenticate using the AuthService
-    user = auth_service.authenticate_user(username, password)
+    user = await auth_service.authenticate_user_async(username, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -133,10 +136,10 @@ async def setup_admin_account(
     username: str = Form(...),
     password: str = Form(...),
     confirm_password: str = Form(...),
-    user_service: UserService = Depends(get_user_service)
+    user_service: AsyncUserService = Depends(get_user_service)
 ):
     # Security: Double-check prevents overwriting if multiple people hit the endpoint
-    if is_system_initialized(user_service):
+    if await is_system_initialized(user_service):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="System is already initialized. Please login."
@@ -167,7 +170,7 @@ async def setup_admin_account(
     
     # The create_user method in the service will handle potential
     # username conflicts and other business logic.
-    user_service.create_user(admin_user_data)
+    await user_service.create_user(admin_user_data)
     
     return {
         "status": "success",
@@ -175,23 +178,23 @@ async def setup_admin_account(
     }
 
 @router.get("/auth/check-setup")
-async def check_setup(user_service: UserService = Depends(get_user_service)):
+async def check_setup(user_service: AsyncUserService = Depends(get_user_service)):
     """
     Client-side helper to check if the app needs to run the setup flow.
     """
     return {
-        "initialized": is_system_initialized(user_service)
+        "initialized": await is_system_initialized(user_service)
     }
 
 
 
-@router.post("/auth/register", status_code=status.HTTP_201_CREATED)
+@router.post("/auth/register", status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_register)])
 async def register_user(
     username: str = Form(...),
     password: str = Form(...),
     confirm_password: str = Form(...),
     display_name: str = Form(None), # Optional
-    user_service: UserService = Depends(get_user_service)
+    user_service: AsyncUserService = Depends(get_user_service)
 ):
     """
     Public endpoint to register a new account. 
@@ -221,7 +224,7 @@ async def register_user(
     # 3. Call Service
     # The service handles hashing and username uniqueness checks
     try:
-        created_user = user_service.create_user(new_user_data)
+        created_user = await user_service.create_user(new_user_data)
     except HTTPException as e:
         # Pass through service-level exceptions (like Username taken)
         raise e
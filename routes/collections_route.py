@@ -1,19 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Request, Response, status
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from data.database import get_db
+from data.database import get_db, get_read_db
 from data import schemas 
+from data.crud.pagination import NEXT_CURSOR_HEADER, next_cursor
+from data.crud.stats import AGGREGATE_DEFAULT_LIMIT, AGGREGATE_MAX_LIMIT, AGGREGATE_TRUNCATED_HEADER
 from services.collections import CollectionService
-from services.users import UserService
 from src.dependencies import get_current_user, optional_user
-from data.schemas import CurrentUser, SubmissionBase
+from src.rate_limit import limit_submit, limit_submit_batch
+from data.schemas import Principal, SubmissionBase
 
 # --- Dependency Setup ---
 def get_collection_service(db: Session = Depends(get_db)) -> CollectionService:
     return CollectionService(db)
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
-    return UserService(db)
+def get_read_collection_service(db: Session = Depends(get_read_db)) -> CollectionService:
+    return CollectionService(db)
 
 router = APIRouter(prefix="/collections", tags=["Collection"])
 
@@ -29,16 +31,18 @@ router = APIRouter(prefix="/collections", tags=["Collection"])
 @router.post("/", response_model=schemas.Collection, status_code=status.HTTP_201_CREATED)
 def create_collection(
     collection_in: schemas.CollectionCreate,
+    background_tasks: BackgroundTasks,
     collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     """Create a new custom collection."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_create_collection = "*" in user_permissions or "collection:create" in user_permissions
     if can_create_collection:
         collection_in.author = user.username
-        return collection_service.create_new_collection(collection_data=collection_in)
+        collection = collection_service.create_new_collection(collection_data=collection_in)
+        background_tasks.add_task(collection_service.sync_field_indexes)
+        return collection
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -50,12 +54,11 @@ def list_collections(
     label: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(get_current_user),
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
 ):
     """List all available collections, optionally filtered by label."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_read_collection = "*" in user_permissions or "collection:read" in user_permissions
     if not can_read_collection:
         raise HTTPException(
@@ -63,26 +66,17 @@ def list_collections(
             detail="You do not have permission to read a collection."
         )
     
-    all_collections = collection_service.get_all_collections(skip=skip, limit=limit)
-    
-    if label:
-        # FIX: Iterate over f.labels (objects) and check if the label string matches .name
-        return [
-            f for f in all_collections 
-            if f.labels and any(t.name == label for t in f.labels)
-        ]
-    
-    return all_collections
+    # The label filter runs in SQL, so a page is only short when it is the last one
+    return collection_service.get_all_collections(skip=skip, limit=limit, label=label)
 
 @router.get("/{slug}", response_model=schemas.Collection)
 def get_collection(
     slug: str,
-    collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(get_current_user),
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
 ):
     """Get a single collection by its slug."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_read_collection = "*" in user_permissions or "collection:read" in user_permissions
     if not can_read_collection:
         raise HTTPException(
@@ -95,29 +89,32 @@ def get_collection(
 def update_collection(
     slug: str,
     collection_update: schemas.CollectionUpdate,
+    background_tasks: BackgroundTasks,
     collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     """Update an existing collection definition."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_update_collection = "*" in user_permissions or "collection:update" in user_permissions
     if not can_update_collection:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to update a collection."
         )
-    return collection_service.update_existing_collection(slug=slug, collection_update_data=collection_update)
+    collection = collection_service.update_existing_collection(slug=slug, collection_update_data=collection_update)
+    if collection_update.schema is not None:
+        background_tasks.add_task(collection_service.sync_field_indexes)
+    return collection
 
 @router.delete("/{slug}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_collection(
     slug: str,
+    background_tasks: BackgroundTasks,
     collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
     """Delete a collection and all its submissions by its slug."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_delete_collection = "*" in user_permissions or "collection:delete" in user_permissions
     if not can_delete_collection:
         raise HTTPException(
@@ -125,6 +122,7 @@ def delete_collection(
             detail="You do not have permission to delete a collection."
         )
     collection_service.delete_collection_by_slug(slug)
+    background_tasks.add_task(collection_service.sync_field_indexes)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # ----------------------------------------------------
@@ -133,38 +131,32 @@ def delete_collection(
 
 @router.get("/labels/all", response_model=List[str])
 def get_all_labels(
-    collection_service: CollectionService = Depends(get_collection_service),
-    user: CurrentUser = Depends(get_current_user),
-    user_service: UserService = Depends(get_user_service),  
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
 ):
     """Get a list of all unique labels across all collections."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     permission = "*" in user_permissions or "collection:read" in user_permissions
     if not permission:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to access this route."
         )
-    collections = collection_service.get_all_collections(skip=0, limit=1000)
-    
-    labels = set()
-    for collection in collections:
-        if collection.labels:
-            # FIX: Extract .name from the objects
-            labels.update(label.name for label in collection.labels) 
-    return sorted(list(labels))
+    return collection_service.get_collection_label_names()
 
 # ----------------------------------------------------
 # 📨 FORM SUBMISSIONS
 # ----------------------------------------------------
 
-@router.post("/{slug}/submit", response_model=schemas.Submission, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/{slug}/submit", response_model=schemas.Submission, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_submit)],
+)
 def submit_collection(
     slug: str,
     submission_body: SubmissionBase,
     collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(optional_user),
+    user: Principal = Depends(optional_user),
 ):
     """Submit a response to a collection."""
     collection = collection_service.get_collection_by_slug(slug)
@@ -176,7 +168,7 @@ def submit_collection(
     user_role = "anon" 
 
     if user:
-        user_permissions = user_service.get_user_permissions(user.username)
+        user_permissions = user.permissions
         user_role = user.role
 
     override_submission = "*" in user_permissions or "submission:create" in user_permissions
@@ -211,13 +203,20 @@ def submit_collection(
 @router.get("/{slug}/submissions", response_model=List[schemas.Submission])
 def list_submissions(
     slug: str,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
 ):
-    """List all submissions for a collection."""
+    """
+    List all submissions for a collection, newest first.
+    Indexed schema fields can be filtered (`?filter=price:gte:10`, repeatable)
+    and sorted on (`?sort=price`, `?sort=-price`).
+    """
     collection = collection_service.get_collection_by_slug(slug)
     if not collection:
         raise HTTPException(status_code=404, detail="Collection not found")
@@ -225,7 +224,7 @@ def list_submissions(
     # FIX: Extract label names
     collection_label_names = {label.name for label in (collection.labels or [])}
 
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     override_submission = "*" in user_permissions or "submission:read" in user_permissions
     
     # FIX: Check against string set
@@ -235,15 +234,212 @@ def list_submissions(
     if not override_submission and not collection_is_open and not role_is_allowed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
         
-    return collection_service.get_submissions_for_collection(collection_slug=slug, skip=skip, limit=limit)
+    submissions = collection_service.get_submissions_for_collection(
+        collection_slug=slug, skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort
+    )
+
+    next_page = next_cursor(submissions, limit) if not sort else None
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return submissions
+
+@router.get("/{slug}/submissions/search", response_model=List[schemas.SubmissionSearchHit])
+def search_submissions(
+    slug: str,
+    q: str,
+    skip: int = 0,
+    limit: int = 100,
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
+):
+    """Full-text search over the submissions of a collection, best match first."""
+    collection = collection_service.get_collection_by_slug(slug)
+    collection_label_names = {label.name for label in (collection.labels or [])}
+
+    user_permissions = user.permissions
+    override_submission = "*" in user_permissions or "submission:read" in user_permissions
+    collection_is_open = "any:read" in collection_label_names
+    role_is_allowed = f"{user.role}:read" in collection_label_names
+
+    if not override_submission and not collection_is_open and not role_is_allowed:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    return collection_service.search_submissions_text(slug, q, skip=skip, limit=limit)
+
+@router.get("/{slug}/submissions/aggregate", response_model=List[schemas.SubmissionAggregate])
+def aggregate_submissions(
+    slug: str,
+    response: Response,
+    metric: str = "count",
+    field: Optional[str] = None,
+    group_by: Optional[str] = None,
+    bucket: Optional[str] = None,
+    limit: int = Query(AGGREGATE_DEFAULT_LIMIT, ge=1, le=AGGREGATE_MAX_LIMIT),
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Dashboard numbers without downloading the submissions, e.g.
+    `?metric=avg&field=rating&group_by=product&bucket=month`.
+    At most `limit` groups; a response missing some says so in X-Truncated.
+    """
+    collection = collection_service.get_collection_by_slug(slug)
+    collection_label_names = {label.name for label in (collection.labels or [])}
+
+    user_permissions = user.permissions
+    override_submission = "*" in user_permissions or "submission:read" in user_permissions
+    collection_is_open = "any:read" in collection_label_names
+    role_is_allowed = f"{user.role}:read" in collection_label_names
+
+    if not override_submission and not collection_is_open and not role_is_allowed:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    aggregates, truncated = collection_service.aggregate_submissions(
+        slug, metric=metric, field=field, group_by=group_by, bucket=bucket, limit=limit
+    )
+    if truncated:
+        response.headers[AGGREGATE_TRUNCATED_HEADER] = "true"
+    return aggregates
+
+# ----------------------------------------------------
+# 📦 BATCH SUBMISSIONS
+# Same permission rules as the single-submission endpoints. Update and delete
+# are checked per item; anything the user may not touch is reported as 404.
+# (Registered before /{slug}/submissions/{submission_id}.)
+# ----------------------------------------------------
+
+def _batch_targets(
+    ids: List[int],
+    action: str,
+    slug: str,
+    collection_label_names: set,
+    collection_service: CollectionService,
+    user_permissions: List[str],
+    user_role: str,
+    user: Optional[Principal],
+):
+    """Splits {request index: submission id} into (authorized, results for the rest)."""
+    submissions = collection_service.get_submissions_by_ids(ids)
+    override = "*" in user_permissions or f"submission:{action}" in user_permissions
+    collection_is_open = f"any:{action}" in collection_label_names
+    role_is_allowed = f"{user_role}:{action}" in collection_label_names
+
+    authorized, results = {}, []
+    for index, submission_id in enumerate(ids):
+        submission = submissions.get(submission_id)
+        user_owns_it = user and submission and submission.author == user.username
+        if (
+            submission is None or
+            submission.collection_slug != slug or
+            not (override or collection_is_open or role_is_allowed or user_owns_it)
+        ):
+            results.append(schemas.BatchItemResult(
+                index=index, key=str(submission_id),
+                status=status.HTTP_404_NOT_FOUND, detail="Submission not found"
+            ))
+        else:
+            authorized[index] = submission_id
+    return authorized, results
+
+@router.post("/{slug}/submissions/batch", response_model=schemas.BatchResult)
+def submit_collection_batch(
+    slug: str,
+    request: Request,
+    submission_bodies: List[SubmissionBase] = Body(..., max_length=schemas.BATCH_MAX_ITEMS),
+    collection_service: CollectionService = Depends(get_collection_service),
+    user: Optional[Principal] = Depends(optional_user),
+):
+    """Submit several responses to a collection at once."""
+    collection = collection_service.get_collection_by_slug(slug)
+    collection_label_names = {label.name for label in (collection.labels or [])}
+
+    user_permissions = []
+    user_role = "anon"
+    if user:
+        user_permissions = user.permissions
+        user_role = user.role
+
+    authorized = (
+        "*" in user_permissions or "submission:create" in user_permissions or
+        f"{user_role}:create" in collection_label_names or
+        "any:create" in collection_label_names
+    )
+    if not authorized:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to add submission in this collection."
+        )
+
+    author_username = user.username if user else "Anon"
+    items = {
+        index: schemas.SubmissionCreate(
+            collection_slug=slug,
+            data=body.data,
+            custom=body.custom,
+            author=author_username
+        )
+        for index, body in enumerate(submission_bodies)
+    }
+    accepted, results = collection_service.validate_submissions_batch(collection, items)
+    # Charged per submission about to be written, a batch is not one cheap request
+    limit_submit_batch(request, user, len(accepted))
+    results.extend(collection_service.create_submissions_batch(accepted))
+    return schemas.BatchResult.from_results(results)
+
+@router.put("/{slug}/submissions/batch", response_model=schemas.BatchResult)
+def update_submissions_batch(
+    slug: str,
+    updates: List[schemas.SubmissionBatchUpdate] = Body(..., max_length=schemas.BATCH_MAX_ITEMS),
+    collection_service: CollectionService = Depends(get_collection_service),
+    user: Optional[Principal] = Depends(optional_user),
+):
+    collection = collection_service.get_collection_by_slug(slug)
+    collection_label_names = {label.name for label in (collection.labels or [])}
+
+    user_permissions = []
+    user_role = "anon"
+    if user:
+        user_permissions = user.permissions
+        user_role = user.role
+
+    authorized, results = _batch_targets(
+        [item.id for item in updates], "update", slug, collection_label_names,
+        collection_service, user_permissions, user_role, user
+    )
+    results.extend(collection_service.update_submissions_batch(
+        collection, {index: updates[index] for index in authorized}
+    ))
+    return schemas.BatchResult.from_results(results)
+
+@router.post("/{slug}/submissions/batch/delete", response_model=schemas.BatchResult)
+def delete_submissions_batch(
+    slug: str,
+    batch: schemas.SubmissionBatchDelete,
+    collection_service: CollectionService = Depends(get_collection_service),
+    user: Optional[Principal] = Depends(optional_user),
+):
+    collection = collection_service.get_collection_by_slug(slug)
+    collection_label_names = {label.name for label in (collection.labels or [])}
+
+    user_permissions = []
+    user_role = "anon"
+    if user:
+        user_permissions = user.permissions
+        user_role = user.role
+
+    authorized, results = _batch_targets(
+        batch.ids, "delete", slug, collection_label_names,
+        collection_service, user_permissions, user_role, user
+    )
+    results.extend(collection_service.delete_submissions_batch(authorized))
+    return schemas.BatchResult.from_results(results)
 
 @router.get("/{slug}/submissions/{submission_id}", response_model=schemas.Submission)
 def get_submission(
     slug: str,
     submission_id: int,
-    collection_service: CollectionService = Depends(get_collection_service),
-    user_service: UserService = Depends(get_user_service),
-    user: CurrentUser = Depends(get_current_user),
+    collection_service: CollectionService = Depends(get_read_collection_service),
+    user: Principal = Depends(get_current_user),
 ):
     collection = collection_service.get_collection_by_slug(slug)
     if not collection:
@@ -256,7 +452,7 @@ def get_submission(
     # FIX: Extract label names
     collection_label_names = {label.name for label in (collection.labels or [])}
 
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
 
     override_submission = ("*" in user_permissions or "submission:read" in user_permissions)
     
@@ -287,8 +483,7 @@ def update_submission(
     submission_id: int,
     submission_update: schemas.SubmissionUpdate,
     collection_service: CollectionService = Depends(get_collection_service),
-    user: Optional[CurrentUser] = Depends(optional_user),
-    user_service: UserService = Depends(get_user_service),
+    user: Optional[Principal] = Depends(optional_user),
 ):
     collection = collection_service.get_collection_by_slug(slug)
     if not collection:
@@ -310,7 +505,7 @@ def update_submission(
     user_permissions = []
     user_role = "anon"
     if user:
-        user_permissions = user_service.get_user_permissions(user.username)
+        user_permissions = user.permissions
         user_role = user.role
 
     override_update = ("*" in user_permissions or "submission:update" in user_permissions)
@@ -341,8 +536,7 @@ def delete_submission(
     slug: str,
     submission_id: int,
     collection_service: CollectionService = Depends(get_collection_service),
-    user: Optional[CurrentUser] = Depends(optional_user),
-    user_service: UserService = Depends(get_user_service),
+    user: Optional[Principal] = Depends(optional_user),
 ):
     collection = collection_service.get_collection_by_slug(slug)
     if not collection:
@@ -364,7 +558,7 @@ def delete_submission(
     user_permissions = []
     user_role = "anon"
     if user:
-        user_permissions = user_service.get_user_permissions(user.username)
+        user_permissions = user.permissions
         user_role = user.role
 
     override_delete = ("*" in user_permissions or "submission:delete" in user_permissions)
@@ -6,16 +6,20 @@ from typing import List, Set
 from data import schemas, models
 from services.dashboard import DashboardService
 from services.users import UserService
-from src.dependencies import get_current_user, get_db
+from data.database import get_db, get_read_db
+from src.dependencies import get_current_user
 
 # --- Dependency Setup ---
 
-def get_dashboard_service(db: Session = Depends(get_db)) -> DashboardService:
+def get_dashboard_service(db: Session = Depends(get_read_db)) -> DashboardService:
     return DashboardService(db)
 
 def get_user_service(db: Session = Depends(get_db)) -> UserService:
     return UserService(db)
 
+def get_read_user_service(db: Session = Depends(get_read_db)) -> UserService:
+    return UserService(db)
+
 # --- RBAC Helper for this Router ---
 
 def _filter_page_list_for_user(pages: List[models.Page], permissions: Set[str]) -> List[models.Page]:
@@ -56,8 +60,7 @@ router = APIRouter(
 @router.get("/stats", response_model=schemas.DashboardStats)
 def read_dashboard_stats(
     dashboard_service: DashboardService = Depends(get_dashboard_service),
-    user_service: UserService = Depends(get_user_service),
-    user: schemas.CurrentUser = Depends(get_current_user)
+    user: schemas.Principal = Depends(get_current_user)
 ):
     """
     Retrieve aggregated statistics for the admin dashboard.
@@ -69,7 +72,7 @@ def read_dashboard_stats(
     stats = dashboard_service.get_dashboard_stats()
 
     # 2. Get the user's permissions to perform checks.
-    permissions = set(user_service.get_user_permissions(user.username))
+    permissions = set(user.permissions)
     is_admin = "*" in permissions
 
     # 3. Apply RBAC filtering to the stats dictionary before returning it.
@@ -114,8 +117,8 @@ def read_dashboard_stats(
 
 @router.get("/me", response_model=schemas.User)
 def get_user(
-    user_service: UserService = Depends(get_user_service),
-    user: schemas.CurrentUser = Depends(get_current_user),
+    user_service: UserService = Depends(get_read_user_service),
+    user: schemas.Principal = Depends(get_current_user),
 ):
     """Returns Yourself"""
     return user_service.get_user_by_username(user.username)
@@ -124,7 +127,7 @@ def get_user(
 def update_yourself(
     update_data: schemas.MeUpdate,
     user_service: UserService = Depends(get_user_service),
-    user: schemas.CurrentUser = Depends(get_current_user),
+    user: schemas.Principal = Depends(get_current_user),
 ):
     """
     Update a user's details (display name, etc.).
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from sqlalchemy.orm import Session
+
+from data.database import get_read_db
+from data import schemas
+from services.labels import LabelService
+from src.dependencies import get_current_user
+from data.schemas import Principal
+
+# --- Dependency Setup ---
+def get_read_label_service(db: Session = Depends(get_read_db)) -> LabelService:
+    return LabelService(db)
+
+# --- Router Definition ---
+router = APIRouter(prefix="/labels", tags=["Labels"])
+
+@router.get("/autocomplete", response_model=List[schemas.NameSuggestion])
+def autocomplete_labels(
+    q: str = "",
+    kind: str = "label",
+    limit: int = Query(10, ge=1, le=20),
+    label_service: LabelService = Depends(get_read_label_service),
+    user: Principal = Depends(get_current_user),
+):
+    """Label (or `kind=tag`) suggestions for what the editor has typed so far, most used first."""
+    return label_service.autocomplete(q, kind=kind, limit=limit)
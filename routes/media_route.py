@@ -3,28 +3,20 @@
 from typing import List
 from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, HTTPException, status
 from fastapi.responses import FileResponse
-from pytest import Session
-from data.database import get_db
-from services.users import UserService
 from src.dependencies import get_current_user
 
 from services.media import CopypartyError, MediaService, InvalidFileNameError, FileNotFoundError, ImageProcessingError
-from data.schemas import MediaFile, UploadResult, UploadedFileReport,CurrentUser
+from data.schemas import MediaFile, UploadResult, UploadedFileReport,Principal
 
 router = APIRouter(prefix="/media", tags=["Media"])
 media_service = MediaService() # Instantiate the service once
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
-    """Dependency to get an instance of UserService with a DB session."""
-    return UserService(db)
-
 @router.get("/", response_model=List[MediaFile])
 async def list_images(
-    user: CurrentUser = Depends(get_current_user),
-    user_service: UserService = Depends(get_user_service),  
+    user: Principal = Depends(get_current_user),
 ):
     """List all available media files."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_list_media = "*" in user_permissions or "media:read" in user_permissions
     
     if not can_list_media:
@@ -47,11 +39,10 @@ async def get_media(filename: str):
 @router.post("/", response_model=UploadResult)
 async def upload_media(
     files: List[UploadFile] = File(...),
-    user: CurrentUser = Depends(get_current_user),
-    user_service: UserService = Depends(get_user_service),  
+    user: Principal = Depends(get_current_user),
 ):
     """Upload one or more image files for processing and storage."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_create_media = "*" in user_permissions or "media:create" in user_permissions
 
     if not can_create_media:
@@ -82,11 +73,10 @@ async def upload_media(
 @router.delete("/{filename}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_media(
     filename: str, 
-    user: CurrentUser = Depends(get_current_user),
-    user_service: UserService = Depends(get_user_service),  
+    user: Principal = Depends(get_current_user),
 ):
     """Delete a media file."""
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     can_delete_media = "*" in user_permissions or "media:delete" in user_permissions
 
     if not can_delete_media:
@@ -102,14 +92,13 @@ async def delete_media(
 @router.post("/sync", status_code=status.HTTP_200_OK)
 async def sync_media_to_remote(
     background_tasks: BackgroundTasks,
-    user: CurrentUser = Depends(get_current_user),
-    user_service: UserService = Depends(get_user_service),
+    user: Principal = Depends(get_current_user),
 ):
     """
     Trigger a synchronization of local files to the Copyparty server.
     This checks for files missing on the remote server and uploads them.
     """
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     # Require admin or specific media permission
     can_sync = "*" in user_permissions or "media:update" in user_permissions
 
@@ -1,24 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
 from typing import List, Optional, Set
 from sqlalchemy.orm import Session
 
-from data.database import get_db
+from data.database import get_db, get_read_db
 from data import schemas
-from data.schemas import CurrentUser
+from data.crud.pagination import NEXT_CURSOR_HEADER, next_cursor
+from data.schemas import Principal
 from services.pages import PageService
-from services.users import UserService
 from src import dependencies as dep
 from src.audit import logger
 
-# TODO: Figure out what the user can fetch *before* fetching from database for performance.
-
 # --- Dependency Setup ---
 
 def get_page_service(db: Session = Depends(get_db)) -> PageService:
     return PageService(db)
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
-    return UserService(db)
+def get_read_page_service(db: Session = Depends(get_read_db)) -> PageService:
+    return PageService(db)
 
 router = APIRouter(prefix="/page", tags=["Pages"])
 
@@ -50,15 +48,14 @@ def check_type_permission(permissions: List[str], page_type: str, action: str):
 def create_page(
     page_in: schemas.PageCreate,
     page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service),  
-    user: CurrentUser = Depends(dep.get_current_user),  
+    user: Principal = Depends(dep.get_current_user),  
 ):
     # 0. Enforce Default Type
     # If type is None or empty, default to 'markdown'
     if not page_in.type:
         page_in.type = "markdown"
 
-    permissions = user_service.get_user_permissions(user.username)
+    permissions = user.permissions
     
     # 1. Base Page Permission
     can_create_page = "*" in permissions or "page:create" in permissions
@@ -90,44 +87,153 @@ def create_page(
 
 @router.get("/list", response_model=List[schemas.PageData])
 def list_pages(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service),
-    user: Optional[CurrentUser] = Depends(dep.optional_user),
+    cursor: Optional[str] = None,
+    page_service: PageService = Depends(get_read_page_service),
+    user: Optional[Principal] = Depends(dep.optional_user),
 ):
-    # Standard listing (Read access logic)
-    all_pages = page_service.get_all_pages(skip=skip, limit=limit)
-    
     user_permissions = []
     user_role = "anon"
     if user:
-        user_permissions = user_service.get_user_permissions(user.username)
+        user_permissions = user.permissions
         user_role = user.role
 
-    if "*" in user_permissions or "page:read" in user_permissions:
-        return all_pages
+    # Standard listing (Read access logic)
+    # Without blanket page access, the database only returns pages that are public,
+    # open to the user's role, or written by the user, so a full page stays full.
+    read_labels = None
+    author = None
+    if not ("*" in user_permissions or "page:read" in user_permissions):
+        read_labels = ["any:read", f"{user_role}:read"]
+        author = user.username if user else None
+
+    pages = page_service.get_all_pages(
+        skip=skip, limit=limit, cursor=cursor,
+        read_labels=read_labels, author=author,
+    )
 
-    accessible_pages = []
-    for page in all_pages:
-        label_names = get_label_names(page.labels)
-        
-        is_public = "any:read" in label_names
-        role_allowed = f"{user_role}:read" in label_names
-        is_author = user and page.author == user.username
+    next_page = next_cursor(pages, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return pages
+
+# ----------------------------------------------------
+# 📦 BATCH OPERATIONS
+# Same permission rules as the single-page endpoints, checked per item.
+# Items that fail get their own result, the rest is written in one transaction.
+# (Registered before /{slug} so "batch" is never taken for a slug.)
+# ----------------------------------------------------
 
-        if is_public or role_allowed or is_author:
-            accessible_pages.append(page)
+def _denied(index: int, key: str, detail: str, status_code: int = 403) -> schemas.BatchItemResult:
+    return schemas.BatchItemResult(index=index, key=key, status=status_code, detail=detail)
 
-    return accessible_pages
+@router.post("/batch", response_model=schemas.BatchResult)
+def create_pages_batch(
+    pages_in: List[schemas.PageCreate] = Body(..., max_length=schemas.BATCH_MAX_ITEMS),
+    page_service: PageService = Depends(get_page_service),
+    user: Principal = Depends(dep.get_current_user),
+):
+    permissions = user.permissions
+    if not ("*" in permissions or "page:create" in permissions):
+        raise HTTPException(status_code=403, detail="You do not have permission to create pages.")
+
+    default_page = page_service.get_page_by_slug("default-page")
+    results: List[schemas.BatchItemResult] = []
+    accepted = {}
+
+    for index, page_in in enumerate(pages_in):
+        if not page_in.type:
+            page_in.type = "markdown"
+        if page_in.type != "markdown" and not check_type_permission(permissions, page_in.type, "create"):
+            results.append(_denied(index, page_in.slug, f"You do not have permission to create {page_in.type} pages."))
+            continue
+
+        if default_page and default_page.custom:
+            page_in.custom = default_page.custom
+        page_in.author = user.username
+        accepted[index] = page_in
+
+    logger.info(f"User {user.username} batch creating {len(accepted)} pages")
+    results.extend(page_service.create_pages_batch(accepted))
+    return schemas.BatchResult.from_results(results)
+
+@router.put("/batch", response_model=schemas.BatchResult)
+def update_pages_batch(
+    updates: List[schemas.PageBatchUpdate] = Body(..., max_length=schemas.BATCH_MAX_ITEMS),
+    page_service: PageService = Depends(get_page_service),
+    user: Principal = Depends(dep.get_current_user),
+):
+    permissions = user.permissions
+    db_pages = page_service.get_pages_by_slugs([item.slug for item in updates])
+    results: List[schemas.BatchItemResult] = []
+    accepted = {}
+
+    for index, item in enumerate(updates):
+        db_page = db_pages.get(item.slug)
+        if not db_page:
+            # Reported as 404 by the service
+            accepted[index] = item
+            continue
+
+        label_names = get_label_names(db_page.labels)
+        has_access_right = (
+            "*" in permissions or "page:update" in permissions or
+            db_page.author == user.username or
+            f"{user.role}:update" in label_names or
+            "any:update" in label_names
+        )
+        if not has_access_right:
+            results.append(_denied(index, item.slug, "Permission denied for this page."))
+        elif not check_type_permission(permissions, db_page.type, "update"):
+            results.append(_denied(index, item.slug, f"You lack permission to update {db_page.type} content."))
+        elif item.type and item.type != db_page.type and not check_type_permission(permissions, item.type, "create"):
+            results.append(_denied(index, item.slug, f"You lack permission to change page type to {item.type}."))
+        else:
+            accepted[index] = item
+
+    logger.info(f"User {user.username} batch updating {len(accepted)} pages")
+    results.extend(page_service.update_pages_batch(accepted))
+    return schemas.BatchResult.from_results(results)
+
+@router.post("/batch/delete", response_model=schemas.BatchResult)
+def delete_pages_batch(
+    batch: schemas.PageBatchDelete,
+    page_service: PageService = Depends(get_page_service),
+    user: Principal = Depends(dep.get_current_user),
+):
+    permissions = user.permissions
+    db_pages = page_service.get_pages_by_slugs(batch.slugs)
+    results: List[schemas.BatchItemResult] = []
+    accepted = {}
+
+    for index, slug in enumerate(batch.slugs):
+        db_page = db_pages.get(slug)
+        if not db_page:
+            # Deleting a missing page is a no-op, same as DELETE /page/{slug}
+            results.append(schemas.BatchItemResult(index=index, key=slug, status=status.HTTP_204_NO_CONTENT))
+            continue
+
+        label_names = get_label_names(db_page.labels)
+        if not ("*" in permissions or "page:delete" in permissions or
+                db_page.author == user.username or f"{user.role}:delete" in label_names):
+            results.append(_denied(index, slug, "Permission denied"))
+        elif not check_type_permission(permissions, db_page.type, "delete"):
+            results.append(_denied(index, slug, f"You lack permission to delete {db_page.type} pages."))
+        else:
+            accepted[index] = slug
+
+    logger.info(f"User {user.username} batch deleting {len(accepted)} pages")
+    results.extend(page_service.delete_pages_batch(accepted))
+    return schemas.BatchResult.from_results(results)
 
 
 @router.get("/{slug}", response_model=schemas.Page)
 def get_page(
     slug: str,
-    page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service),
-    user: Optional[CurrentUser] = Depends(dep.optional_user),
+    page_service: PageService = Depends(get_read_page_service),
+    user: Optional[Principal] = Depends(dep.optional_user),
 ):
     page = page_service.get_page_by_slug(slug)
     if not page:
@@ -142,7 +248,7 @@ def get_page(
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
 
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
     
     # 2. Access Rights
     is_admin = "*" in user_permissions or "page:read" in user_permissions
@@ -160,8 +266,7 @@ def update_page(
     slug: str,
     page_update: schemas.PageUpdate,
     page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service),
-    user: CurrentUser = Depends(dep.get_current_user),
+    user: Principal = Depends(dep.get_current_user),
 ):
     """
     Updates page metadata or content.
@@ -172,7 +277,7 @@ def update_page(
         raise HTTPException(status_code=404, detail="Page not found")
 
     label_names = get_label_names(db_page.labels)
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
 
     # 1. Access Rights (Can I touch this page?)
     is_admin = "*" in user_permissions or "page:update" in user_permissions
@@ -214,15 +319,14 @@ def update_page(
 def delete_page(
     slug: str,
     page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service), 
-    user: CurrentUser = Depends(dep.get_current_user),
+    user: Principal = Depends(dep.get_current_user),
 ):
     db_page = page_service.get_page_by_slug(slug)
     if not db_page:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     label_names = get_label_names(db_page.labels)
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
 
     # 1. Access Rights
     is_admin = "*" in user_permissions or "page:delete" in user_permissions
@@ -254,8 +358,7 @@ def update_page_markdown(
     slug: str,
     page_update: schemas.PageMarkdownUpdate,
     page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service),
-    user: CurrentUser = Depends(dep.get_current_user),
+    user: Principal = Depends(dep.get_current_user),
 ):
     db_page = page_service.get_page_by_slug(slug)
     if not db_page:
@@ -266,7 +369,7 @@ def update_page_markdown(
          raise HTTPException(status_code=400, detail="Endpoint only for markdown pages.")
 
     label_names = get_label_names(db_page.labels)
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
 
     # 2. Access Rights
     authorized_access = (
@@ -294,8 +397,7 @@ def update_page_html(
     slug: str,
     page_update: schemas.PageUpdateHTML,
     page_service: PageService = Depends(get_page_service),
-    user_service: UserService = Depends(get_user_service),
-    user: CurrentUser = Depends(dep.get_current_user),
+    user: Principal = Depends(dep.get_current_user),
 ):
     db_page = page_service.get_page_by_slug(slug)
     if not db_page:
@@ -306,7 +408,7 @@ def update_page_html(
          raise HTTPException(status_code=400, detail="Endpoint only for html pages.")
 
     label_names = get_label_names(db_page.labels)
-    user_permissions = user_service.get_user_permissions(user.username)
+    user_permissions = user.permissions
 
     # 2. Access Rights
     authorized_access = (
@@ -1,16 +1,17 @@
 import json
 from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 from jinja2 import Environment, BaseLoader
 
-from data.database import get_db
+from data.database import get_read_db
 from data import schemas
+from data.crud.pagination import NEXT_CURSOR_HEADER, next_cursor
 from services.pages import PageService
 
 # --- Dependency Setup ---
-def get_page_service(db: Session = Depends(get_db)) -> PageService:
+def get_page_service(db: Session = Depends(get_read_db)) -> PageService:
     return PageService(db)
 
 router = APIRouter(tags=["Public"])
@@ -53,7 +54,7 @@ def serve_home_page(page_service: PageService = Depends(get_page_service)):
 @router.get("/api/{slug}", response_class=schemas.Page)
 def serve_generic_page(slug: str, page_service: PageService = Depends(get_page_service)):
     page = page_service.get_page_by_slug(slug)
-    if not page.labels or not {'sys:head', 'any:read'}.issubset(label.name for label in page.labels):
+    if not page_service.page_has_labels(page, ['sys:head', 'any:read']):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found in this category.")
     return page
 
@@ -61,21 +62,47 @@ def serve_generic_page(slug: str, page_service: PageService = Depends(get_page_s
 def api_get_any_page(main:str, slug: str, page_service: PageService = Depends(get_page_service)):
     page = page_service.get_page_by_slug(slug)
     
-    if not page.labels or not {f'main:{main}', 'any:read'}.issubset(label.name for label in page.labels):
+    if not page_service.page_has_labels(page, [f'main:{main}', 'any:read']):
          raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found in this category.")
 
     return page
 
-@router.get("/search", response_model=list[schemas.PageData])
+@router.get("/search", response_model=list[schemas.PageSearchHit])
 def api_search_pages_by_labels(
+    response: Response,
+    q: Optional[str] = Query(None, description="Full-text query, results are ranked and carry a snippet"),
     labels: Optional[List[str]] = Query(None, description="List of labels to filter pages by"),
+    skip: int = Query(0, description="Offset into ranked results (only with q)"),
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     page_service: PageService = Depends(get_page_service),
 ):
     search_labels = labels if labels is not None else []
     search_labels.append("any:read")
-    pages = page_service.get_pages_by_labels(search_labels)
+
+    if q:
+        # Ranked results page by offset, there is no stable (created, id) cursor to hand out
+        return page_service.search_pages_text(q, search_labels, skip=skip, limit=limit)
+
+    pages = page_service.get_pages_by_labels(search_labels, limit=limit, cursor=cursor)
+
+    next_page = next_cursor(pages, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
     return pages
 
+@router.get("/search/facets", response_model=list[schemas.LabelFacet])
+def api_search_facets(
+    labels: Optional[List[str]] = Query(None, description="Label query the counts are taken over"),
+    namespace: Optional[str] = Query(None, description="Only count labels with this prefix, e.g. main:"),
+    limit: int = 100,
+    page_service: PageService = Depends(get_page_service),
+):
+    """Page counts per label for a search, e.g. to render a category sidebar in one request."""
+    search_labels = labels if labels is not None else []
+    search_labels.append("any:read")
+    return page_service.get_label_facets(search_labels, namespace=namespace, limit=limit)
+
 # ==========================================
 # 🚀 DYNAMIC ROUTES
 # ==========================================
@@ -89,10 +116,7 @@ def serve_top_level_page(
     if not page:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
 
-    label_names = {label.name for label in page.labels}
-    required_labels = {"sys:head", "any:read"}
-
-    if not required_labels.issubset(label_names):
+    if not page_service.page_has_labels(page, ["sys:head", "any:read"]):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
 
     return HTMLResponse(content=page.html, status_code=200)
@@ -113,7 +137,7 @@ def serve_any_post(slug: str, main:str, page_service: PageService = Depends(get_
     page = page_service.get_page_by_slug(slug) 
     
     # 2. Security/Logic Check
-    if not page.labels or not {f'main:{main}', 'any:read'}.issubset(label.name for label in page.labels):
+    if not page_service.page_has_labels(page, [f'main:{main}', 'any:read']):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found.")
 
     # 3. If it's already static HTML, return it
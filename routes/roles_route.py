@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 # --- Service, Schema, and Auth Imports ---
 from data.database import get_db
 from data import schemas
-from services.users import UserService, hash_password
+from services.users import UserService
 from src.dependencies import get_current_user, require_admin
 from data.schemas import CurrentUser
 
@@ -166,9 +166,7 @@ def change_user_password(
             detail="Password must be at least 8 characters long."
         )
 
-    db_user = user_service.get_user_by_username(target_username)
-    db_user.hashed_password = hash_password(password_data.new_password)
-    user_service.db.commit()
+    user_service.set_password(target_username, password_data.new_password)
 
     return {"message": f"Password for user '{target_username}' has been updated."}
 
@@ -1,13 +1,21 @@
+import logging
 import os
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 import jwt  
 from fastapi import HTTPException, status
-from services.users import UserService, verify_password
-from data.schemas import User 
+from pydantic import ValidationError
+from services.users import (
+    AsyncUserService, UserService, hash_password_async, password_needs_rehash,
+    verify_password, verify_password_async
+)
+from data import crud
+from data.schemas import Principal, User 
+
+logger = logging.getLogger("AuthService")
 
 class AuthService:
-    def __init__(self, user_service: UserService):
+    def __init__(self, user_service: UserService | AsyncUserService):
         self.user_service = user_service
         self.SECRET_KEY = os.getenv("JWT_SECRET")
         self.ALGORITHM = "HS256"
@@ -36,6 +44,36 @@ class AuthService:
         # Pydantic v2 uses model_validate instead of from_orm
         return User.model_validate(user)
 
+    async def authenticate_user_async(self, username: str, password: str) -> Optional[User]:
+        """
+        Same as authenticate_user, for an AsyncUserService backed by an async session.
+        """
+        try:
+            user = await self.user_service.get_user_by_username(username)
+        except HTTPException as e:
+            if e.status_code == 404:
+                return None
+            raise e
+
+        # bcrypt runs in the hashing pool, not on the event loop
+        if not await verify_password_async(password, user.hashed_password):
+            return None
+
+        if user.disabled:
+            return None
+
+        authenticated = User.model_validate(user)
+        if password_needs_rehash(user.hashed_password):
+            # BCRYPT_ROUNDS changed since this hash was made. Best effort: the
+            # password is already verified, so a busy hashing pool or a failed
+            # write must not fail the login; the next login tries again.
+            try:
+                await self.user_service.update_password_hash(user, await hash_password_async(password))
+            except Exception as e:
+                logger.warning(f"Could not rehash the password of '{username}': {e}")
+
+        return authenticated
+
     def create_access_token(self, user: User, expires_delta: Optional[timedelta] = None) -> str:
         """
         Creates a new JWT access token using PyJWT.
@@ -57,18 +95,14 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_jwt
 
-    def decode_access_token(self, token: str) -> Optional[Dict[str, Any]]:
+    def decode_token_claims(self, token: str) -> Optional[Dict[str, Any]]:
         """
-        Decodes a JWT token using PyJWT logic.
+        Verifies the signature and expiry of a JWT and returns its claims.
+        No database access: see decode_access_token() for the user check.
         """
         try:
             # SECURITY: Always pass algorithms as a list to prevent confusion attacks
             payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            
-            username: str = payload.get("username")
-            if username is None:
-                return None
-                
         except jwt.ExpiredSignatureError:
             # Specific exception for expired tokens
             return None
@@ -76,9 +110,21 @@ class AuthService:
             # Catch-all for other JWT errors (malformed, bad signature, etc)
             return None
 
+        if payload.get("username") is None:
+            return None
+        return payload
+
+    def decode_access_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Decodes a JWT token using PyJWT logic.
+        """
+        payload = self.decode_token_claims(token)
+        if payload is None:
+            return None
+
         # Double-check DB (Stateful check for immediate banning)
         try:
-            user = self.user_service.get_user_by_username(username=username)
+            user = self.user_service.get_user_by_username(username=payload["username"])
             if user.disabled:
                 return None
         except HTTPException as e:
@@ -86,4 +132,32 @@ class AuthService:
                 return None
             raise e
         
-        return payload
\ No newline at end of file
+        return payload
+
+    def resolve_principal(self, token: str) -> Optional[Principal]:
+        """
+        Everything a request needs to know about its caller, in one user lookup:
+        the token claims, the user's current role and that role's permissions
+        (from the in-memory role table). None if the token or user is not valid.
+        Recently validated tokens skip the decode and the lookup, see TOKEN_CACHE.
+        """
+        db = self.user_service.db
+        claims = crud.TOKEN_CACHE.get(db, token)
+        if claims is None:
+            payload = self.decode_token_claims(token)
+            if payload is None:
+                return None
+
+            user = self.user_service.find_user(payload["username"])
+            if user is None or user.disabled:
+                return None
+
+            # The stored role wins over the one in the token, it may have changed since login
+            claims = {**payload, "role": user.role}
+            try:
+                Principal(**claims)
+            except ValidationError:
+                return None
+            crud.TOKEN_CACHE.put(token, claims)
+
+        return Principal(**claims, permissions=self.user_service.get_role_permissions(claims["role"]))
@@ -1,10 +1,11 @@
 # file: services/collections.py
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from data import crud, schemas, models
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Optional, Set, Tuple
 
 class CollectionService:
     def __init__(self, db: Session):
@@ -25,9 +26,13 @@ class CollectionService:
             )
         return collection
 
-    def get_all_collections(self, skip: int, limit: int) -> List[models.Collection]:
-        """Gets a list of all available collections."""
-        return crud.list_collections(self.db, skip=skip, limit=limit)
+    def get_all_collections(self, skip: int, limit: int, label: Optional[str] = None) -> List[models.Collection]:
+        """Gets a list of all available collections, optionally only those carrying `label`."""
+        return crud.list_collections(self.db, skip=skip, limit=limit, label=label)
+
+    def get_collection_label_names(self) -> List[str]:
+        """Every label used by some collection, sorted."""
+        return crud.get_collection_label_names(self.db)
 
     def create_new_collection(self, collection_data: schemas.CollectionCreate) -> models.Collection:
         """
@@ -48,6 +53,8 @@ class CollectionService:
                 detail="Collection schema cannot be empty."
             )
         
+        self._validate_indexed_fields(collection_data.schema)
+
         # If all checks pass, proceed to create the collection in the database.
         return crud.create_collection(self.db, collection=collection_data)
 
@@ -57,6 +64,8 @@ class CollectionService:
         """
         # First, ensure the collection we're trying to update actually exists.
         self.get_collection_by_slug(slug)
+        if collection_update_data.schema is not None:
+            self._validate_indexed_fields(collection_update_data.schema)
         
         # Then, call the CRUD function to perform the update.
         updated_collection = crud.update_collection(self.db, slug=slug, collection_update=collection_update_data)
@@ -78,6 +87,75 @@ class CollectionService:
             # This case is unlikely if get_collection_by_slug passed, but good for safety
             raise HTTPException(status_code=500, detail="Could not delete collection.")
 
+    # --- Indexed Fields ---
+    # Schema fields marked {"indexed": true} can be filtered and sorted on
+    # through an expression index (see data/crud/field_index.py).
+
+    def _validate_indexed_fields(self, schema: Dict[str, Any]):
+        for name, field_type in crud.indexed_fields(schema).items():
+            if field_type not in crud.INDEXABLE_TYPES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Field '{name}' of type '{field_type}' cannot be indexed, "
+                           f"only {', '.join(sorted(crud.INDEXABLE_TYPES))} fields can."
+                )
+
+    def sync_field_indexes(self):
+        """
+        Brings the field indexes in line with the collection schemas, in a
+        transaction of its own. Routes queue it as a background task after a
+        schema change, so building an index never holds up the response.
+        """
+        with self.db.get_bind().begin() as conn:
+            crud.sync_field_indexes(conn)
+
+    def _field_type(self, collection: models.Collection, name: str) -> str:
+        fields = crud.indexed_fields(collection.schema)
+        if name not in fields:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Field '{name}' is not an indexed field of collection '{collection.slug}'."
+            )
+        return fields[name]
+
+    def _field_argument(self, name: str, field_type: str, raw: str) -> Any:
+        """Converts a query string value to what the field's SQL expression returns."""
+        try:
+            value = crud.coerce_field_value(field_type, raw)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {field_type} value for field '{name}': '{raw}'."
+            )
+        # json_extract() returns JSON booleans as 1/0
+        return int(value) if field_type == "boolean" else value
+
+    def parse_field_query(self, collection: models.Collection, filters: List[str], sort: Optional[str]):
+        """
+        Turns `field:op:value` filters (op is one of eq, ne, lt, lte, gt, gte)
+        and a `field` / `-field` sort into the arguments of crud.list_submissions().
+        Only indexed fields are accepted.
+        """
+        parsed = []
+        for item in filters:
+            name, _, rest = item.partition(":")
+            operator, separator, raw = rest.partition(":")
+            if not separator or operator not in crud.FILTER_OPERATORS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid filter '{item}', expected field:op:value with op in "
+                           f"{', '.join(crud.FILTER_OPERATORS)}."
+                )
+            field_type = self._field_type(collection, name)
+            parsed.append((name, operator, self._field_argument(name, field_type, raw)))
+
+        parsed_sort = None
+        if sort:
+            name = sort[1:] if sort.startswith("-") else sort
+            self._field_type(collection, name)
+            parsed_sort = (name, sort.startswith("-"))
+        return parsed, parsed_sort
+
     # --- Submission Methods ---
 
     def _validate_submission_data(self, schema: Dict[str, Any], data: Dict[str, Any]):
@@ -107,6 +185,19 @@ class CollectionService:
                     detail=f"Unexpected field in submission: '{field_name}'"
                 )
 
+        # 4. Indexed number/boolean fields are stored typed, so filters and sorts
+        #    compare them as such (HTML forms send "3", not 3). Coerced in place.
+        for field_name, field_type in crud.indexed_fields(schema).items():
+            if data.get(field_name) is None:
+                continue
+            try:
+                data[field_name] = crud.coerce_field_value(field_type, data[field_name])
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Field '{field_name}' must be a {field_type}, got {data[field_name]!r}."
+                )
+
     def create_new_submission(self, submission_data: schemas.SubmissionCreate) -> models.Submission:
         """
         Creates a new submission for a collection after validation.
@@ -120,14 +211,95 @@ class CollectionService:
         # If validation passes, create the submission.
         return crud.create_submission(self.db, submission=submission_data)
 
-    def get_submissions_for_collection(self, collection_slug: str, skip: int = 0, limit: int = 100) -> List[models.Submission]:
+    def get_submissions_for_collection(
+        self,
+        collection_slug: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filters: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+    ) -> List[models.Submission]:
         """
-        Retrieves all submissions for a specific collection.
+        Retrieves all submissions for a specific collection, newest first.
+        `cursor` continues after a previous page. `filters` and `sort` work on
+        indexed fields, see parse_field_query().
         """
         # Ensure the parent collection exists.
-        self.get_collection_by_slug(collection_slug)
+        collection = self.get_collection_by_slug(collection_slug)
+        field_filters, field_sort = self.parse_field_query(collection, filters or [], sort)
+        if field_sort is not None and cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursors only apply to the default order, use skip with sort."
+            )
         
-        return crud.list_submissions(self.db, collection_slug=collection_slug, skip=skip, limit=limit)
+        try:
+            return crud.list_submissions(
+                self.db, collection_slug=collection_slug, skip=skip, limit=limit, cursor=cursor,
+                filters=field_filters, sort=field_sort, field_types=crud.indexed_fields(collection.schema)
+            )
+        except crud.InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def search_submissions_text(self, collection_slug: str, query_text: str, skip: int = 0, limit: int = 100) -> List[schemas.SubmissionSearchHit]:
+        """Ranked full-text search over the data values of a collection's submissions."""
+        rows = crud.search_submissions_text(
+            self.db, query_text, collection_slug=collection_slug, skip=skip, limit=limit
+        )
+        hits = []
+        for submission, snippet, rank in rows:
+            hit = schemas.SubmissionSearchHit.model_validate(submission)
+            hit.snippet, hit.rank = snippet, rank
+            hits.append(hit)
+        return hits
+
+    def aggregate_submissions(
+        self,
+        collection_slug: str,
+        metric: str = "count",
+        field: Optional[str] = None,
+        group_by: Optional[str] = None,
+        bucket: Optional[str] = None,
+        limit: int = crud.AGGREGATE_DEFAULT_LIMIT,
+    ) -> Tuple[List[schemas.SubmissionAggregate], bool]:
+        """
+        Count/sum/avg/min/max of a schema field over a collection's submissions,
+        optionally grouped by another field and/or a time bucket of `created`.
+        Computed in SQL and cached until the collection's next submission write.
+        Returns (at most `limit` groups, whether there were more).
+        """
+        collection = self.get_collection_by_slug(collection_slug)
+        field_types = {
+            f.get("name"): f.get("type", "string")
+            for f in (collection.schema or {}).get("fields") or [] if isinstance(f, dict)
+        }
+
+        def bad_request(detail: str):
+            return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+        if metric not in crud.AGGREGATE_METRICS:
+            raise bad_request(f"Unknown metric '{metric}', expected one of {', '.join(crud.AGGREGATE_METRICS)}.")
+        if bucket and bucket not in crud.TIME_BUCKETS:
+            raise bad_request(f"Unknown bucket '{bucket}', expected one of {', '.join(crud.TIME_BUCKETS)}.")
+        for name in (field, group_by):
+            if name and name not in field_types:
+                raise bad_request(f"Collection '{collection_slug}' has no field '{name}'.")
+        if metric != "count" and not field:
+            raise bad_request(f"The '{metric}' metric needs a field.")
+        if metric in ("sum", "avg") and field_types[field] != "number":
+            raise bad_request(f"'{metric}' needs a number field, '{field}' is {field_types[field]}.")
+
+        # One row past the limit tells whether anything was cut off
+        rows = crud.aggregate_submissions(
+            self.db, collection_slug, metric=metric, field=field, group_by=group_by, bucket=bucket,
+            limit=limit + 1, field_types=field_types,
+        )
+        aggregates = [
+            schemas.SubmissionAggregate(group=group, bucket=period, value=value, count=count)
+            for group, period, value, count in rows[:limit]
+        ]
+        return aggregates, len(rows) > limit
 
     def get_submission_by_id(self, submission_id: int) -> models.Submission:
         """
@@ -179,4 +351,95 @@ class CollectionService:
         
         success = crud.delete_submission(self.db, submission_id=submission_id)
         if not success:
-            raise HTTPException(status_code=500, detail="Could not delete submission.")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail="Could not delete submission.")
+
+
+    # --- Batch Submission Methods ---
+    # Items come in as {request index: item}; the route has already dropped the
+    # ones the user may not touch. Each returns one BatchItemResult per item.
+
+    def get_submissions_by_ids(self, submission_ids: List[int]) -> Dict[int, models.Submission]:
+        return crud.get_submissions_by_ids(self.db, submission_ids)
+
+    def _schema_error(self, schema: Dict[str, Any], data: Dict[str, Any]) -> Optional[HTTPException]:
+        try:
+            self._validate_submission_data(schema=schema, data=data)
+        except HTTPException as e:
+            return e
+        return None
+
+    def validate_submissions_batch(
+        self, collection: models.Collection, items: Dict[int, schemas.SubmissionCreate]
+    ) -> Tuple[Dict[int, schemas.SubmissionCreate], List[schemas.BatchItemResult]]:
+        """
+        Checks every item against the collection schema. Returns (the valid items,
+        results for the invalid ones); invalid items are reported, not fatal.
+        """
+        results: List[schemas.BatchItemResult] = []
+        accepted: Dict[int, schemas.SubmissionCreate] = {}
+
+        for index, item in items.items():
+            error = self._schema_error(collection.schema, item.data)
+            if error:
+                results.append(schemas.BatchItemResult(index=index, status=error.status_code, detail=error.detail))
+            else:
+                accepted[index] = item
+        return accepted, results
+
+    def create_submissions_batch(self, accepted: Dict[int, schemas.SubmissionCreate]) -> List[schemas.BatchItemResult]:
+        """Inserts items that passed validate_submissions_batch() in one transaction."""
+        new_ids = crud.create_submissions(self.db, list(accepted.values()))
+        return [
+            schemas.BatchItemResult(index=index, key=str(new_id), status=status.HTTP_201_CREATED)
+            for index, new_id in zip(accepted, new_ids)
+        ]
+
+    def update_submissions_batch(self, collection: models.Collection, items: Dict[int, schemas.SubmissionBatchUpdate]) -> List[schemas.BatchItemResult]:
+        """Updates all listed submissions in one transaction. Each id may appear once per batch."""
+        results: List[schemas.BatchItemResult] = []
+        accepted: Dict[int, schemas.SubmissionBatchUpdate] = {}
+        seen = set()
+
+        for index, item in items.items():
+            error = None
+            if item.id in seen:
+                error = HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Submission {item.id} appears more than once in this batch."
+                )
+            elif item.data is not None:
+                error = self._schema_error(collection.schema, item.data)
+
+            if error:
+                results.append(schemas.BatchItemResult(index=index, key=str(item.id), status=error.status_code, detail=error.detail))
+            else:
+                accepted[index] = item
+                seen.add(item.id)
+
+        crud.update_submissions(self.db, {item.id: item for item in accepted.values()})
+        return results + [
+            schemas.BatchItemResult(index=index, key=str(item.id), status=status.HTTP_200_OK)
+            for index, item in accepted.items()
+        ]
+
+    def delete_submissions_batch(self, items: Dict[int, int]) -> List[schemas.BatchItemResult]:
+        """Deletes all listed submissions in one transaction."""
+        crud.delete_submissions(self.db, list(set(items.values())))
+        return [
+            schemas.BatchItemResult(index=index, key=str(submission_id), status=status.HTTP_204_NO_CONTENT)
+            for index, submission_id in items.items()
+        ]
+
+
+class AsyncCollectionService:
+    """Async counterpart of CollectionService, read paths only."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_all_collections(self, skip: int, limit: int, label: Optional[str] = None) -> List[models.Collection]:
+        """Gets a paginated list of all collections."""
+        return await crud.list_collections_async(self.db, skip=skip, limit=limit, label=label)
+
+    async def get_submissions_for_collection(self, collection_slug: str, skip: int = 0, limit: int = 100) -> List[models.Submission]:
+        """Gets all submissions for a specific collection."""
+        return await crud.list_submissions_async(self.db, collection_slug=collection_slug, skip=skip, limit=limit)
@@ -1,7 +1,9 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
 from typing import List
 
-from data import crud
+from data import crud, schemas
 
 class LabelService:
     def __init__(self, db: Session):
@@ -10,4 +12,30 @@ class LabelService:
         """
         Retrieves all existing page groups
         """
-        return crud.get_main_labels(db=self.db)
\ No newline at end of file
+        return crud.get_main_labels(db=self.db)
+
+    def autocomplete(self, prefix: str, kind: str = "label", limit: int = 10) -> List[schemas.NameSuggestion]:
+        """
+        Most used label (or tag) names starting with `prefix`, from the
+        in-memory trie. Never touches the database, the tries are rebuilt in
+        the background (see main.py).
+        """
+        suggestions = {"label": crud.LABEL_SUGGESTIONS, "tag": crud.TAG_SUGGESTIONS}.get(kind)
+        if suggestions is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown kind '{kind}', expected 'label' or 'tag'."
+            )
+        # Same normalization as stored names, minus the space -> "_" of a half-typed word
+        prefix = prefix.lstrip().lower().replace(" ", "_")
+        return [schemas.NameSuggestion(name=name, count=count) for name, count in suggestions.suggest(prefix, limit)]
+
+
+class AsyncLabelService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    async def get_main_label(self) -> List[str]:
+        """
+        Retrieves all existing page groups
+        """
+        return await crud.get_main_labels_async(db=self.db)
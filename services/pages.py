@@ -1,11 +1,15 @@
 # file: services/pages.py
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List, Optional
 
 from data import crud, schemas, models
 
+FORBIDDEN_SLUGS = {"admin", "api", "login", "static","blog"}
+
 class PageService:
     def __init__(self, db: Session):
         self.db = db
@@ -22,17 +26,32 @@ class PageService:
             )
         return page
 
-    def get_all_pages(self, skip: int, limit: int) -> list[models.Page]:
-        """Gets a list of all pages."""
-        return crud.list_pages(self.db, skip=skip, limit=limit)
+    def get_all_pages(
+        self,
+        skip: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        read_labels: Optional[List[str]] = None,
+        author: Optional[str] = None,
+    ) -> list[models.Page]:
+        """
+        Gets a list of all pages, newest first. `cursor` continues after a previous page.
+        With `read_labels`, only pages carrying one of them (or written by `author`) are returned.
+        """
+        try:
+            return crud.list_pages(
+                self.db, skip=skip, limit=limit, cursor=cursor,
+                read_labels=read_labels, author=author,
+            )
+        except crud.InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     def create_new_page(self, page_data: schemas.PageCreate) -> models.Page:
         """
         Creates a new page after performing business logic checks.
         """
         # 1. Check for forbidden slugs.
-        forbidden_slugs = {"admin", "api", "login", "static","blog"}
-        if page_data.slug in forbidden_slugs:
+        if page_data.slug in FORBIDDEN_SLUGS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"The slug '{page_data.slug}' is a reserved keyword."
@@ -108,12 +127,13 @@ class PageService:
     # ✨ NEW METHODS FOR TAG-BASED QUERIES ✨
     # -----------------------------------------------------------------
 
-    def get_pages_by_label(self, label: str) -> List[models.Page]:
+    def get_pages_by_label(self, label: str, load_body: bool = False) -> List[models.Page]:
         """
         Retrieves all pages containing a specific label by calling the efficient
         CRUD function that filters in the database.
+        Pass load_body=True when the caller renders markdown/html of every page.
         """
-        return crud.get_pages_by_label(self.db, label=label)
+        return crud.get_pages_by_label(self.db, label=label, load_body=load_body)
     
     def get_pages_by_author(self,author:str) -> List[models.Page]:
         """
@@ -121,7 +141,7 @@ class PageService:
         """
         return crud.get_pages_by_author(self.db,author)
     
-    def get_pages_by_labels(self, labels: List[str]) -> List[models.Page]:
+    def get_pages_by_labels(self, labels: List[str], limit: int = 100, cursor: Optional[str] = None) -> List[models.Page]:
         """
         Retrieves all pages containing ALL of the given labels.
         """
@@ -132,11 +152,47 @@ class PageService:
                 detail="At least one label must be provided."
             )
 
-        # Normalize + join for the CRUD engine
-        query_str = " ".join(labels)
-
-        return crud.search_pages(self.db, query_str=query_str)
+        try:
+            return crud.get_pages_by_labels(self.db, labels=labels, limit=limit, cursor=cursor)
+        except crud.InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
+    def search_pages_text(
+        self,
+        query_text: str,
+        labels: Optional[List[str]] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[schemas.PageSearchHit]:
+        """
+        Ranked full-text search over title, content and markdown,
+        narrowed to pages carrying all of the given labels.
+        """
+        rows = crud.search_pages_text(
+            self.db, query_text, label_query=" ".join(labels or []), skip=skip, limit=limit
+        )
+        hits = []
+        for page, snippet, rank in rows:
+            hit = schemas.PageSearchHit.model_validate(page)
+            hit.snippet, hit.rank = snippet, rank
+            hits.append(hit)
+        return hits
+
+    def get_label_facets(self, labels: List[str], namespace: Optional[str] = None, limit: int = 100) -> List[schemas.LabelFacet]:
+        """
+        Page counts per label among the pages carrying all of `labels`,
+        optionally only for labels in `namespace` (e.g. "main:").
+        """
+        facets = crud.get_label_facets(self.db, " ".join(labels), namespace=namespace, limit=limit)
+        return [schemas.LabelFacet(label=name, count=count) for name, count in facets]
+
+    def page_has_labels(self, page: models.Page, labels: List[str]) -> bool:
+        """
+        Checks that a page carries all of the given labels (e.g. any:read) using
+        the in-memory label index, without loading page.labels.
+        """
+        return crud.page_has_labels(self.db, page, labels)
+
     def get_first_page_by_labels(self, label: List[str]) -> Optional[models.Page]:
         """
         Retrieves the most recent page with a specific label by calling the
@@ -149,4 +205,105 @@ class PageService:
         Retrieves the most recent page with a specific label by calling the
         efficient CRUD function.
         """
-        return crud.get_first_page_by_label(self.db, label=label)
\ No newline at end of file
+        return crud.get_first_page_by_label(self.db, label=label)
+
+
+    # -----------------------------------------------------------------
+    # BATCH METHODS
+    # Items come in as {request index: item}; the route has already dropped the
+    # ones the user may not touch. Each returns one BatchItemResult per item.
+    # -----------------------------------------------------------------
+
+    def get_pages_by_slugs(self, slugs: List[str]) -> Dict[str, models.Page]:
+        return crud.get_pages_by_slugs(self.db, slugs)
+
+    def create_pages_batch(self, items: Dict[int, schemas.PageCreate]) -> List[schemas.BatchItemResult]:
+        """
+        Creates all valid pages in one transaction.
+        Reserved and already-taken slugs are reported per item instead of failing the batch.
+        """
+        existing = crud.get_pages_by_slugs(self.db, [page.slug for page in items.values()])
+        results: List[schemas.BatchItemResult] = []
+        accepted: Dict[int, schemas.PageCreate] = {}
+        seen = set()
+
+        for index, page in items.items():
+            if page.slug in FORBIDDEN_SLUGS:
+                results.append(schemas.BatchItemResult(
+                    index=index, key=page.slug, status=status.HTTP_400_BAD_REQUEST,
+                    detail=f"The slug '{page.slug}' is a reserved keyword."
+                ))
+            elif page.slug in existing or page.slug in seen:
+                results.append(schemas.BatchItemResult(
+                    index=index, key=page.slug, status=status.HTTP_409_CONFLICT,
+                    detail=f"Page with slug '{page.slug}' already exists."
+                ))
+            else:
+                accepted[index] = page
+                seen.add(page.slug)
+
+        try:
+            crud.create_pages(self.db, list(accepted.values()))
+        except IntegrityError:
+            # Someone else took one of the slugs between the check and the insert
+            self.db.rollback()
+            return results + [
+                schemas.BatchItemResult(
+                    index=index, key=page.slug, status=status.HTTP_409_CONFLICT,
+                    detail="A slug in this batch was taken concurrently, no page was created."
+                )
+                for index, page in accepted.items()
+            ]
+
+        return results + [
+            schemas.BatchItemResult(index=index, key=page.slug, status=status.HTTP_201_CREATED)
+            for index, page in accepted.items()
+        ]
+
+    def update_pages_batch(self, items: Dict[int, schemas.PageBatchUpdate]) -> List[schemas.BatchItemResult]:
+        """Updates all listed pages in one transaction. Each slug may appear once per batch."""
+        existing = crud.get_pages_by_slugs(self.db, [item.slug for item in items.values()])
+        results: List[schemas.BatchItemResult] = []
+        accepted: Dict[int, schemas.PageBatchUpdate] = {}
+        seen = set()
+
+        for index, item in items.items():
+            if item.slug not in existing:
+                results.append(schemas.BatchItemResult(
+                    index=index, key=item.slug, status=status.HTTP_404_NOT_FOUND,
+                    detail=f"Page with slug '{item.slug}' not found."
+                ))
+            elif item.slug in seen:
+                results.append(schemas.BatchItemResult(
+                    index=index, key=item.slug, status=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Page '{item.slug}' appears more than once in this batch."
+                ))
+            else:
+                accepted[index] = item
+                seen.add(item.slug)
+
+        crud.update_pages(self.db, {item.slug: item for item in accepted.values()})
+        return results + [
+            schemas.BatchItemResult(index=index, key=item.slug, status=status.HTTP_200_OK)
+            for index, item in accepted.items()
+        ]
+
+    def delete_pages_batch(self, items: Dict[int, str]) -> List[schemas.BatchItemResult]:
+        """Deletes all listed pages in one transaction. Missing pages count as deleted."""
+        crud.delete_pages(self.db, list(set(items.values())))
+        return [
+            schemas.BatchItemResult(index=index, key=slug, status=status.HTTP_204_NO_CONTENT)
+            for index, slug in items.items()
+        ]
+
+
+class AsyncPageService:
+    """Async counterpart of PageService, read paths only."""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_pages_by_label(self, label: str) -> List[models.Page]:
+        """
+        Retrieves all pages containing a specific label.
+        """
+        return await crud.get_pages_by_label_async(self.db, label=label)
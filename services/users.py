@@ -1,14 +1,35 @@
 # file: services/users.py
 
-from typing import List, Dict
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, TypeVar
 import bcrypt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from data import crud, schemas, models
 
+T = TypeVar("T")
+
 # --- Password Hashing Setup (Replaces Passlib) ---
 
+# bcrypt cost factor for new hashes. Stored hashes with another cost are
+# rehashed on the user's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so a small thread pool runs hashes in parallel while
+# the event loop keeps serving. Requests beyond MAX_PENDING, or waiting longer
+# than TIMEOUT_SECONDS, get a 503 instead of piling up behind each other.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "5"))
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain-text password against a hashed one using strict bcrypt.
@@ -26,12 +47,64 @@ def hash_password(password: str) -> str:
     Returns the hash as a string for database storage.
     """
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed_bytes = bcrypt.hashpw(password_bytes, salt)
     
     # Decode back to utf-8 string so it can be saved in the SQL Text/String column
     return hashed_bytes.decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with another cost than BCRYPT_ROUNDS ($2b$<cost>$...)."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+async def _run_in_hash_pool(function: Callable[..., T], *args) -> T:
+    busy = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress, please try again shortly.",
+        headers={"Retry-After": "1"},
+    )
+    if not _hash_slots.acquire(blocking=False):
+        raise busy
+    future = _hash_pool.submit(function, *args)
+    future.add_done_callback(lambda _: _hash_slots.release())
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), PASSWORD_HASH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise busy
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password() for `async def` handlers, off the event loop."""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password() for `async def` handlers, off the event loop."""
+    return await _run_in_hash_pool(hash_password, password)
+
+# --- Shared User Rules ---
+# Used by both UserService and AsyncUserService, which differ only in how they
+# reach the database.
+
+def _check_new_user(user_in: schemas.UserCreateWithPassword, existing_user: Optional[models.User], role: Optional[models.Role]):
+    """Raises if the username is taken or the assigned role does not exist."""
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Username '{user_in.username}' is already registered."
+        )
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Role '{user_in.role}' does not exist."
+        )
+
+def _new_user_data(user_in: schemas.UserCreateWithPassword, hashed_password: str) -> schemas.UserCreate:
+    """The CRUD payload for a new user: everything but the plain password."""
+    # Pydantic v2: Use model_dump instead of dict
+    return schemas.UserCreate(**user_in.model_dump(exclude={"password"}), hashed_password=hashed_password)
+
 # --- Service Class ---
 
 class UserService:
@@ -52,6 +125,10 @@ class UserService:
             )
         return user
 
+    def find_user(self, username: str) -> Optional[models.User]:
+        """Like get_user_by_username(), but returns None instead of raising."""
+        return crud.get_user_by_username(self.db, username=username)
+
     def get_all_users(self) -> List[models.User]:
         """Gets a list of all users."""
         return crud.list_users(self.db)
@@ -61,31 +138,15 @@ class UserService:
         Creates a new user.
         Handles password hashing and role validation.
         """
-        # Business Logic 1: Check if username already exists.
-        if crud.get_user_by_username(self.db, username=user_in.username):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Username '{user_in.username}' is already registered."
-            )
-
-        # Business Logic 2: Check if the assigned role exists.
-        if not crud.get_role(self.db, role_name=user_in.role):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Role '{user_in.role}' does not exist."
-            )
+        # Business Logic: unique username, existing role.
+        _check_new_user(
+            user_in,
+            existing_user=crud.get_user_by_username(self.db, username=user_in.username),
+            role=crud.get_role(self.db, role_name=user_in.role),
+        )
 
         # Hash the password before storage.
-        hashed_pw = hash_password(user_in.password)
-
-        # Create the user data object for the CRUD layer.
-        # Pydantic v2: Use model_dump instead of dict
-        user_data_dict = user_in.model_dump(exclude={"password"})
-        
-        user_create_data = schemas.UserCreate(
-            **user_data_dict,
-            hashed_password=hashed_pw
-        )
+        user_create_data = _new_user_data(user_in, hash_password(user_in.password))
         
         return crud.save_user(self.db, user=user_create_data)
 
@@ -112,10 +173,22 @@ class UserService:
             setattr(db_user, key, value)
         
         self.db.add(db_user)
+        crud.record_user_write(self.db, username)
         self.db.commit()
         self.db.refresh(db_user)
         return db_user
         
+    def set_password(self, username: str, new_password: str) -> models.User:
+        """
+        Replaces a user's password. Tokens issued before stay valid (they carry
+        no password), but cached validations of them are dropped.
+        """
+        db_user = self.get_user_by_username(username)
+        db_user.hashed_password = hash_password(new_password)
+        crud.record_user_write(self.db, username)
+        self.db.commit()
+        return db_user
+
     def delete_user(self, username: str):
         """
         Deletes a user.
@@ -176,19 +249,69 @@ class UserService:
         
         crud.delete_role(self.db, role_name=role_name)
 
+    def get_role_permissions(self, role_name: Optional[str]) -> List[str]:
+        """Gets the permissions of a role, [] for unknown roles."""
+        return crud.get_role_permissions(self.db, role_name)
+
     def get_user_permissions(self, username: str) -> List[str]:
         """
         Gets a list of all permissions for a specific user.
+        Request handlers get these from their Principal instead.
         """
         user = crud.get_user_by_username(self.db, username=username)
         if not user:
             return []
 
-        user_role_name = user.role
-        if not user_role_name:
-            return []
+        # Served from the process-wide role table, see data/crud/role_cache.py
+        return crud.get_role_permissions(self.db, user.role)
 
-        all_roles_with_permissions = self.get_all_roles()
-        permissions = all_roles_with_permissions.get(user_role_name, [])
-        
-        return permissions
\ No newline at end of file
+
+class AsyncUserService:
+    """
+    Async counterpart of UserService for `async def` routes.
+    Only covers what the auth and media routes need.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_by_username(self, username: str) -> models.User:
+        """
+        Gets a user by username, raising a standard 404 exception if not found.
+        """
+        user = await crud.get_user_by_username_async(self.db, username=username)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User '{username}' not found."
+            )
+        return user
+
+    async def count_users(self) -> int:
+        """Counts registered users without loading them."""
+        return await crud.count_users_async(self.db)
+
+    async def create_user(self, user_in: schemas.UserCreateWithPassword) -> models.User:
+        """
+        Creates a new user.
+        Handles password hashing and role validation.
+        """
+        _check_new_user(
+            user_in,
+            existing_user=await crud.get_user_by_username_async(self.db, username=user_in.username),
+            role=await crud.get_role_async(self.db, role_name=user_in.role),
+        )
+        user_create_data = _new_user_data(user_in, await hash_password_async(user_in.password))
+
+        return await crud.save_user_async(self.db, user=user_create_data)
+
+    async def update_password_hash(self, user: models.User, hashed_password: str):
+        """
+        Stores a new hash of the same password (cost change). Not a credential
+        change, so cached tokens stay valid.
+        """
+        user.hashed_password = hashed_password
+        try:
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
@@ -3,8 +3,8 @@ from typing import List
 from jinja2 import Environment, FileSystemLoader
 
 from data.schemas import AlpineData
-from services.collections import CollectionService
-from services.labels import LabelService
+from services.collections import AsyncCollectionService
+from services.labels import AsyncLabelService
 
 # --- Configuration ---
 
@@ -127,8 +127,8 @@ def list_media_js() -> str:
 
 # --- Registry Generators ---
 
-def generate_collection_alpine_components(collection_service: CollectionService) -> List[AlpineData]:
-    collections = collection_service.get_all_collections(skip=0, limit=1000)
+async def generate_collection_alpine_components(collection_service: AsyncCollectionService) -> List[AlpineData]:
+    collections = await collection_service.get_all_collections(skip=0, limit=1000)
     alpine_registry: List[AlpineData] = []
 
     REQUIRED_TAGS = {"any:read", "any:create"}
@@ -163,9 +163,9 @@ def generate_collection_alpine_components(collection_service: CollectionService)
     
     return alpine_registry
 
-def generate_media_alpine_components(collection_service: CollectionService) -> List[AlpineData]:
+async def generate_media_alpine_components(collection_service: AsyncCollectionService) -> List[AlpineData]:
     # Assuming 'media-data' is the internal collection slug for media
-    all_media = collection_service.get_submissions_for_collection("media-data", 0, 100)
+    all_media = await collection_service.get_submissions_for_collection("media-data", 0, 100)
     alpine_registry: List[AlpineData] = []
 
     for media in all_media:
@@ -188,7 +188,7 @@ def generate_media_alpine_components(collection_service: CollectionService) -> L
 
     return alpine_registry
 
-def generate_public_alpine_components(label_service: LabelService) -> List[AlpineData]:
+async def generate_public_alpine_components(label_service: AsyncLabelService) -> List[AlpineData]:
     alpine_registry: List[AlpineData] = []
 
     #0. Create the Relational Code
@@ -265,7 +265,7 @@ def generate_public_alpine_components(label_service: LabelService) -> List[Alpin
     ))
 
     # 3. Public Page Group Loader Components
-    label_group = label_service.get_main_label()
+    label_group = await label_service.get_main_label()
     for label in label_group:
         base_name = label.removeprefix("main:")
         component_name = f"{base_name}_component"
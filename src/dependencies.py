@@ -3,14 +3,13 @@
 from typing import Optional
 from fastapi import Depends, HTTPException, Request, status, Cookie
 from sqlalchemy.orm import Session
-from pydantic import ValidationError
 from services.auth import AuthService
 from services.users import UserService
-from data.database import get_db
+from data.database import get_read_db
 from data import schemas
 from fastapi_csrf_protect import CsrfProtect
 
-def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+def get_auth_service(db: Session = Depends(get_read_db)) -> AuthService:
     """Dependency to get an instance of AuthService with a DB session."""
     user_service = UserService(db)
     return AuthService(user_service)
@@ -33,13 +32,27 @@ def csrf_protect_dependency( # This should be called 'Support Older Browser' Fea
         csrf_protect.validate_csrf_in_request()
 
 
-def get_current_user(
+def get_principal(
     access_token: Optional[str] = Cookie(None),
     auth_service: AuthService = Depends(get_auth_service)
-) -> schemas.CurrentUser:
+) -> Optional[schemas.Principal]:
+    """
+    Resolves the caller of this request exactly once: token decode, one user
+    lookup, and the role's permissions from the in-memory role table.
+    FastAPI caches dependencies per request, so get_current_user, optional_user
+    and every require_permission() in the same request share this result.
+    """
+    if not access_token:
+        return None
+    return auth_service.resolve_principal(access_token)
+
+def get_current_user(
+    access_token: Optional[str] = Cookie(None),
+    principal: Optional[schemas.Principal] = Depends(get_principal)
+) -> schemas.Principal:
     """
     FastAPI dependency to get the current authenticated user from a cookie.
-    Returns a Pydantic model of the user's token data.
+    Returns the request's Principal (token data plus `permissions`).
     Raises 401 Unauthorized if the user is not authenticated or the token is invalid.
     """
     if not access_token:
@@ -50,24 +63,13 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    payload = auth_service.decode_access_token(access_token)
-    if not payload:
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    try:
-        return schemas.CurrentUser(**payload)
-    except ValidationError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    
+    return principal
 
 
 def require_permission(permission: str):
@@ -76,19 +78,10 @@ def require_permission(permission: str):
     Example Usage: `user: schemas.CurrentUser = Depends(require_permission("page:create"))`
     """
     def dependency(
-        # CHANGED: The dependency now expects and returns the Pydantic schema
-        current_user: schemas.CurrentUser = Depends(get_current_user),
-        db: Session = Depends(get_db)
-    ) -> schemas.CurrentUser:
-        user_service = UserService(db)
-        
-        user_permissions = user_service.get_user_permissions(current_user.username)
-        
+        current_user: schemas.Principal = Depends(get_current_user),
+    ) -> schemas.Principal:
         # Admin role with wildcard has all permissions
-        if "*" in user_permissions:
-            return current_user
-        
-        if permission not in user_permissions:
+        if not current_user.has_permission(permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission '{permission}' required."
@@ -97,27 +90,14 @@ def require_permission(permission: str):
     return dependency
 
 def optional_user(
-    access_token: Optional[str] = Cookie(None),
-    auth_service: AuthService = Depends(get_auth_service)
-) -> Optional[schemas.CurrentUser]: 
+    principal: Optional[schemas.Principal] = Depends(get_principal)
+) -> Optional[schemas.Principal]: 
     """
     FastAPI dependency that provides the user model if authenticated,
     but does not raise an error if not. Returns None for anonymous users
     or if the token is invalid.
     """
-    if not access_token:
-        return None
-    
-    payload = auth_service.decode_access_token(access_token)
-    if not payload:
-        return None
-        
-    try:
-        # CHANGED: Also convert to the Pydantic model here
-        return schemas.CurrentUser(**payload)
-    except ValidationError:
-        # If the token exists but is malformed, treat as an anonymous user
-        return None
+    return principal
     
 
 # List All Specific Permissions Here
@@ -1,8 +1,8 @@
 from typing import List
 from data.models import Page
 from data.schemas import EmbedData, PageBase
-from services.collections import CollectionService
-from services.pages import PageService 
+from services.collections import AsyncCollectionService
+from services.pages import AsyncPageService
 
 # --- Helpers ---
 
@@ -67,13 +67,13 @@ def generate_media_markdown(url: str, alt: str) -> str:
 
 # --- Registry Generators ---
 
-def generate_page_embeds(page_service:PageService) -> List[EmbedData]:
+async def generate_page_embeds(page_service:AsyncPageService) -> List[EmbedData]:
     """
     Generates embeds for Pages.
     Expects 'pages' to be a list of DB objects with .slug and .data attributes.
     """
     embed_registry: List[EmbedData] = []
-    pages:List[Page] = page_service.get_pages_by_label("any:read") # TODO: Make this filter only markdown-type page
+    pages:List[Page] = await page_service.get_pages_by_label("any:read") # TODO: Make this filter only markdown-type page
     for item in pages:
         slug = item.slug
         
@@ -109,13 +109,13 @@ def generate_page_embeds(page_service:PageService) -> List[EmbedData]:
 
     return embed_registry
 
-def generate_media_embeds(collection_service:CollectionService) -> List[EmbedData]:
+async def generate_media_embeds(collection_service:AsyncCollectionService) -> List[EmbedData]:
     """
     Generates embeds for Media items (Images, etc).
     Expects 'media_items' to be a list of DB objects from the 'media-data' collection.
     """
     embed_registry: List[EmbedData] = []
-    media_items = collection_service.get_submissions_for_collection("media-data")
+    media_items = await collection_service.get_submissions_for_collection("media-data")
     for media in media_items:
         # Safety checks
         if not media.data or 'slug' not in media.data:
@@ -0,0 +1,101 @@
+from typing import Any, Callable, Dict, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from data import crud
+
+# The read queries the app issues on its hot paths, called with representative arguments.
+# Add a line here when a new CRUD read is introduced.
+QUERY_SHAPES: List[Tuple[str, Callable[[Session], Any]]] = [
+    ("list_pages", lambda db: crud.list_pages(db)),
+    ("search_pages (include)", lambda db: crud.search_pages(db, query_str="any:read")),
+    ("search_pages (include + exclude)", lambda db: crud.search_pages(db, query_str="any:read -sys:hidden")),
+    ("search_pages (or + wildcard)", lambda db: crud.search_pages(db, query_str="main:* any:read|editor:read -sys:hidden")),
+    ("get_first_page_by_label", lambda db: crud.get_first_page_by_label(db, label="main:home")),
+    ("get_pages_by_author", lambda db: crud.get_pages_by_author(db, author="admin")),
+    ("get_main_labels", lambda db: crud.get_main_labels(db)),
+    ("list_collections", lambda db: crud.list_collections(db)),
+    ("list_submissions", lambda db: crud.list_submissions(db, collection_slug="media-data")),
+    ("search_submissions", lambda db: crud.search_submissions(db, query_str="any:read")),
+    ("get_user_by_username", lambda db: crud.get_user_by_username(db, username="admin")),
+    ("get_recent_pages", lambda db: crud.get_recent_pages(db)),
+    ("get_recently_updated_pages", lambda db: crud.get_recently_updated_pages(db)),
+    ("get_recent_submissions", lambda db: crud.get_recent_submissions(db)),
+]
+
+class IndexAdvisor:
+    """
+    Runs every entry of QUERY_SHAPES, captures the SQL it emits and asks SQLite
+    for the plan of each statement (EXPLAIN QUERY PLAN).
+    Flags full table scans and sorts that need a temporary B-tree.
+    """
+    def __init__(self, engine: Engine):
+        if engine.dialect.name != "sqlite":
+            raise ValueError("The index advisor reads SQLite query plans, current database is "
+                             f"'{engine.dialect.name}'.")
+        self.engine = engine
+
+    def _capture(self, shape: Callable[[Session], Any]) -> List[Tuple[str, Any]]:
+        """Calls a CRUD function and returns the (statement, parameters) pairs it executed."""
+        statements: List[Tuple[str, Any]] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        with Session(self.engine) as db:
+            event.listen(self.engine, "before_cursor_execute", record)
+            try:
+                shape(db)
+            finally:
+                event.remove(self.engine, "before_cursor_execute", record)
+                db.rollback()
+
+        return statements
+
+    def _explain(self, statement: str, parameters: Any) -> List[str]:
+        with self.engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        # Rows are (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+
+    @staticmethod
+    def _is_problem(detail: str) -> bool:
+        if "USE TEMP B-TREE" in detail:
+            return True
+        # "SCAN pages" reads the whole table; "SCAN pages USING INDEX ..." walks an index in order
+        return detail.startswith("SCAN") and "USING" not in detail and "CONSTANT ROW" not in detail
+
+    def analyze(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Returns {shape name: [{"sql": ..., "plan": [...], "problems": [...]}, ...]}.
+        """
+        report: Dict[str, List[Dict[str, Any]]] = {}
+        for name, shape in QUERY_SHAPES:
+            entries = []
+            for statement, parameters in self._capture(shape):
+                plan = self._explain(statement, parameters)
+                entries.append({
+                    "sql": statement,
+                    "plan": plan,
+                    "problems": [detail for detail in plan if self._is_problem(detail)],
+                })
+            report[name] = entries
+        return report
+
+    def print_report(self) -> int:
+        """Prints the findings and returns how many statements were flagged."""
+        flagged = 0
+        for name, entries in self.analyze().items():
+            problems = [entry for entry in entries if entry["problems"]]
+            if not problems:
+                print(f"✓ {name}")
+                continue
+
+            for entry in problems:
+                flagged += 1
+                print(f"⚠️  {name}")
+                print(f"   {' '.join(entry['sql'].split())}")
+                for detail in entry["problems"]:
+                    print(f"   -> {detail}")
+        return flagged
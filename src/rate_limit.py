@@ -0,0 +1,181 @@
+# file: src/rate_limit.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import Depends, Form, HTTPException, Request, status
+from sqlalchemy import create_engine, text
+
+from data import schemas
+from src.dependencies import optional_user
+
+# --- Token-bucket rate limiting ---
+# Each limited route owns a bucket per key (client IP, username, ...). A bucket
+# holds up to `capacity` tokens, refills at `capacity / period` tokens per
+# second and every request takes one (a batch takes one per item); a bucket
+# short of tokens means 429 with a Retry-After telling the client when enough
+# will have arrived. A check is one dictionary lookup (or one upsert in the
+# SQLite store), whatever the traffic.
+#
+# Limits are written "<capacity>/<period seconds>", e.g. "10/60", and each one
+# can be overridden with RATE_LIMIT_<NAME>; "off" disables that limit.
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+
+# Buckets kept by the in-memory store; the least recently used one is dropped
+# past this (which only forgives that key, it never blocks anyone)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# "memory" (per process) or a SQLite URL, e.g. sqlite:///rate_limits.db, to
+# share buckets between worker processes. Kept out of the main database so
+# limiting writes never queues behind the content writer.
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+
+# Use the first X-Forwarded-For address as the client IP (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+
+def parse_limit(spec: str) -> Optional[Tuple[float, float]]:
+    """Parses "10/60" into (capacity 10, refill 10/60 tokens per second); "off" gives None."""
+    if spec.strip().lower() in ("off", "none", "0"):
+        return None
+    capacity, period = spec.split("/")
+    capacity, period = float(capacity), float(period)
+    if capacity < 1 or period <= 0:
+        raise ValueError(f"Invalid rate limit '{spec}'")
+    return capacity, capacity / period
+
+class MemoryBucketStore:
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, time of last update)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        """Takes `cost` tokens; returns 0 if they were available, else seconds until they are."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class SQLiteBucketStore:
+    # Refill, take and read back in one statement, so concurrent workers
+    # cannot both spend the last token. Right-hand sides see the old row.
+    TAKE = text("""
+        INSERT INTO rate_limit_buckets (key, tokens, allowed, updated_at)
+        VALUES (:key, :capacity - :cost, 1, :now)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN min(:capacity, tokens + (:now - updated_at) * :rate) >= :cost
+                THEN min(:capacity, tokens + (:now - updated_at) * :rate) - :cost
+                ELSE min(:capacity, tokens + (:now - updated_at) * :rate) END,
+            allowed = min(:capacity, tokens + (:now - updated_at) * :rate) >= :cost,
+            updated_at = :now
+        RETURNING tokens, allowed
+    """)
+
+    # Rows idle this long are full buckets again and can go
+    PRUNE_AFTER_SECONDS = 3600
+    PRUNE_EVERY = 1000
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 5})
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            conn.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, allowed INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+        self._calls = 0
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        # Wall clock: the buckets are shared with other processes
+        now = time.time()
+        with self.engine.begin() as conn:
+            tokens, allowed = conn.execute(
+                self.TAKE, {"key": key, "capacity": capacity, "rate": rate, "cost": cost, "now": now}
+            ).one()
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                conn.execute(
+                    text("DELETE FROM rate_limit_buckets WHERE updated_at < :cutoff"),
+                    {"cutoff": now - self.PRUNE_AFTER_SECONDS},
+                )
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    def clear(self):
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM rate_limit_buckets")
+
+BUCKETS = MemoryBucketStore() if RATE_LIMIT_STORE == "memory" else SQLiteBucketStore(RATE_LIMIT_STORE)
+
+class RateLimit:
+    """One named limit, e.g. RateLimit("login_ip", "20/60"); env RATE_LIMIT_LOGIN_IP overrides it."""
+
+    def __init__(self, name: str, default: str):
+        self.name = name
+        self.limit = parse_limit(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+    def hit(self, key: str, cost: int = 1):
+        """Takes `cost` tokens from `key`'s bucket or raises 429."""
+        if not RATE_LIMIT_ENABLED or self.limit is None:
+            return
+        capacity, rate = self.limit
+        if cost > capacity:
+            # Would never fit, waiting does not help
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"At most {int(capacity)} items per request are allowed here.",
+            )
+        wait = BUCKETS.take(f"{self.name}:{key}", capacity, rate, cost)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down.",
+                headers={"Retry-After": str(max(1, int(wait + 0.999)))},
+            )
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+# Login: per IP against spraying, per account against guessing one password
+LOGIN_IP = RateLimit("login_ip", "20/60")
+LOGIN_USER = RateLimit("login_user", "5/60")
+REGISTER_IP = RateLimit("register_ip", "5/600")
+SUBMIT = RateLimit("submit", "30/60")
+
+def limit_login(request: Request, username: str = Form(...)):
+    LOGIN_IP.hit(client_ip(request))
+    LOGIN_USER.hit(username.lower())
+
+def limit_register(request: Request):
+    REGISTER_IP.hit(client_ip(request))
+
+def _submitter(request: Request, user: Optional[schemas.Principal]) -> str:
+    # Signed-in submitters get a bucket of their own, anonymous ones share their IP's
+    return f"user:{user.username}" if user else f"ip:{client_ip(request)}"
+
+def limit_submit(request: Request, user: Optional[schemas.Principal] = Depends(optional_user)):
+    SUBMIT.hit(_submitter(request, user))
+
+def limit_submit_batch(request: Request, user: Optional[schemas.Principal], count: int):
+    """Same bucket as limit_submit, one token per submission. Called by the batch route once the items are validated."""
+    SUBMIT.hit(_submitter(request, user), cost=max(1, count))
@@ -3,7 +3,7 @@ import shutil
 from pathlib import Path
 from typing import Any, List, Dict
 from sqlalchemy import inspect
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from jinja2 import Environment, BaseLoader
 
 from data.database import SessionLocal
@@ -98,7 +98,8 @@ class SSGGenerator:
 
         # 3. Fetch All Public Pages
         print("📚 Fetching all public pages...")
-        all_pages = self.page_service.get_pages_by_label("any:read")
+        # Every page gets rendered below, so fetch bodies in the same query
+        all_pages = self.page_service.get_pages_by_label("any:read", load_body=True)
         
         # --- HTML GENERATION ---
         count = 0
@@ -201,7 +202,11 @@ class SSGGenerator:
 
         # 2. Fetch from DB
         # Optimization TODO: Move filtering to SQL query to avoid fetching unauthorized rows
-        collections = self.db.query(models.Collection).all()
+        collections = (
+            self.db.query(models.Collection)
+            .options(selectinload(models.Collection.labels), selectinload(models.Collection.submissions))
+            .all()
+        )
         
         # 3. Process 
         for col in collections:
@@ -2,30 +2,52 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
 
 from main import app
-from data.database import Base, get_db
-
-# Use in-memory SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+from data.crud import (
+    AGGREGATE_CACHE, FACET_CACHE, LABEL_INDEX, LABEL_SUGGESTIONS, PAGE_QUERY_CACHE,
+    ROLE_PERMISSIONS, TAG_SUGGESTIONS, TOKEN_CACHE, clear_label_query_cache, invalidate_name_caches
 )
+from data.database import Base, get_db, get_read_db, get_async_db
+from src.rate_limit import BUCKETS
+
+# Use a throwaway SQLite file: async routes reach it through aiosqlite on their own
+# connections, which an in-memory database could not share with the sync session.
+@pytest.fixture(scope="function")
+def db_path(tmp_path):
+    return tmp_path / "test.db"
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@pytest.fixture(scope="function")
+def engine(db_path):
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+    )
+    # Label/tag ids cached for the previous test's database do not exist in this one
+    invalidate_name_caches()
+    clear_label_query_cache()
+    LABEL_INDEX.invalidate()
+    FACET_CACHE.clear()
+    AGGREGATE_CACHE.clear()
+    PAGE_QUERY_CACHE.clear()
+    ROLE_PERMISSIONS.invalidate()
+    TOKEN_CACHE.invalidate()
+    LABEL_SUGGESTIONS.invalidate()
+    TAG_SUGGESTIONS.invalidate()
+    BUCKETS.clear()
+    yield engine
+    engine.dispose()
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(engine):
     """
     Creates a fresh database session for a test.
     """
     # Create tables
     Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = TestingSessionLocal()
     try:
         yield db
@@ -35,7 +57,7 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, db_path):
     """
     The TestClient that uses the db_session created above.
     """
@@ -44,7 +66,17 @@ def client(db_session):
             yield db_session
         finally:
             pass
-    
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+    app.dependency_overrides.clear()
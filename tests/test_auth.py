@@ -1,6 +1,9 @@
 # tests/test_auth.py
 import pytest
-from services.users import hash_password
+from fastapi import HTTPException
+from sqlalchemy import event
+from services.users import UserService, hash_password
+from data import crud, schemas
 from data.models import User
 
 LOGIN_URL = "/auth/login" 
@@ -84,4 +87,90 @@ def test_login_disabled_user(client, db_session):
     response = client.post(LOGIN_URL, data=payload)
 
     # 3. ASSERT
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+def test_principal_is_resolved_without_auth_queries(client, db_session, engine):
+    """
+    require_permission and the route body share one Principal: the validated
+    token comes from the token cache and the role permissions from the
+    in-memory role table.
+    """
+    crud.save_role(db_session, "editor", ["collection:read"])
+    db_session.add(User(username="ed", hashed_password=hash_password("pw-123456"), role="editor"))
+    db_session.commit()
+    assert client.post(LOGIN_URL, data={"username": "ed", "password": "pw-123456"}).status_code == 200
+    client.get("/collections/list")  # Warm up: validates the token, loads the role table
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/collections/list")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert not any("FROM users" in s or "FROM roles" in s for s in statements)
+
+    # Role changes apply to existing sessions (tokens) right away
+    crud.save_role(db_session, "editor", [])
+    assert client.get("/collections/list").status_code == 403
+
+def test_user_writes_revoke_cached_tokens(client, db_session):
+    crud.save_role(db_session, "editor", ["collection:read"])
+    db_session.add(User(username="ed", hashed_password=hash_password("pw-123456"), role="editor"))
+    db_session.commit()
+    assert client.post(LOGIN_URL, data={"username": "ed", "password": "pw-123456"}).status_code == 200
+    assert client.get("/collections/list").status_code == 200
+
+    UserService(db_session).update_user("ed", schemas.UserUpdate(disabled=True))
+    assert client.get("/collections/list").status_code == 401
+
+def test_login_rehashes_passwords_after_a_cost_change(client, db_session, monkeypatch):
+    import services.users as users
+    monkeypatch.setattr(users, "BCRYPT_ROUNDS", 4)
+    db_session.add(User(username="old", hashed_password=hash_password("pw-123456"), role="user"))
+    db_session.commit()
+
+    monkeypatch.setattr(users, "BCRYPT_ROUNDS", 5)
+    assert client.post(LOGIN_URL, data={"username": "old", "password": "pw-123456"}).status_code == 200
+
+    db_session.expire_all()
+    stored = crud.get_user_by_username(db_session, "old").hashed_password
+    assert stored.startswith("$2b$05$") and not users.password_needs_rehash(stored)
+    assert client.post(LOGIN_URL, data={"username": "old", "password": "pw-123456"}).status_code == 200
+
+def test_rehash_failures_do_not_fail_the_login(client, db_session, monkeypatch):
+    import services.users as users
+    monkeypatch.setattr(users, "BCRYPT_ROUNDS", 4)
+    db_session.add(User(username="old", hashed_password=hash_password("pw-123456"), role="user"))
+    db_session.commit()
+
+    async def broken(self, user, hashed_password):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(users, "BCRYPT_ROUNDS", 5)
+    monkeypatch.setattr(users.AsyncUserService, "update_password_hash", broken)
+    assert client.post(LOGIN_URL, data={"username": "old", "password": "pw-123456"}).status_code == 200
+
+def test_saturated_hash_pool_answers_503_with_retry_after(client, db_session, monkeypatch):
+    import asyncio
+    import threading
+    import time
+    import services.users as users
+    db_session.add(User(username="busy", hashed_password=hash_password("pw-123456"), role="user"))
+    db_session.commit()
+
+    # Every slot taken: rejected before queueing
+    monkeypatch.setattr(users, "_hash_slots", threading.BoundedSemaphore(1))
+    users._hash_slots.acquire()
+    response = client.post(LOGIN_URL, data={"username": "busy", "password": "pw-123456"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    # Queued too long: rejected after the timeout, the slot comes back when the job ends
+    users._hash_slots.release()
+    monkeypatch.setattr(users, "PASSWORD_HASH_TIMEOUT_SECONDS", 0.01)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(users._run_in_hash_pool(time.sleep, 0.2))
+    assert error.value.status_code == 503
+    time.sleep(0.3)
+    assert users._hash_slots.acquire(blocking=False)
@@ -0,0 +1,96 @@
+# tests/test_batch.py
+import pytest
+
+from data import crud, schemas
+from data.models import User
+from services.collections import CollectionService
+from services.users import hash_password
+from src.audit import logger
+
+@pytest.fixture(autouse=True)
+def audit_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "filepath", str(tmp_path / "audit.json"))
+
+@pytest.fixture
+def default_page(db_session):
+    # Shipped with every install, new pages copy its `custom`
+    crud.create_pages(db_session, [schemas.PageCreate(slug="default-page", title="Default", type="markdown")])
+    db_session.commit()
+
+def login(client, db_session, username, role, permissions):
+    crud.save_role(db_session, role, permissions)
+    db_session.add(User(username=username, hashed_password=hash_password("pw-123456"), role=role))
+    db_session.commit()
+    assert client.post("/auth/login", data={"username": username, "password": "pw-123456"}).status_code == 200
+
+def statuses(response):
+    assert response.status_code == 200, response.text
+    return [(result["key"], result["status"]) for result in response.json()["results"]]
+
+def test_page_batches_report_per_item_results(client, db_session, default_page):
+    login(client, db_session, "writer", "writer", ["page:create", "page:update", "markdown:create", "markdown:update", "markdown:delete"])
+    response = client.post("/page/batch", json=[
+        {"slug": "one", "title": "One"},
+        {"slug": "two", "title": "Two", "type": "html"},  # no html:create
+        {"slug": "one", "title": "Again"},
+        {"slug": "admin", "title": "Reserved"},
+    ])
+    assert statuses(response) == [("one", 201), ("two", 403), ("one", 409), ("admin", 400)]
+    assert response.json()["succeeded"] == 1 and response.json()["failed"] == 3
+
+    response = client.put("/page/batch", json=[{"slug": "one", "title": "One!"}, {"slug": "nope", "title": "x"}])
+    assert statuses(response) == [("one", 200), ("nope", 404)]
+    assert crud.get_page(db_session, "one").title == "One!"
+
+    # Missing slugs are no-ops, like DELETE /page/{slug}; no page:delete and not the author of "theirs"
+    crud.create_pages(db_session, [schemas.PageCreate(slug="theirs", title="Theirs", type="markdown", author="someone")])
+    db_session.commit()
+    response = client.post("/page/batch/delete", json={"slugs": ["one", "ghost", "theirs"]})
+    assert statuses(response) == [("one", 204), ("ghost", 204), ("theirs", 403)]
+    db_session.expire_all()
+    assert crud.get_page(db_session, "one") is None
+    assert crud.get_page(db_session, "theirs") is not None
+
+def test_page_batch_is_one_transaction(client, db_session, default_page, monkeypatch):
+    login(client, db_session, "writer", "writer", ["page:create"])
+    assert statuses(client.post("/page/batch", json=[{"slug": "taken", "title": "T"}])) == [("taken", 201)]
+
+    # "taken" slips past the up-front check, as if created concurrently: nothing is written
+    monkeypatch.setattr(crud, "get_pages_by_slugs", lambda db, slugs: {})
+    response = client.post("/page/batch", json=[{"slug": "fresh", "title": "F"}, {"slug": "taken", "title": "T"}])
+    assert statuses(response) == [("fresh", 409), ("taken", 409)]
+    monkeypatch.undo()
+    db_session.expire_all()
+    assert crud.get_page(db_session, "fresh") is None
+
+def test_submission_batches_validate_up_front_and_hide_foreign_items(client, db_session):
+    service = CollectionService(db_session)
+    schema = {"fields": [{"name": "msg", "type": "string"}]}
+    for slug in ("guestbook", "private"):
+        service.create_new_collection(schemas.CollectionCreate(
+            slug=slug, title=slug, labels=["any:create"] if slug == "guestbook" else [], schema=schema
+        ))
+    private_id = service.create_new_submission(
+        schemas.SubmissionCreate(collection_slug="private", data={"msg": "secret"})
+    ).id
+
+    response = client.post("/collections/guestbook/submissions/batch", json=[
+        {"data": {"msg": "hi"}}, {"data": {"spam": 1}}, {"data": {"msg": "yo"}},
+    ])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == [201, 422, 201]
+    first_id, second_id = int(body["results"][0]["key"]), int(body["results"][2]["key"])
+
+    # Anonymous users may not update here; another collection's submission is just "not found"
+    login(client, db_session, "mod", "mod", ["submission:update", "submission:delete"])
+    response = client.put("/collections/guestbook/submissions/batch", json=[
+        {"id": first_id, "data": {"msg": "edited"}}, {"id": private_id, "data": {"msg": "x"}},
+        {"id": second_id, "data": {"spam": 1}},
+    ])
+    assert statuses(response) == [(str(first_id), 200), (str(private_id), 404), (str(second_id), 422)]
+
+    response = client.post("/collections/guestbook/submissions/batch/delete", json={"ids": [second_id, private_id]})
+    assert statuses(response) == [(str(second_id), 204), (str(private_id), 404)]
+    assert [s.data["msg"] for s in service.get_submissions_for_collection("guestbook")] == ["edited"]
+    assert crud.get_submission(db_session, private_id) is not None
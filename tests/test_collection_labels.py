@@ -0,0 +1,14 @@
+# tests/test_collection_labels.py
+from data import crud, schemas
+
+def test_collections_filter_by_label_in_sql(db_session):
+    for i in range(5):
+        crud.create_collection(db_session, schemas.CollectionCreate(
+            slug=f"c{i}", title=f"C{i}", schema={"fields": []},
+            labels=["any:read"] if i % 2 == 0 else ["main:forms"],
+        ))
+
+    # A full page of matches even though the newest rows do not match
+    assert [c.slug for c in crud.list_collections(db_session, limit=2, label="main:forms")] == ["c3", "c1"]
+    assert crud.list_collections(db_session, label="main:missing") == []
+    assert crud.get_collection_label_names(db_session) == ["any:read", "main:forms"]
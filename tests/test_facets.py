@@ -0,0 +1,23 @@
+# tests/test_facets.py
+from data import crud, schemas
+
+def test_facets_count_matching_pages_and_follow_writes(client, db_session):
+    for slug, labels in {
+        "a": ["any:read", "main:blog", "topic:food"],
+        "b": ["any:read", "main:blog", "topic:travel"],
+        "c": ["any:read", "main:news", "topic:food"],
+        "hidden": ["main:blog", "topic:food"],
+    }.items():
+        crud.create_page(db_session, schemas.PageCreate(slug=slug, title=slug, labels=labels))
+
+    response = client.get("/search/facets", params={"namespace": "main:"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"label": "main:blog", "count": 2}, {"label": "main:news", "count": 1}]
+
+    response = client.get("/search/facets", params={"labels": "topic:food", "namespace": "main:"})
+    assert response.json() == [{"label": "main:blog", "count": 1}, {"label": "main:news", "count": 1}]
+
+    # A page write invalidates the cached counts
+    crud.update_page(db_session, "c", schemas.PageUpdate(labels=["any:read", "main:blog", "topic:food"]))
+    response = client.get("/search/facets", params={"labels": "topic:food", "namespace": "main:"})
+    assert response.json() == [{"label": "main:blog", "count": 2}]
@@ -0,0 +1,56 @@
+# tests/test_fulltext.py
+import pytest
+
+from data import crud, migrations, schemas
+
+def seed(db_session):
+    crud.create_page(db_session, schemas.PageCreate(
+        slug="sourdough", title="Sourdough basics", content="Bread at home", labels=["any:read", "main:blog"],
+    ))
+    crud.update_page(db_session, "sourdough", schemas.PageMarkdownUpdate(markdown="Feed the starter, then bake."))
+    crud.create_page(db_session, schemas.PageCreate(
+        slug="starter", title="Keeping a starter", content="Notes", labels=["any:read", "main:notes"],
+    ))
+    crud.update_page(db_session, "starter", schemas.PageMarkdownUpdate(markdown="A sourdough starter needs flour and water."))
+    crud.create_page(db_session, schemas.PageCreate(
+        slug="private", title="Sourdough secrets", labels=["main:blog"],
+    ))
+    crud.create_collection(db_session, schemas.CollectionCreate(
+        slug="orders", title="Orders", schema={"fields": []}, labels=["any:read"],
+    ))
+    crud.create_submission(db_session, schemas.SubmissionCreate(
+        collection_slug="orders", data={"item": "Rye loaf", "qty": 2},
+    ))
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like-fallback"])
+def fulltext(request, engine, db_session):
+    if request.param:
+        migrations.ensure_fulltext(engine)
+    seed(db_session)
+    return request.param
+
+def test_page_search_ranks_and_filters(client, fulltext):
+    response = client.get("/search", params={"q": "sourdough"})
+    assert response.status_code == 200, response.text
+    hits = response.json()
+    # "private" is not any:read
+    assert {hit["slug"] for hit in hits} == {"sourdough", "starter"}
+    if fulltext:
+        # Title matches weigh more than body matches
+        assert hits[0]["slug"] == "sourdough"
+        assert hits[0]["rank"] is not None
+    assert all("<mark>" in hit["snippet"] for hit in hits)
+
+    response = client.get("/search", params={"q": "sourdough", "labels": "main:notes"})
+    assert [hit["slug"] for hit in response.json()] == ["starter"]
+
+def test_index_follows_page_writes(db_session, fulltext):
+    crud.update_page(db_session, "starter", schemas.PageUpdate(title="Rye starter"))
+    crud.delete_page(db_session, "sourdough")
+    assert [page.slug for page, _, _ in crud.search_pages_text(db_session, "rye")] == ["starter"]
+    assert [page.slug for page, _, _ in crud.search_pages_text(db_session, "bake")] == []
+
+def test_submission_search(db_session, fulltext):
+    results = crud.search_submissions_text(db_session, "rye", collection_slug="orders")
+    assert [submission.data["item"] for submission, _, _ in results] == ["Rye loaf"]
+    assert crud.search_submissions_text(db_session, "wheat") == []
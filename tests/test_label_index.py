@@ -0,0 +1,57 @@
+# tests/test_label_index.py
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from data import crud, models, schemas
+from data.crud import label_index
+
+def slugs(pages):
+    return sorted(page.slug for page in pages)
+
+def test_bitmap_round_trip():
+    ids = [0, 3, 8, 9, 1000]
+    assert label_index.bitmap_to_ids(label_index.ids_to_bitmap(ids)) == ids
+
+def test_index_follows_page_writes(db_session):
+    crud.create_page(db_session, schemas.PageCreate(slug="a", title="A", labels=["any:read", "main:blog"]))
+    crud.create_page(db_session, schemas.PageCreate(slug="b", title="B", labels=["any:read"]))
+    assert slugs(crud.get_pages_by_labels(db_session, ["any:read", "main:blog"])) == ["a"]
+    assert slugs(crud.get_pages_by_labels(db_session, ["main:blog", "main:news"], match_all=False)) == ["a"]
+
+    # Applied in-process on commit, no rebuild needed
+    crud.update_page(db_session, "b", schemas.PageUpdate(labels=["any:read", "main:news"]))
+    crud.create_page(db_session, schemas.PageCreate(slug="c", title="C", labels=["main:blog"]))
+    crud.delete_page(db_session, "a")
+    assert slugs(crud.get_pages_by_labels(db_session, ["main:blog", "main:news"], match_all=False)) == ["b", "c"]
+    assert slugs(crud.get_pages_by_labels(db_session, ["main:blog", "-any:read"])) == ["c"]
+
+    page = crud.get_page(db_session, "b")
+    assert crud.page_has_labels(db_session, page, ["any:read", "main:news"])
+    assert not crud.page_has_labels(db_session, page, ["any:read", "main:blog"])
+
+def test_writes_from_elsewhere_trigger_a_rebuild(db_session, engine, monkeypatch):
+    monkeypatch.setattr(label_index, "LABEL_INDEX_RECHECK_SECONDS", 0)
+    crud.create_page(db_session, schemas.PageCreate(slug="a", title="A", labels=["main:blog"]))
+    assert slugs(crud.get_pages_by_labels(db_session, ["main:blog"])) == ["a"]
+
+    # What another worker process does: rows change and the generation moves,
+    # but nothing is staged on this process' index
+    with Session(engine) as other:
+        label_id = crud.get_label_ids(other, ["main:blog"])["main:blog"]
+        other.execute(insert(models.Page).values(slug="b", title="B", created="2", updated="2"))
+        other.execute(insert(models.page_labels).values(page_slug="b", label_id=label_id))
+        crud.bump_generation(other, crud.PAGES_GENERATION)
+        other.commit()
+
+    assert slugs(crud.get_pages_by_labels(db_session, ["main:blog"])) == ["a", "b"]
+
+def test_label_query_results_are_cached_until_a_page_write(db_session):
+    for slug in ["old", "new"]:
+        crud.create_page(db_session, schemas.PageCreate(slug=slug, title=slug, labels=["sys:template", "any:read"]))
+    first = crud.get_first_page_by_labels(db_session, ["any:read", "sys:template"])
+    assert first.slug == "new"
+    assert [page.slug for page in crud.get_pages_by_labels(db_session, ["sys:template", "any:read"])] == ["new", "old"]
+    assert len(crud.PAGE_QUERY_CACHE._entries) == 2
+
+    crud.delete_page(db_session, "new")
+    assert crud.get_first_page_by_labels(db_session, ["sys:template", "any:read"]).slug == "old"
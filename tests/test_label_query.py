@@ -0,0 +1,35 @@
+# tests/test_label_query.py
+import pytest
+
+from data import crud, models, schemas
+
+PAGES = {
+    "home": ["any:read", "main:home"],
+    "post": ["any:read", "main:blog", "blog:post"],
+    "draft": ["main:blog", "blog:post", "sys:hidden"],
+    "news": ["any:read", "main:news"],
+}
+
+@pytest.fixture
+def pages(db_session):
+    for slug, labels in PAGES.items():
+        crud.create_page(db_session, schemas.PageCreate(slug=slug, title=slug, labels=labels))
+
+@pytest.mark.parametrize("query, expected", [
+    ("any:read", {"home", "post", "news"}),
+    ("main:blog blog:post", {"post", "draft"}),
+    ("blog:post -sys:hidden", {"post"}),
+    ("main:blog|main:news", {"post", "draft", "news"}),
+    ("main:* -main:home", {"post", "draft", "news"}),
+    ("any:read -main:blog|main:news", {"home"}),
+    ("-any:read", {"draft"}),
+    ("main:blog unknown:label", set()),
+    ("main:blog -unknown:label", {"post", "draft"}),
+])
+def test_label_query(db_session, pages, query, expected):
+    assert {page.slug for page in crud.search_pages(db_session, query)} == expected
+
+def test_equivalent_queries_share_one_compiled_condition(db_session, pages):
+    first = crud.compile_label_query(models.Page, "blog:post -sys:hidden any:read", db_session)
+    second = crud.compile_label_query(models.Page, "any:read  -sys:hidden Blog:Post", db_session)
+    assert first is second
@@ -0,0 +1,37 @@
+# tests/test_label_suggestions.py
+from sqlalchemy import event
+
+from data import crud, schemas
+from services.labels import LabelService
+
+def test_prefix_trie_ranks_by_count():
+    trie = crud.PrefixTrie(top_k=2)
+    for name, count in {"main:blog": 5, "main:news": 9, "main:docs": 1, "topic:food": 3}.items():
+        trie.add(name, count)
+    assert trie.suggest("main:", 5) == [("main:news", 9), ("main:blog", 5)]
+    trie.add("main:docs", 7)
+    assert trie.suggest("main:", 5) == [("main:news", 9), ("main:docs", 7)]
+    assert trie.suggest("x", 5) == []
+
+def test_autocomplete_sees_new_labels_without_a_rebuild(db_session, engine):
+    for slug, labels in {"a": ["main:blog", "topic:food"], "b": ["main:blog", "main:news"]}.items():
+        crud.create_page(db_session, schemas.PageCreate(slug=slug, title=slug, labels=labels))
+
+    service = LabelService(db_session)
+    names = lambda prefix: [(s.name, s.count) for s in service.autocomplete(prefix)]
+    assert names("Main") == []  # Not built yet: keystrokes never query
+    crud.rebuild_suggestions(db_session)  # Startup / background refresh
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert names("Main") == [("main:blog", 2), ("main:news", 1)]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+
+    trie = crud.LABEL_SUGGESTIONS._trie
+    crud.create_page(db_session, schemas.PageCreate(slug="c", title="c", labels=["main:docs"]))
+    assert names("main:d") == [("main:docs", 1)]
+    assert crud.LABEL_SUGGESTIONS._trie is trie
@@ -0,0 +1,26 @@
+# tests/test_migrations.py
+from sqlalchemy import create_engine, text
+
+from data import migrations
+from data.crud.pagination import decode_cursor, next_cursor
+
+def test_backfill_created_makes_legacy_rows_paginable(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # An older release: `created` was nullable
+        conn.execute(text("CREATE TABLE submissions (id INTEGER PRIMARY KEY, created VARCHAR, updated VARCHAR)"))
+        conn.execute(text(
+            "INSERT INTO submissions VALUES (1, NULL, '2024-05-01T00:00:00+00:00'), (2, NULL, NULL), "
+            "(3, '2025-01-01T00:00:00+00:00', NULL)"
+        ))
+
+    assert migrations.backfill_created(engine) == 2
+    assert migrations.backfill_created(engine) == 0
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, created FROM submissions ORDER BY created DESC, id DESC")).all()
+    assert [row.created for row in rows] == [
+        "2025-01-01T00:00:00+00:00", "2024-05-01T00:00:00+00:00", migrations.LEGACY_CREATED
+    ]
+    # The cursor for the last (legacy) row can be resumed
+    assert decode_cursor(next_cursor(rows, len(rows))) == (migrations.LEGACY_CREATED, 2)
+    engine.dispose()
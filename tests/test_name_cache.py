@@ -0,0 +1,52 @@
+# tests/test_name_cache.py
+from sqlalchemy import event
+
+from data import crud, models, schemas
+
+def test_rolled_back_names_never_reach_the_cache(db_session):
+    crud.get_label_ids(db_session, ["draft"])
+    db_session.rollback()
+
+    assert crud.LABEL_IDS.cached_ids(["draft"]) == {}
+    assert db_session.query(models.Label).filter_by(name="draft").first() is None
+
+def test_committed_names_are_cached_and_filtered_by_id(db_session):
+    crud.create_page(db_session, schemas.PageCreate(slug="a", title="A", labels=["any:read", "main:blog"]))
+    crud.create_page(db_session, schemas.PageCreate(slug="b", title="B", labels=["any:read"]))
+
+    cached = crud.LABEL_IDS.cached_ids(["any:read", "main:blog"])
+    assert set(cached) == {"any:read", "main:blog"}
+    # Names that already exist are reused, not inserted again
+    assert crud.get_label_ids(db_session, ["Main:Blog"]) == {"main:blog": cached["main:blog"]}
+
+    assert [p.slug for p in crud.search_pages(db_session, "any:read -main:blog")] == ["b"]
+    assert [p.slug for p in crud.search_pages(db_session, "any:read main:blog")] == ["a"]
+    assert crud.search_pages(db_session, "any:read unknown:label") == []
+
+def test_writes_with_known_names_skip_the_dictionary_tables(db_session, engine):
+    crud.create_page(db_session, schemas.PageCreate(slug="a", title="A", labels=["any:read"], tags=["bread"]))
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        crud.create_page(db_session, schemas.PageCreate(slug="b", title="B", labels=["any:read"], tags=["bread"]))
+        crud.update_page(db_session, "a", schemas.PageUpdate(labels=["any:read"], tags=["bread"]))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    # Only the page's own labels/tags are read back, never the names themselves
+    assert statements and not any("labels.id IN" in s or "tags.id IN" in s for s in statements)
+    db_session.expire_all()
+    page = crud.get_page(db_session, "b")
+    assert [label.name for label in page.labels] == ["any:read"] and [tag.name for tag in page.tags] == ["bread"]
+
+def test_dialects_without_on_conflict_fall_back_to_plain_inserts(db_session, monkeypatch):
+    monkeypatch.delitem(crud.name_cache.UPSERT_INSERTS, "sqlite")
+
+    first = crud.get_label_ids(db_session, ["a", "b"])
+    assert crud.get_label_ids(db_session, ["a", "b", "c"]).keys() == {"a", "b", "c"}
+    assert crud.get_label_ids(db_session, ["a"]) == {"a": first["a"]}
+    assert [crud.bump_generation(db_session, "pages") for _ in range(3)] == [1, 2, 3]
+    db_session.commit()
+    assert db_session.query(models.Label).count() == 3
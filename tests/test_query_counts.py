@@ -0,0 +1,82 @@
+# tests/test_query_counts.py
+import pytest
+from sqlalchemy import event
+
+from data import crud, schemas
+from data.crud import label_index
+from data.models import Role, User
+from services.users import hash_password
+
+# List endpoints must batch-load labels/tags: the number of SELECTs they issue
+# may not grow with the number of rows they return (no N+1 lazy loads).
+LIST_ENDPOINTS = [
+    "/page/list",
+    "/search",
+    "/collections/list",
+    "/collections/notes/submissions",
+]
+
+def seed(db_session, start: int, stop: int):
+    for i in range(start, stop):
+        crud.create_page(db_session, schemas.PageCreate(
+            slug=f"page-{i}",
+            title=f"Page {i}",
+            labels=["any:read", f"main:group-{i}"],
+            tags=["news", f"tag-{i}"],
+        ))
+        crud.create_collection(db_session, schemas.CollectionCreate(
+            slug="notes" if i == 0 else f"collection-{i}",
+            title=f"Collection {i}",
+            schema={"fields": []},
+            labels=["any:read", f"main:group-{i}"],
+            tags=[f"tag-{i}"],
+        ))
+        crud.create_submission(db_session, schemas.SubmissionCreate(
+            collection_slug="notes",
+            data={"index": i},
+            labels=[f"label-{i}"],
+            tags=[f"tag-{i}"],
+        ))
+    # Start from an empty identity map so nothing is served from earlier loads
+    db_session.expunge_all()
+
+def login_admin(client, db_session):
+    db_session.add(Role(role_name="admin", permissions=["*"]))
+    db_session.add(User(username="admin", hashed_password=hash_password("password123"), role="admin"))
+    db_session.commit()
+    response = client.post("/auth/login", data={"username": "admin", "password": "password123"})
+    assert response.status_code == 200
+
+def count_selects(engine, client, url: str) -> int:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+@pytest.mark.parametrize("url", LIST_ENDPOINTS)
+def test_list_query_count_is_constant(client, db_session, engine, url, monkeypatch):
+    # Check the label index generation on every request, not depending on timing
+    monkeypatch.setattr(label_index, "LABEL_INDEX_RECHECK_SECONDS", 0)
+    login_admin(client, db_session)
+
+    # Warm-ups build the in-memory label index and fill the result caches,
+    # so both counts are taken in the same (cached) state
+    seed(db_session, 0, 2)
+    count_selects(engine, client, url)
+    small = count_selects(engine, client, url)
+
+    seed(db_session, 2, 10)
+    count_selects(engine, client, url)
+    large = count_selects(engine, client, url)
+
+    assert large == small
@@ -0,0 +1,62 @@
+# tests/test_rate_limit.py
+import pytest
+
+from data import schemas
+from services.collections import CollectionService
+from src.rate_limit import MemoryBucketStore, SQLiteBucketStore
+
+LOGIN_URL = "/auth/login"
+
+def test_login_is_limited_per_account_with_retry_after(client):
+    for _ in range(5):
+        assert client.post(LOGIN_URL, data={"username": "victim", "password": "guess"}).status_code == 401
+    response = client.post(LOGIN_URL, data={"username": "victim", "password": "guess"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Another account from the same IP still has its own bucket
+    assert client.post(LOGIN_URL, data={"username": "other", "password": "guess"}).status_code == 401
+
+@pytest.fixture
+def guestbook(db_session):
+    CollectionService(db_session).create_new_collection(schemas.CollectionCreate(
+        slug="guestbook", title="Guestbook", labels=["any:create"], schema={"fields": [{"name": "msg", "type": "string"}]}
+    ))
+
+def test_anonymous_submissions_are_limited(client, guestbook):
+    statuses = [client.post("/collections/guestbook/submit", json={"data": {"msg": "hi"}}).status_code for _ in range(31)]
+    assert statuses == [201] * 30 + [429]
+
+def test_batch_submissions_are_charged_per_item(client, guestbook):
+    batch = lambda size: client.post("/collections/guestbook/submissions/batch", json=[{"data": {"msg": "hi"}}] * size)
+
+    # More than the bucket can ever hold: refused outright, no point retrying
+    response = batch(31)
+    assert response.status_code == 429 and "Retry-After" not in response.headers
+
+    assert batch(20).status_code == 200
+    response = batch(20)  # 10 tokens left
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) >= 1
+    assert batch(10).status_code == 200
+    assert client.post("/collections/guestbook/submit", json={"data": {"msg": "hi"}}).status_code == 429
+
+def test_batches_are_charged_only_for_what_they_write(client, guestbook):
+    # Unknown collections and items the schema rejects cost nothing
+    for _ in range(5):
+        assert client.post("/collections/nope/submissions/batch", json=[{"data": {"msg": "hi"}}] * 20).status_code == 404
+    response = client.post("/collections/guestbook/submissions/batch", json=[{"data": {"msg": "hi", "extra": 1}}] * 10 + [{"data": {"msg": "hi"}}] * 30)
+    assert [result["status"] for result in response.json()["results"]].count(201) == 30
+
+def test_stores_agree_on_bucket_arithmetic(tmp_path):
+    for store in (MemoryBucketStore(), SQLiteBucketStore(f"sqlite:///{tmp_path / 'limits.db'}")):
+        assert store.take("a", 2, 0.5) == 0 and store.take("a", 2, 0.5) == 0
+        assert 1.9 < store.take("a", 2, 0.5) <= 2  # Empty: the next token is ~2 seconds away
+        assert store.take("b", 2, 0.5) == 0
+        assert store.take("c", 5, 1, cost=4) == 0
+        assert 2.9 < store.take("c", 5, 1, cost=4) <= 3  # 1 left, 3 more to come
+
+    # Memory stays bounded: the least recently used bucket goes first
+    store = MemoryBucketStore(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        store.take(key, 2, 1)
+    assert list(store._buckets) == ["a", "c"]
@@ -0,0 +1,26 @@
+# tests/test_role_cache.py
+from sqlalchemy import event, text
+
+from data import crud
+from data.crud import role_cache
+
+def test_role_permissions_are_cached_and_follow_role_writes(db_session, engine, monkeypatch):
+    crud.save_role(db_session, "editor", ["page:read"])
+    assert crud.get_role_permissions(db_session, "editor") == ["page:read"]
+
+    # Same process: applied on commit
+    crud.save_role(db_session, "editor", ["page:read", "page:update"])
+    assert crud.get_role_permissions(db_session, "editor") == ["page:read", "page:update"]
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert crud.get_role_permissions(db_session, "editor") == ["page:read", "page:update"]
+    assert crud.get_role_permissions(db_session, "missing") == []
+    assert statements == []
+
+    # Another worker process: noticed through the generation
+    monkeypatch.setattr(role_cache, "ROLE_CACHE_RECHECK_SECONDS", 0)
+    with engine.begin() as conn:
+        conn.execute(text("""UPDATE roles SET permissions_json = '["*"]' WHERE role_name = 'editor'"""))
+        conn.execute(text("UPDATE generations SET value = value + 1 WHERE name = 'roles'"))
+    assert crud.get_role_permissions(db_session, "editor") == ["*"]